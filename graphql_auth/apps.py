@@ -7,3 +7,16 @@ class GraphQLAuthConfig(AppConfig):
 
     def ready(self):
         import graphql_auth.signals
+
+        from .settings import graphql_auth_settings
+        from .utils import preload_password_validators
+
+        if graphql_auth_settings.PRELOAD_PASSWORD_VALIDATORS:
+            preload_password_validators()
+
+        from .status import status_on_user_model
+
+        if status_on_user_model():
+            from .models import UserModel, UserStatusDescriptor
+
+            UserModel.status = UserStatusDescriptor()
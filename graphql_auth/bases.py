@@ -1,6 +1,9 @@
 import graphene
 
-from .shortcuts import OutputErrorType
+from .metrics import instrument_mutation
+from .shortcuts import get_output_error_type
+from .tracing import span
+from .utils import compile_dynamic_fields
 
 
 class SuccessOutput:
@@ -8,7 +11,8 @@ class SuccessOutput:
 
 
 class ErrorsOutput:
-    errors = graphene.Field(OutputErrorType)
+    # resolved when the schema is built, see `CUSTOM_ERROR_TYPE` setting
+    errors = graphene.Field(get_output_error_type)
 
 
 class SuccessErrorsOutput(SuccessOutput, ErrorsOutput):
@@ -22,7 +26,10 @@ class MutationMixin:
 
     @classmethod
     def mutate(cls, root, info, **input):
-        return cls.resolve_mutation(root, info, **input)  # type: ignore
+        with span("graphql_auth.mutation", mutation=cls.__name__):
+            return instrument_mutation(
+                cls.__name__, cls.resolve_mutation, root, info, input  # type: ignore
+            )
 
     @classmethod
     def parent_resolve(cls, root, info, **kwargs):
@@ -36,7 +43,10 @@ class RelayMutationMixin:
 
     @classmethod
     def mutate_and_get_payload(cls, root, info, **kwargs):
-        return cls.resolve_mutation(root, info, **kwargs)  # type: ignore
+        with span("graphql_auth.mutation", mutation=cls.__name__):
+            return instrument_mutation(
+                cls.__name__, cls.resolve_mutation, root, info, kwargs  # type: ignore
+            )
 
     @classmethod
     def parent_resolve(cls, root, info, **kwargs):
@@ -52,28 +62,30 @@ class DynamicArgsMixin:
         cls._required_args
     args is dict { arg_name: arg_type }
     or list [arg_name,] -> defaults to String
+
+    The arguments are built once per class, so calling `Field()`
+    several times does not rebuild nor re-apply them.
     """
 
     _args: dict | list = {}
     _required_args: dict | list = {}
 
     @classmethod
-    def Field(cls, *args, **kwargs):
-        if isinstance(cls._args, dict):
-            for key in cls._args:
-                cls._meta.arguments.update({key: graphene.Argument(getattr(graphene, cls._args[key]))})  # type: ignore
-        elif isinstance(cls._args, list):
-            for key in cls._args:
-                cls._meta.arguments.update({key: graphene.String()})  # type: ignore
-
-        if isinstance(cls._required_args, dict):
-            for key in cls._required_args:
-                cls._meta.arguments.update(  # type: ignore
-                    {key: graphene.Argument(getattr(graphene, cls._required_args[key]), required=True)}
+    def get_dynamic_arguments(cls) -> dict:
+        if "_dynamic_arguments" not in cls.__dict__:
+            cls._dynamic_arguments = {
+                key: graphene.Argument(_type, required=required)
+                for key, _type, required in compile_dynamic_fields(
+                    cls._args, cls._required_args
                 )
-        elif isinstance(cls._required_args, list):
-            for key in cls._required_args:
-                cls._meta.arguments.update({key: graphene.String(required=True)})  # type: ignore
+            }
+        return cls._dynamic_arguments
+
+    @classmethod
+    def Field(cls, *args, **kwargs):
+        if not cls.__dict__.get("_dynamic_arguments_applied", False):
+            cls._meta.arguments.update(cls.get_dynamic_arguments())  # type: ignore
+            cls._dynamic_arguments_applied = True
         return super().Field(*args, **kwargs)  # type: ignore
 
 
@@ -86,30 +98,29 @@ class DynamicInputMixin:
         cls._required_inputs
     inputs is dict { input_name: input_type }
     or list [input_name,] -> defaults to String
+
+    The inputs are built once per class, so calling `Field()`
+    several times does not rebuild nor re-apply them.
     """
 
     _inputs: dict | list = {}
     _required_inputs: dict | list = {}
 
     @classmethod
-    def Field(cls, *args, **kwargs):
-        if isinstance(cls._inputs, dict):
-            for key in cls._inputs:
-                cls._meta.arguments["input"]._meta.fields.update(  # type: ignore
-                    {key: graphene.InputField(getattr(graphene, cls._inputs[key]))}
-                )
-        elif isinstance(cls._inputs, list):
-            for key in cls._inputs:
-                cls._meta.arguments["input"]._meta.fields.update({key: graphene.InputField(graphene.String)})  # type: ignore
-
-        if isinstance(cls._required_inputs, dict):
-            for key in cls._required_inputs:
-                cls._meta.arguments["input"]._meta.fields.update(  # type: ignore
-                    {key: graphene.InputField(getattr(graphene, cls._required_inputs[key]), required=True)}
-                )
-        elif isinstance(cls._required_inputs, list):
-            for key in cls._required_inputs:
-                cls._meta.arguments["input"]._meta.fields.update(  # type: ignore
-                    {key: graphene.InputField(graphene.String, required=True)}
+    def get_dynamic_inputs(cls) -> dict:
+        if "_dynamic_inputs" not in cls.__dict__:
+            cls._dynamic_inputs = {
+                key: graphene.InputField(_type, required=required)
+                for key, _type, required in compile_dynamic_fields(
+                    cls._inputs, cls._required_inputs
                 )
+            }
+        return cls._dynamic_inputs
+
+    @classmethod
+    def Field(cls, *args, **kwargs):
+        if not cls.__dict__.get("_dynamic_inputs_applied", False):
+            fields = cls._meta.arguments["input"]._meta.fields  # type: ignore
+            fields.update(cls.get_dynamic_inputs())
+            cls._dynamic_inputs_applied = True
         return super().Field(*args, **kwargs)  # type: ignore
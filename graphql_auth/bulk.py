@@ -0,0 +1,589 @@
+"""
+Bulk operations on users, for data migrations and onboarding.
+"""
+
+import csv
+import io
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from django.conf import settings as django_settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.mail import get_connection
+from django.db import models, transaction
+
+from .cache import invalidate_users_cache
+from .constants import Messages
+from .counters import count_users, get_counter_deltas, update_user_counters
+from .models import UserStatus
+from .search import index_users
+from .settings import graphql_auth_settings as app_settings
+from .status import STATUS_FIELDS, status_lookup
+
+UserModel = get_user_model()
+
+# fields of the records (e.g. from `dumpdata`) that are not imported
+IGNORED_FIELDS = ("password", "pk", "id", "groups", "user_permissions")
+
+IMPORT_FORMATS = ("csv", "jsonl", "json")
+
+BOOLEAN_STRINGS = {
+    "1": True,
+    "t": True,
+    "true": True,
+    "yes": True,
+    "0": False,
+    "f": False,
+    "false": False,
+    "no": False,
+}
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    emails_sent: int = 0
+    # (record number, message) of the skipped records
+    errors: list[tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def skipped(self) -> int:
+        return len(self.errors)
+
+
+def read_users(file: IO[str], format: str) -> Iterator[dict]:
+    """
+    Stream user records from an open text file.
+
+    `csv` has a header row, `jsonl` one object per line and
+    `json` an array (like `dumpdata` fixtures). Records can be flat
+    dicts or fixture objects: `{"model": ..., "pk": ..., "fields": {...}}`.
+    """
+    if format == "csv":
+        yield from csv.DictReader(file)
+    elif format == "jsonl":
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+    elif format == "json":
+        yield from json.load(file)
+    else:
+        raise ValueError(
+            "Unknown import format: %s, expected one of %s."
+            % (format, ", ".join(IMPORT_FORMATS))
+        )
+
+
+def get_import_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "ndjson":
+        return "jsonl"
+    return extension
+
+
+def _get_import_fields() -> dict[str, models.Field]:
+    fields = {}
+    for model_field in UserModel._meta.concrete_fields:
+        if not model_field.primary_key and model_field.name not in (
+            "password",
+            *STATUS_FIELDS,
+        ):
+            fields[model_field.name] = model_field
+            fields[model_field.attname] = model_field
+    return fields
+
+
+def _get_status_fields() -> dict[str, models.Field]:
+    return {name: UserStatus._meta.get_field(name) for name in STATUS_FIELDS}
+
+
+def _clean_values(model_fields: dict[str, models.Field], values: dict) -> dict:
+    """
+    Convert the values read from the file to python, empty strings
+    (from CSV) being `None` or the field default.
+    """
+    cleaned = {}
+    for name, value in values.items():
+        model_field = model_fields[name]
+        if isinstance(value, str):
+            if value == "" and model_field.null:
+                value = None
+            elif value == "" and model_field.has_default():
+                continue
+            elif isinstance(model_field, models.BooleanField):
+                value = BOOLEAN_STRINGS.get(value.strip().lower(), value)
+        cleaned[model_field.attname] = model_field.clean(value, None)
+    return cleaned
+
+
+def _is_hashed(password: str) -> bool:
+    if password.startswith(UNUSABLE_PASSWORD_PREFIX):
+        return True
+    try:
+        identify_hasher(password)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_blank(user, name: str) -> bool:
+    value = getattr(user, UserModel._meta.get_field(name).attname)
+    if isinstance(value, str):
+        value = value.strip()
+    return value in models.Field.empty_values
+
+
+def _is_fixture(record: dict) -> bool:
+    return "model" in record and "fields" in record
+
+
+def build_user(
+    record: dict, import_fields: dict[str, models.Field] | None = None, **status_values
+):
+    """
+    Build an unsaved user with its status attached from an import record.
+
+    Returns the user and its plain password (`None` when the record has
+    no password or one hashed by one of the `PASSWORD_HASHERS`).
+    Raises `ValidationError` for unknown fields, invalid values and missing
+    (or blank) values of the `USERNAME_FIELD` and `REQUIRED_FIELDS`.
+    """
+    if _is_fixture(record):
+        record = record["fields"]
+    if import_fields is None:
+        import_fields = _get_import_fields()
+    unknown = set(record).difference(import_fields, STATUS_FIELDS, IGNORED_FIELDS)
+    if unknown:
+        raise ValidationError("Unknown fields: %s." % ", ".join(sorted(unknown)))
+    user = UserModel(
+        **_clean_values(
+            import_fields, {key: record[key] for key in record if key in import_fields}
+        )
+    )
+    required = (UserModel.USERNAME_FIELD, *UserModel.REQUIRED_FIELDS)
+    missing = [name for name in required if _is_blank(user, name)]
+    if missing:
+        raise ValidationError(
+            "Missing required fields: %s." % ", ".join(sorted(missing))
+        )
+    password = record.get("password") or None
+    if password is None:
+        user.set_unusable_password()
+    elif _is_hashed(password):
+        user.password = password
+        password = None
+    status_fields = _get_status_fields()
+    status_values = {
+        **_clean_values(
+            status_fields, {key: record[key] for key in record if key in status_fields}
+        ),
+        **status_values,
+    }
+    UserStatus.attach(user, **status_values)
+    return user, password
+
+
+def get_taken_usernames_and_emails() -> tuple[set[str], set[str]]:
+    """
+    Read the (lowercased) usernames and emails, including
+    secondary emails, of all users in one query.
+    """
+    usernames, emails = set(), set()
+    queryset = UserModel._default_manager.values_list(
+        UserModel.USERNAME_FIELD,
+        UserModel.EMAIL_FIELD,  # type: ignore
+        status_lookup("secondary_email"),
+    )
+    for username, email, secondary_email in queryset.iterator(chunk_size=5000):
+        usernames.add(str(username).lower())
+        if email:
+            emails.add(email.lower())
+        if secondary_email:
+            emails.add(secondary_email.lower())
+    return usernames, emails
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def hash_passwords(passwords: list[str], executor: Executor | None = None) -> list[str]:
+    """
+    Hash plain passwords with the default hasher,
+    on the given (process pool) executor if any.
+    """
+    hasher = partial(make_password, hasher=get_hasher().algorithm)
+    if executor is None:
+        return [hasher(password) for password in passwords]
+    return list(executor.map(hasher, passwords, chunksize=max(1, len(passwords) // 32)))
+
+
+def _setup_worker() -> None:
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def send_activation_emails(users, info) -> int:
+    """
+    Send the activation email to unverified users, through `EMAIL_ASYNC_TASK`
+    if set, otherwise over a single mail backend connection.
+    """
+    users = [
+        user
+        for user in users
+        if not user.status.verified and getattr(user, UserModel.EMAIL_FIELD)
+    ]
+    if app_settings.is_async_email:
+        for user in users:
+            app_settings.async_email_func(user.status.send_activation_email, (info,))
+    elif users:
+        with get_connection() as connection:
+            for user in users:
+                user.status.send_activation_email(info, connection=connection)
+    return len(users)
+
+
+def _check_collisions(user, usernames: set[str], emails: set[str]) -> None:
+    username = str(user.get_username()).lower()
+    if username in usernames:
+        raise user.unique_error_message(UserModel, (UserModel.USERNAME_FIELD,))
+    new_emails = [
+        email.lower()
+        for email in (getattr(user, UserModel.EMAIL_FIELD), user.status.secondary_email)
+        if email
+    ]
+    if len(set(new_emails)) != len(new_emails) or emails.intersection(new_emails):
+        raise ValidationError(Messages.EMAIL_IN_USE["email"])
+    usernames.add(username)
+    emails.update(new_emails)
+
+
+class _UserImport:
+    """
+    State of one import: the usernames and emails taken so far, and the statuses
+    of fixture users (by fixture pk) to match the separate status records.
+    """
+
+    def __init__(self, batch_size: int, executor: Executor | None, info):
+        self.batch_size = batch_size
+        self.executor = executor
+        self.info = info
+        self.import_fields = _get_import_fields()
+        self.status_fields = _get_status_fields()
+        self.usernames, self.emails = get_taken_usernames_and_emails()
+        self.fixture_statuses: dict = {}
+        # status records read before their user:
+        # fixture user pk -> (record number, values)
+        self.pending_statuses: dict = {}
+        self.result = ImportResult()
+
+    def run(self, records: Iterable[dict]) -> ImportResult:
+        for chunk in _chunks(enumerate(records, start=1), self.batch_size):
+            self.import_chunk(chunk)
+        for number, _ in self.pending_statuses.values():
+            self.result.errors.append((number, "User of the status does not exist."))
+        return self.result
+
+    def import_chunk(self, chunk: list[tuple[int, dict]]) -> None:
+        users, passwords, updated_statuses = [], [], []
+        for number, record in chunk:
+            try:
+                if (
+                    _is_fixture(record)
+                    and record["model"] == UserStatus._meta.label_lower
+                ):
+                    status = self.read_status(number, record["fields"])
+                    if status is not None and not status._state.adding:
+                        updated_statuses.append(status)
+                    continue
+                user, password = self.read_user(record)
+            except ValidationError as error:
+                self.result.errors.append((number, " ".join(error.messages)))
+                continue
+            users.append(user)
+            passwords.append(password)
+
+        plain = [
+            (user, password)
+            for user, password in zip(users, passwords)
+            if password is not None
+        ]
+        hashed = hash_passwords([password for _, password in plain], self.executor)
+        for (user, _), password in zip(plain, hashed):
+            user.password = password
+        with transaction.atomic():
+            users = UserModel._default_manager.bulk_create(users)
+            UserStatus.objects.bulk_create_for_users(users)
+            # bulk_create does not send post_save, which indexes the users
+            index_users(users, created=True)
+            update_user_counters(**get_counter_deltas(user.status for user in users))
+            if updated_statuses:
+                updated_statuses = set(updated_statuses)
+                if app_settings.USER_COUNTERS:
+                    pks = [status.user.pk for status in updated_statuses]
+                    former = count_users(UserModel._default_manager.filter(pk__in=pks))
+                UserStatus.objects.bulk_update_statuses(updated_statuses)
+                if app_settings.USER_COUNTERS:
+                    current = get_counter_deltas(updated_statuses)
+                    update_user_counters(
+                        **{name: current[name] - former[name] for name in current}
+                    )
+            invalidate_users_cache(on_commit=True)
+        self.result.created += len(users)
+        if self.info is not None:
+            self.result.emails_sent += send_activation_emails(users, self.info)
+
+    def read_user(self, record: dict):
+        fixture_pk = record.get("pk") if _is_fixture(record) else None
+        _, status_values = self.pending_statuses.get(fixture_pk, (None, {}))
+        user, password = build_user(record, self.import_fields, **status_values)
+        _check_collisions(user, self.usernames, self.emails)
+        if fixture_pk is not None:
+            self.pending_statuses.pop(fixture_pk, None)
+            self.fixture_statuses[fixture_pk] = user.status
+        return user, password
+
+    def read_status(self, number: int, fields: dict):
+        """
+        Apply a fixture status record to the status of its user, or keep
+        its values until the user is read. Returns the updated status.
+        """
+        fields = dict(fields)
+        fixture_pk = fields.pop("user", None)
+        unknown = set(fields).difference(STATUS_FIELDS)
+        if unknown:
+            raise ValidationError("Unknown fields: %s." % ", ".join(sorted(unknown)))
+        values = _clean_values(self.status_fields, fields)
+        status = self.fixture_statuses.get(fixture_pk)
+        if status is None:
+            self.pending_statuses[fixture_pk] = (number, values)
+            return None
+        secondary_email = (values.get("secondary_email") or "").lower()
+        if (
+            secondary_email
+            and secondary_email != (status.secondary_email or "").lower()
+        ):
+            if secondary_email in self.emails:
+                raise ValidationError(Messages.EMAIL_IN_USE["email"])
+            self.emails.add(secondary_email)
+        for name, value in values.items():
+            setattr(status, name, value)
+        return status
+
+
+def import_users(
+    records: Iterable[dict],
+    batch_size: int = 1000,
+    workers: int | None = None,
+    info=None,
+) -> ImportResult:
+    """
+    Create users with their statuses from an iterable of records (see `build_user`),
+    fixture status records are matched to their user by the fixture pk.
+
+    Every batch is validated against the usernames and emails already taken
+    (read once) and the ones imported before, plain passwords are hashed on
+    a process pool of `workers` processes (`0` hashes in this process) and the
+    users and statuses are inserted with `bulk_create` in one transaction.
+    Records colliding or failing validation are skipped and reported.
+
+    `post_save` and `user_registered` are not sent. When `info` is given
+    (see `graphql_auth.utils.EmailInfo`), activation emails are sent to the
+    imported users that are not verified.
+    """
+    executor = None
+    if workers != 0:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker)
+    try:
+        return _UserImport(batch_size, executor, info).run(records)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def import_users_from_file(
+    path: str, format: str | None = None, **kwargs
+) -> ImportResult:
+    format = format or get_import_format(path)
+    with io.open(path, newline="", encoding="utf-8") as file:
+        return import_users(read_users(file, format), **kwargs)
+
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def get_export_columns() -> list[str]:
+    """
+    Concrete user fields and status fields, without `USER_NODE_EXCLUDE_FIELDS`.
+    """
+    excluded = set(app_settings.USER_NODE_EXCLUDE_FIELDS)
+    columns = [
+        model_field.attname
+        for model_field in UserModel._meta.concrete_fields
+        if model_field.name not in excluded
+        and model_field.attname not in excluded
+        and model_field.name not in STATUS_FIELDS
+    ]
+    return columns + [name for name in STATUS_FIELDS if name not in excluded]
+
+
+def iter_user_rows(
+    columns: list[str], queryset=None, chunk_size: int = 2000
+) -> Iterator[tuple]:
+    """
+    Rows of `columns` of the users joined with their status, ordered by pk
+    and read with a server-side cursor (where the database supports it).
+    """
+    if queryset is None:
+        queryset = UserModel._default_manager.all()
+    lookups = [
+        status_lookup(column) if column in STATUS_FIELDS else column
+        for column in columns
+    ]
+    return queryset.order_by("pk").values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+class _Buffer:
+    """
+    Write-only file collecting what the writers write, emptied
+    on every `pop`, so output is streamed chunk by chunk.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self.parts: list = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def pop(self):
+        data = self.parts[0][:0].join(self.parts) if self.parts else ""
+        self.parts.clear()
+        return data
+
+
+def _export_csv(columns, rows, chunk_size):
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in _chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.pop()
+    yield buffer.pop()
+
+
+def _export_jsonl(columns, rows, chunk_size):
+    encoder = DjangoJSONEncoder()
+    for chunk in _chunks(rows, chunk_size):
+        yield "".join(encoder.encode(dict(zip(columns, row))) + "\n" for row in chunk)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImproperlyConfigured(
+            "Parquet export requires pyarrow: pip install django-graphene-auth[parquet]"
+        ) from error
+    return pyarrow
+
+
+def _get_parquet_type(pyarrow, model_field: models.Field):
+    internal_type = model_field.get_internal_type()
+    if internal_type in ("BooleanField", "NullBooleanField"):
+        return pyarrow.bool_()
+    if internal_type.endswith("AutoField") or internal_type.endswith("IntegerField"):
+        return pyarrow.int64()
+    if internal_type == "DateTimeField":
+        return pyarrow.timestamp("us", tz="UTC" if django_settings.USE_TZ else None)
+    if internal_type == "DateField":
+        return pyarrow.date32()
+    if internal_type == "FloatField":
+        return pyarrow.float64()
+    return pyarrow.string()
+
+
+def _export_parquet(columns, rows, chunk_size):
+    pyarrow = _import_pyarrow()
+    model_fields = {
+        **{
+            model_field.attname: model_field
+            for model_field in UserModel._meta.concrete_fields
+        },
+        **_get_status_fields(),
+    }
+    schema = pyarrow.schema(
+        [
+            (column, _get_parquet_type(pyarrow, model_fields[column]))
+            for column in columns
+        ]
+    )
+    buffer = _Buffer()
+    writer = pyarrow.parquet.ParquetWriter(buffer, schema)
+    for chunk in _chunks(rows, chunk_size):
+        arrays = []
+        for field_type, values in zip(schema.types, zip(*chunk)):
+            if field_type == pyarrow.string():
+                values = [value if value is None else str(value) for value in values]
+            arrays.append(pyarrow.array(values, type=field_type))
+        # one row group per chunk
+        writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+        yield buffer.pop()
+    writer.close()
+    yield buffer.pop()
+
+
+def export_users(format: str, queryset=None, chunk_size: int = 2000) -> Iterator:
+    """
+    Stream the users with their status as `csv`, `jsonl` (str chunks)
+    or `parquet` (bytes chunks, requires pyarrow), in constant memory.
+    """
+    writers = {"csv": _export_csv, "jsonl": _export_jsonl, "parquet": _export_parquet}
+    if format not in writers:
+        raise ValueError(
+            "Unknown export format: %s, expected one of %s."
+            % (format, ", ".join(EXPORT_FORMATS))
+        )
+    if format == "parquet":
+        _import_pyarrow()
+    columns = get_export_columns()
+    rows = iter_user_rows(columns, queryset, chunk_size)
+    return (chunk for chunk in writers[format](columns, rows, chunk_size) if chunk)
@@ -0,0 +1,73 @@
+"""
+Cache of the pages of the `users` connection, see the `USERS_CACHE_TIMEOUT` setting.
+
+A page is cached as the primary keys of its users (with its cursors, page info and
+total count), keyed by the SQL of the filtered queryset and the pagination arguments,
+and read back with one `in_bulk` query (still filtered, so the users not matching
+anymore are left out). Saving a user (except its `last_login` alone) or a status bumps
+a generation counter, which is part of the keys, so every page cached before is dropped.
+
+Deletions and changes made without signals (`QuerySet.update`, `bulk_create`...)
+must call `invalidate_users_cache`, as `DeleteAccount`, the imports, the retention
+sweeps, `bump_version` and the copies of the status fields do, once per batch.
+"""
+
+import hashlib
+import json
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+
+from .settings import graphql_auth_settings as app_settings
+
+GENERATION_KEY = "graphql_auth:users:generation"
+
+
+def get_users_cache():
+    return caches[app_settings.USERS_CACHE]
+
+
+def get_generation() -> int:
+    cache = get_users_cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # not restarting from 1 after an eviction,
+        # which would serve the pages cached back then
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _bump_generation() -> None:
+    cache = get_users_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+
+
+def invalidate_users_cache(on_commit: bool = False) -> None:
+    """
+    Drop the cached pages, and again once the current transaction commits
+    if `on_commit` (the pages cached meanwhile may hold the former rows).
+    """
+    if app_settings.USERS_CACHE_TIMEOUT is None:
+        return
+    _bump_generation()
+    if on_commit:
+        transaction.on_commit(_bump_generation)
+
+
+def get_page_cache_key(queryset, args: dict, max_limit: int | None) -> str:
+    """
+    Key of a page: the SQL of the primary keys of `queryset` (its filters, ordering
+    and any restriction of the resolver) and the pagination arguments.
+    """
+    payload = json.dumps(
+        [str(queryset.values("pk").query), sorted(args.items()), max_limit], default=str
+    )
+    return "graphql_auth:users:%s:%s" % (
+        get_generation(),
+        hashlib.sha256(payload.encode()).hexdigest(),
+    )
@@ -1,15 +1,119 @@
+import difflib
 import json
 import types
+from functools import wraps
 from typing import Any
 
 import django
 from django.contrib.auth import get_user_model
+from django.db import connection
 from graphene_django.utils.testing import GraphQLTestCase
 
+from graphql_auth.metrics import current_mutation
 from graphql_auth.models import UserStatus
 
 _DJANGO_VERSION_AT_LEAST_4_2 = django.VERSION[0] > 4 or (django.VERSION[0] == 4 and django.VERSION[1] >= 2)
 
+# maximum number of queries run inside one call of each mutation (by class name, both
+# GraphQL and Relay), checked by every `_test_*` method of a `CommonTestCase`
+QUERY_BUDGETS: dict[str, int] = {
+    'ArchiveAccount': 5,
+    # the status rows are loaded for the post_delete receiver counting the deleted users
+    'DeleteAccount': 11,
+    'ObtainJSONWebToken': 3,
+    'PasswordChange': 4,
+    'PasswordReset': 4,
+    'PasswordSet': 4,
+    'RefreshToken': 2,
+    'Register': 6,
+    'RemoveSecondaryEmail': 4,
+    'ResendActivationEmail': 1,
+    'RevokeToken': 2,
+    'SendPasswordResetEmail': 1,
+    'SendSecondaryEmailActivation': 2,
+    'SwapEmails': 5,
+    'UpdateAccount': 3,
+    'VerifyAccount': 3,
+    'VerifySecondaryEmail': 4,
+    'VerifyToken': 0,
+}
+
+
+class QueryBudgetTracker:
+    """
+    Collect the SQL of each mutation call and the calls over their budget.
+    The SQL of the last call within budget of each mutation is kept to show
+    what changed when a later call goes over, in `baselines` (shared by the
+    tests of a test class).
+    """
+
+    def __init__(self, budgets: dict[str, int], baselines: dict[str, list[str]]):
+        self.budgets = budgets
+        self.baselines = baselines
+        self.queries: dict[str, list[str]] = {}
+        self.failures: list[str] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        mutation = current_mutation.get()
+        if mutation in self.budgets:
+            self.queries.setdefault(mutation, []).append(sql)
+        return execute(sql, params, many, context)
+
+    def end_request(self) -> None:
+        for mutation, queries in self.queries.items():
+            if len(queries) <= self.budgets[mutation]:
+                self.baselines[mutation] = queries
+            else:
+                self.failures.append(self.format_failure(mutation, queries))
+        self.queries = {}
+
+    def format_failure(self, mutation: str, queries: list[str]) -> str:
+        budget = self.budgets[mutation]
+        header = "%s ran %d queries, over its budget of %d" % (
+            mutation,
+            len(queries),
+            budget,
+        )
+        baseline = self.baselines.get(mutation)
+        if baseline is None:
+            lines = [
+                "%s %d. %s" % ("+" if index > budget else " ", index, sql)
+                for index, sql in enumerate(queries, 1)
+            ]
+            return "\n".join([header + ":", *lines])
+        diff = difflib.unified_diff(
+            baseline,
+            queries,
+            "within budget",
+            "over budget",
+            lineterm="",
+            n=len(queries),
+        )
+        return "\n".join([header + ", compared to its last call within budget:", *diff])
+
+
+def check_query_budgets(test):
+    """
+    Run `test` failing if a mutation goes over its query budget.
+    """
+
+    @wraps(test)
+    def wrapper(self, *args, **kwargs):
+        tracker = self._query_budget_tracker = QueryBudgetTracker(
+            self.query_budgets, self._query_budget_baselines
+        )
+        try:
+            with connection.execute_wrapper(tracker):
+                result = test(self, *args, **kwargs)
+            tracker.end_request()
+        finally:
+            self._query_budget_tracker = None
+        if tracker.failures:
+            self.fail("\n\n".join(tracker.failures))
+        return result
+
+    return wrapper
+
 
 class TestCaseMeta(type):
     def __new__(cls, name: str, bases: tuple[type], dct: dict) -> type:
@@ -17,7 +121,7 @@ class TestCaseMeta(type):
             for base in bases:
                 for key, value in base.__dict__.items():
                     if key.startswith('_test_') and isinstance(value, types.FunctionType) and key[1:] not in dct:
-                        dct[key[1:]] = value
+                        dct[key[1:]] = check_query_budgets(value)
         return super().__new__(cls, name, bases, dct)
 
 
@@ -34,21 +138,32 @@ class CommonTestCase(GraphQLTestCase, metaclass=TestCaseMeta):
     that inherit from above LoginCommonTestCase class.
     The LoginTestCase will be used to test with GraphQL requests and
     the LoginRelayTestCase will be used to Relay requests.
-    Each of these test classes will automatically have a test method named `test_some_method`
+    Each of these test classes will automatically have a test method named
+    `test_some_method`, failing if a mutation runs more queries than its
+    `query_budgets` entry.
     """
 
     RESPONSE_RESULT_KEY: str
     RESPONSE_ERROR_KEY: str = 'errors'
 
+    query_budgets: dict[str, int] = QUERY_BUDGETS
+    _query_budget_tracker: QueryBudgetTracker | None = None
+    _query_budget_baselines: dict[str, list[str]]
+
     default_password = 'very-strong-password'
 
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._query_budget_baselines = {}
+
     def create_user(self, password=None, verified=False, archived=False, secondary_email="", *args, **kwargs):
         if kwargs.get("username"):
             kwargs.update({"first_name": kwargs.get("username")})
         user = get_user_model().objects.create(*args, **kwargs)
         user.set_password(password or self.default_password)
         user.save()
-        user_status = UserStatus._default_manager.get(user=user)
+        user_status = UserStatus.get_for_user(user)
         user_status.verified = verified
         user_status.archived = archived
         user_status.secondary_email = secondary_email
@@ -57,6 +172,12 @@ class CommonTestCase(GraphQLTestCase, metaclass=TestCaseMeta):
         user.refresh_from_db()
         return user
 
+    def query(self, *args, **kwargs):
+        response = super().query(*args, **kwargs)
+        if self._query_budget_tracker is not None:
+            self._query_budget_tracker.end_request()
+        return response
+
     def get_authorization_header(self, token) -> dict[str, str | dict[str, str]]:
         key = 'authorization' if _DJANGO_VERSION_AT_LEAST_4_2 else 'HTTP_AUTHORIZATION'
         return {key: f'JWT {token}'}
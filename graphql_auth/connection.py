@@ -8,4 +8,8 @@ class CountableConnection(graphene.relay.Connection):
     total_count = graphene.Int()
 
     def resolve_total_count(self, info, **kwargs) -> int:
+        # counted (or read from the cache) while resolving the connection
+        length = getattr(self, "length", None)
+        if length is not None:
+            return length
         return self.iterable.count()  # type: ignore
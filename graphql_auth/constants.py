@@ -1,36 +1,80 @@
 from django.utils.translation import gettext as _
 
 
+class FrozenErrors(dict):
+    """
+    Read-only errors dict, already in the output format (camelized keys),
+    so `ExpectedErrorType` returns it as is, without copying it.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.__class__.__name__} is read-only.")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
 class Messages:
-    INVALID_PASSWORD = {"message": _("Invalid password."), "code": "invalid_password"}
-    UNAUTHENTICATED = {"message": _("Unauthenticated."), "code": "unauthenticated"}
-    INVALID_TOKEN = {"message": _("Invalid token."), "code": "invalid_token"}
-    EXPIRED_TOKEN = {"message": _("Expired token."), "code": "expired_token"}
-    ALREADY_VERIFIED = {"message": _("Account already verified."), "code": "already_verified"}
-    EMAIL_FAIL = {"message": _("Failed to send email."), "code": "email_fail"}
-    INVALID_CREDENTIALS = {
-        "message": _("Please, enter valid credentials."),
-        "code": "invalid_credentials",
-    }
-    NOT_VERIFIED = {"message": _("Please verify your account."), "code": "not_verified"}
-    NOT_VERIFIED_PASSWORD_RESET = {
-        "message": _("Verify your account first. A new verification email was sent."),
-        "code": "not_verified",
-    }
-    EMAIL_IN_USE = {"email": _("A user with that email already exists."), "code": "email_in_use"}
-    SECONDARY_EMAIL_REQUIRED = {
-        "message": _("You need to setup a secondary email to proceed."),
-        "code": "secondary_email_required",
-    }
-    PASSWORD_ALREADY_SET = {
-        "message": _("Password already set for account."),
-        "code": "password_already_set",
-    }
+    INVALID_PASSWORD = FrozenErrors(
+        {"message": _("Invalid password."), "code": "invalid_password"}
+    )
+    UNAUTHENTICATED = FrozenErrors(
+        {"message": _("Unauthenticated."), "code": "unauthenticated"}
+    )
+    INVALID_TOKEN = FrozenErrors(
+        {"message": _("Invalid token."), "code": "invalid_token"}
+    )
+    EXPIRED_TOKEN = FrozenErrors(
+        {"message": _("Expired token."), "code": "expired_token"}
+    )
+    ALREADY_VERIFIED = FrozenErrors(
+        {"message": _("Account already verified."), "code": "already_verified"}
+    )
+    EMAIL_FAIL = FrozenErrors(
+        {"message": _("Failed to send email."), "code": "email_fail"}
+    )
+    INVALID_CREDENTIALS = FrozenErrors(
+        {
+            "message": _("Please, enter valid credentials."),
+            "code": "invalid_credentials",
+        }
+    )
+    NOT_VERIFIED = FrozenErrors(
+        {"message": _("Please verify your account."), "code": "not_verified"}
+    )
+    NOT_VERIFIED_PASSWORD_RESET = FrozenErrors(
+        {
+            "message": _(
+                "Verify your account first. A new verification email was sent."
+            ),
+            "code": "not_verified",
+        }
+    )
+    EMAIL_IN_USE = FrozenErrors(
+        {"email": _("A user with that email already exists."), "code": "email_in_use"}
+    )
+    SECONDARY_EMAIL_REQUIRED = FrozenErrors(
+        {
+            "message": _("You need to setup a secondary email to proceed."),
+            "code": "secondary_email_required",
+        }
+    )
+    PASSWORD_ALREADY_SET = FrozenErrors(
+        {
+            "message": _("Password already set for account."),
+            "code": "password_already_set",
+        }
+    )
     INVALID_REGISTRATION_DATA_MESSAGE = _("Invalid registration data.")
-    FAILED_SENDING_ACTIVATION_EMAIL = {
-        'message': _("User account created but could not send activation email."),
-        'code': 'send_activation_email_failed',
-    }
+    FAILED_SENDING_ACTIVATION_EMAIL = FrozenErrors(
+        {
+            'message': _("User account created but could not send activation email."),
+            'code': 'send_activation_email_failed',
+        }
+    )
     FAILED_PASSWORD_CHANGE_MESSAGE = _("Password change failed.")
     INVALID_EMAIL_ADDRESS_MESSAGE = _("Invalid email address.")
 
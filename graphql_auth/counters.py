@@ -0,0 +1,160 @@
+"""
+Counters of the users (total, verified, archived), see the `USER_COUNTERS` setting.
+
+The counters are kept in `UserCounter` rows, updated in the transaction of each change
+(registration, verification, archiving, deletion, import and retention), so the
+`userStats` query reads a few rows instead of counting the users. Each counter is split
+over `SHARDS` rows, picked by user, so concurrent registrations do not wait on one row.
+Deleted users are counted by a `post_delete` receiver, whatever deletes them (admin,
+`QuerySet.delete`...); batches collect the changes with `collect_counter_updates`.
+
+The rows are created with zero values when first updated, so the counters are only
+right once `reconcile_user_counters` (or the `reconcile_user_counters` command) has
+counted the users, after enabling the setting. It also catches up with the changes
+made otherwise (admin, `QuerySet.update`...).
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Sum, Value, When
+
+from .models import UserCounter
+from .settings import graphql_auth_settings as app_settings
+from .status import status_lookup
+
+UserModel = get_user_model()
+
+COUNTERS = ("total", "verified", "archived")
+
+# rows per counter
+SHARDS = 8
+
+# changes collected by `collect_counter_updates`, applied at its end
+_collected_deltas: ContextVar[Counter | None] = ContextVar(
+    "graphql_auth_counter_deltas", default=None
+)
+
+
+def count_users(queryset=None) -> dict[str, int]:
+    """
+    Count the users of `queryset` (all by default), in one query.
+    """
+    queryset = UserModel._default_manager.all() if queryset is None else queryset
+    return queryset.aggregate(
+        total=Count("pk"),
+        verified=Count("pk", filter=Q(**{status_lookup("verified"): True})),
+        archived=Count("pk", filter=Q(**{status_lookup("archived"): True})),
+    )
+
+
+def get_counter_deltas(statuses, sign: int = 1) -> dict[str, int]:
+    """
+    Changes of the counters for the users of `statuses` added
+    (or removed with `sign=-1`).
+    """
+    statuses = list(statuses)
+    return {
+        "total": sign * len(statuses),
+        "verified": sign * sum(1 for status in statuses if status.verified),
+        "archived": sign * sum(1 for status in statuses if status.archived),
+    }
+
+
+def update_user_counters(shard_key: int = 0, **deltas: int) -> None:
+    """
+    Add `deltas` (e.g. `verified=1`) to the counters, with one UPDATE of the shard
+    of `shard_key` (creating the rows, with zero values, on the first update).
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not app_settings.USER_COUNTERS or not deltas:
+        return
+    collected = _collected_deltas.get()
+    if collected is not None:
+        collected.update(deltas)
+        return
+    shard = shard_key % SHARDS
+    if not _add_to_counters(shard, deltas):
+        # not created yet (the rows are created together)
+        _create_counter_rows()
+        _add_to_counters(shard, deltas)
+
+
+@contextmanager
+def collect_counter_updates(shard_key: int = 0):
+    """
+    Sum the counter updates made in the block (e.g. by the `post_delete` receiver
+    of a batch delete) and apply them with one `update_user_counters` at its end.
+    """
+    collected = Counter()
+    token = _collected_deltas.set(collected)
+    try:
+        yield
+    finally:
+        _collected_deltas.reset(token)
+    update_user_counters(shard_key, **collected)
+
+
+def _add_to_counters(shard: int, deltas: dict[str, int]) -> int:
+    return UserCounter.objects.filter(name__in=deltas, shard=shard).update(
+        value=F("value")
+        + Case(
+            *(When(name=name, then=Value(delta)) for name, delta in deltas.items()),
+            default=0
+        )
+    )
+
+
+def _create_counter_rows() -> None:
+    # concurrent first updates both insert, the rows of the other one are kept
+    UserCounter.objects.bulk_create(
+        [
+            UserCounter(name=name, shard=shard)
+            for name in COUNTERS
+            for shard in range(SHARDS)
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def reconcile_user_counters() -> dict[str, int]:
+    """
+    Count the users and write the counters, replacing any drift.
+    """
+    with transaction.atomic():
+        _create_counter_rows()
+        # the changes committed from now on wait for the counters to be written
+        # and add to them, the ones committed before are counted
+        list(UserCounter.objects.select_for_update().filter(name__in=COUNTERS))
+        counts = count_users()
+        UserCounter.objects.filter(name__in=COUNTERS).update(
+            value=Case(
+                *(
+                    When(name=name, shard=0, then=Value(count))
+                    for name, count in counts.items()
+                ),
+                default=0
+            )
+        )
+    return counts
+
+
+def get_user_stats() -> dict[str, int]:
+    """
+    The counters, read from their rows with `USER_COUNTERS`, otherwise
+    (or until the rows are created) counted.
+    """
+    if not app_settings.USER_COUNTERS:
+        return count_users()
+    rows = (
+        UserCounter.objects.filter(name__in=COUNTERS)
+        .values("name")
+        .annotate(total=Sum("value"))
+    )
+    counts = dict(rows.values_list("name", "total"))
+    if len(counts) < len(COUNTERS):
+        return count_users()
+    return counts
@@ -2,6 +2,8 @@ from functools import wraps
 
 from .constants import Messages
 from .exceptions import GraphQLAuthError, WrongUsageError
+from .metrics import timer
+from .tracing import span
 
 
 def login_required(fn):
@@ -51,8 +53,29 @@ def password_confirmation_required(fn):
                 mutations with 'password' or 'old_password' field required.
                 """)
         user = info.context.user
-        if user.check_password(password):
+        with timer("password_hash"), span("graphql_auth.check_password"):
+            valid_password = user.check_password(password)
+        if valid_password:
             return fn(cls, root, info, **kwargs)
         return cls(success=False, errors={field_name: Messages.INVALID_PASSWORD})
 
     return wrapper
+
+
+def lazy_token_auth(fn):
+    """
+    Same as `graphql_jwt.decorators.token_auth`, but graphql_jwt
+    is imported on the first call instead of at import time.
+    """
+    token_auth_fn = None
+
+    @wraps(fn)
+    def wrapper(cls, root, info, **kwargs):
+        nonlocal token_auth_fn
+        if token_auth_fn is None:
+            from graphql_jwt.decorators import token_auth
+
+            token_auth_fn = token_auth(fn)
+        return token_auth_fn(cls, root, info, **kwargs)
+
+    return wrapper
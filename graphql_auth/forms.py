@@ -1,12 +1,106 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserChangeForm, UserCreationForm, UsernameField
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
 
 from .settings import graphql_auth_settings as app_settings
+from .status import status_lookup
 from .utils import flat_dict
 
+try:
+    from django.contrib.auth.forms import BaseUserCreationForm
+except ImportError:  # Django < 4.2
+    BaseUserCreationForm = UserCreationForm
 
-class RegisterForm(UserCreationForm):
+# Django >= 4.2 rejects usernames that differ only in case
+CASE_INSENSITIVE_USERNAME = hasattr(UserCreationForm, "clean_username")
+
+
+class RegisterUniqueCheckMixin:
+    """
+    Run the uniqueness checks of the unique fields and the check
+    that the email is not used as primary nor as secondary email
+    in one single query.
+
+    A used email is not a form error, `email_in_use` is set instead,
+    so the mutation can return `Messages.EMAIL_IN_USE`.
+    """
+
+    email_in_use = None
+
+    def get_unique_lookups(self) -> dict:
+        """
+        Lookups of the unique fields of the form which are valid so far, by field name.
+        """
+        model = self._meta.model
+        lookups = {}
+        for field in model._meta.concrete_fields:
+            if (
+                not field.unique
+                or field.primary_key
+                or field.name not in self.fields
+                or self.has_error(field.name)
+            ):
+                continue
+            value = getattr(self.instance, field.attname)
+            if value is None:
+                continue
+            lookup = (
+                "%s__iexact" % field.name
+                if CASE_INSENSITIVE_USERNAME and field.name == "username"
+                else field.name
+            )
+            lookups[field.name] = Q(**{lookup: value})
+        return lookups
+
+    def validate_unique(self):
+        model = self._meta.model
+        lookups = self.get_unique_lookups()
+
+        email = (
+            self.cleaned_data.get(model.EMAIL_FIELD)
+            if model.EMAIL_FIELD in self.fields
+            else None
+        )
+        if email:
+            lookups[None] = Q(**{model.EMAIL_FIELD: email}) | Q(
+                **{status_lookup("secondary_email"): email}
+            )
+
+        if lookups:
+            where = Q()
+            aggregates = {}
+            for index, lookup in enumerate(lookups.values()):
+                where |= lookup
+                aggregates["unique_check_%d" % index] = Count("pk", filter=lookup)
+            counts = model._default_manager.filter(where).aggregate(**aggregates)
+            for index, field_name in enumerate(lookups):
+                in_use = counts["unique_check_%d" % index] > 0
+                if field_name is None:
+                    self.email_in_use = in_use
+                elif in_use:
+                    self.add_error(
+                        field_name,
+                        self.instance.unique_error_message(model, [field_name]),
+                    )
+
+        # the other checks (unique together, unique for date...) of the fields
+        # of the form, which usually need no query
+        exclude = {
+            field.name
+            for field in model._meta.concrete_fields
+            if field.name in lookups
+            or field.name not in self.fields
+            or self.has_error(field.name)
+        }
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
+
+
+class RegisterForm(RegisterUniqueCheckMixin, BaseUserCreationForm):
     class Meta:
         model = get_user_model()
         fields = flat_dict(app_settings.REGISTER_MUTATION_FIELDS) + flat_dict(
@@ -34,7 +128,7 @@ class UpdateAccountForm(UserChangeForm):
             self.fields[key].required = False
 
 
-class PasswordLessRegisterForm(UserCreationForm):
+class PasswordLessRegisterForm(RegisterUniqueCheckMixin, BaseUserCreationForm):
     """
     A RegisterForm with optional password inputs.
     """
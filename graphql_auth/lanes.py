@@ -0,0 +1,140 @@
+"""
+Priority lanes of the emails, see the `EMAIL_LANES` setting.
+
+Every email is tagged with the `TokenAction` of its token and belongs to the lane
+listing that action. `lane_email_task` (as `EMAIL_ASYNC_TASK`) sends each lane on
+its own thread pool, and the outbox sends the emails by lane priority, with workers
+per lane (`send_outbox_emails --lane`), so a bulk resend of activation emails does
+not delay the password resets.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.db import close_old_connections
+
+from .constants import TokenAction
+from .settings import graphql_auth_settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+# token action of the emails of each `UserStatus` method
+EMAIL_METHOD_ACTIONS = {
+    "send_activation_email": TokenAction.ACTIVATION,
+    "resend_activation_email": TokenAction.ACTIVATION,
+    "send_password_set_email": TokenAction.PASSWORD_SET,
+    "send_password_reset_email": TokenAction.PASSWORD_RESET,
+    "send_secondary_email_activation": TokenAction.ACTIVATION_SECONDARY_EMAIL,
+}
+
+
+@dataclass(frozen=True)
+class Lane:
+    name: str
+    actions: tuple
+    # threads of the lane in `lane_email_task`
+    workers: int
+    # lower is sent first by the outbox
+    priority: int
+
+
+def get_lanes() -> list[Lane]:
+    """
+    The `EMAIL_LANES`, by priority.
+    """
+    lanes = [
+        Lane(
+            name,
+            tuple(lane["actions"]),
+            lane.get("workers", 1),
+            lane.get("priority", 0),
+        )
+        for name, lane in app_settings.EMAIL_LANES.items()
+    ]
+    return sorted(lanes, key=lambda lane: lane.priority)
+
+
+def get_lane(action: str | None) -> Lane:
+    """
+    The lane of the emails of `action`, the last one (by priority) for unlisted actions.
+    """
+    lanes = get_lanes()
+    for lane in lanes:
+        if action in lane.actions:
+            return lane
+    return lanes[-1]
+
+
+def get_email_action(func, args) -> str | None:
+    """
+    Token action of an `EMAIL_ASYNC_TASK` job: a `UserStatus` email method
+    or `graphql_auth.outbox.send_outbox_email` with its method.
+    """
+    name = getattr(func, "__name__", "")
+    if name == "send_outbox_email":
+        name = args[1]
+    return EMAIL_METHOD_ACTIONS.get(name)
+
+
+def get_email_lane(func, args) -> Lane:
+    """
+    Lane of an `EMAIL_ASYNC_TASK` job,
+    e.g. to pick the queue and priority of a Celery task.
+    """
+    return get_lane(get_email_action(func, args))
+
+
+class LaneExecutor:
+    """
+    One thread pool per lane, with `workers` threads.
+    """
+
+    def __init__(self):
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, lane: Lane, func, *args) -> Future:
+        with self._lock:
+            executor = self._executors.get(lane.name)
+            if executor is None:
+                executor = ThreadPoolExecutor(
+                    lane.workers, thread_name_prefix="graphql-auth-email-%s" % lane.name
+                )
+                self._executors[lane.name] = executor
+        return executor.submit(func, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executors, self._executors = self._executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=wait)
+
+
+lane_executor = LaneExecutor()
+
+
+def _run(func, args):
+    try:
+        return func(*args)
+    finally:
+        # the lane threads outlive the jobs,
+        # do not keep their database connections open for ever
+        close_old_connections()
+
+
+def _log_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Failed to send email", exc_info=future.exception())
+
+
+def lane_email_task(func, args) -> Future:
+    """
+    `EMAIL_ASYNC_TASK` sending the emails on the thread pool of their lane:
+
+        "EMAIL_ASYNC_TASK": "graphql_auth.lanes.lane_email_task"
+    """
+    future = lane_executor.submit(get_email_lane(func, args), _run, func, args)
+    future.add_done_callback(_log_failure)
+    return future
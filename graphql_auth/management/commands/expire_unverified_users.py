@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.retention import expire_unverified_users
+from graphql_auth.settings import UNVERIFIED_USER_EXPIRATION_ACTIONS
+from graphql_auth.settings import graphql_auth_settings as app_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete or archive users not verified in time (UNVERIFIED_USER_EXPIRATION "
+        "setting), in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=float,
+            help="Expire users not verified this many days after registering.",
+        )
+        parser.add_argument(
+            "--action",
+            choices=UNVERIFIED_USER_EXPIRATION_ACTIONS,
+            help="Delete or archive them.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Users expired per transaction."
+        )
+        parser.add_argument(
+            "--pause", type=float, help="Seconds to sleep between two batches."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count the users to expire."
+        )
+
+    def handle(self, *args, **options):
+        age = (
+            app_settings.UNVERIFIED_USER_EXPIRATION
+            if options["days"] is None
+            else timedelta(days=options["days"])
+        )
+        if age is None:
+            self.stdout.write("No UNVERIFIED_USER_EXPIRATION configured.")
+            return
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        action = options["action"] or app_settings.UNVERIFIED_USER_EXPIRATION_ACTION
+        result = expire_unverified_users(
+            age, action, options["batch_size"], options["pause"], options["dry_run"]
+        )
+        if options["dry_run"]:
+            self.stdout.write("Would %s %s unverified users." % (action, result.count))
+        else:
+            self.stdout.write(
+                "%sd %s unverified users." % (action.capitalize(), result.count)
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Done in %.2fs (%s batches)." % (result.seconds, result.batches)
+            )
+        )
@@ -0,0 +1,59 @@
+import sys
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.bulk import EXPORT_FORMATS, export_users
+
+
+class Command(BaseCommand):
+    help = (
+        "Export users with their status (verified, archived, secondary_email) as CSV, "
+        "JSON lines or Parquet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            nargs="?",
+            default="-",
+            help="Output file, standard output by default.",
+        )
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows read and written at once.",
+        )
+
+    def handle(self, *args, **options):
+        format = options["format"]
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be a positive integer.")
+        try:
+            chunks = export_users(format, chunk_size=options["chunk_size"])
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        started = time.perf_counter()
+        binary = format == "parquet"
+        if options["path"] == "-":
+            write = (
+                sys.stdout.buffer.write
+                if binary
+                else lambda chunk: self.stdout.write(chunk, ending="")
+            )
+            self.write(chunks, write)
+        else:
+            with open(
+                options["path"], "wb" if binary else "w", newline=None if binary else ""
+            ) as file:
+                self.write(chunks, file.write)
+            self.stderr.write(
+                "Exported users in %.2fs." % (time.perf_counter() - started)
+            )
+
+    def write(self, chunks, write):
+        for chunk in chunks:
+            write(chunk)
@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.bulk import IMPORT_FORMATS, get_import_format, import_users_from_file
+from graphql_auth.utils import EmailInfo
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users with their status (verified, archived, secondary_email) "
+        "from a CSV, JSON lines or JSON fixture file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import.")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="File format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users inserted per transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help=(
+                "Processes hashing plain passwords, 0 hashes in this process. Defaults "
+                "to the number of CPUs."
+            ),
+        )
+        parser.add_argument(
+            "--send-activation-email",
+            metavar="DOMAIN",
+            help=(
+                "Send the activation email to the imported users that are not "
+                "verified, with links to DOMAIN."
+            ),
+        )
+        parser.add_argument(
+            "--secure", action="store_true", help="Use https in the email links."
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        format = options["format"] or get_import_format(path)
+        if format not in IMPORT_FORMATS:
+            raise CommandError("Unknown format of %s, use --format." % path)
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        info = None
+        if options["send_activation_email"]:
+            info = EmailInfo(options["send_activation_email"], options["secure"])
+        started = time.perf_counter()
+        try:
+            result = import_users_from_file(
+                path,
+                format,
+                batch_size=options["batch_size"],
+                workers=options["workers"],
+                info=info,
+            )
+        except OSError as error:
+            raise CommandError(error)
+        for number, message in result.errors:
+            self.stderr.write("Record %s skipped: %s" % (number, message))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Imported %s users, skipped %s, sent %s activation emails in %.2fs."
+                % (
+                    result.created,
+                    result.skipped,
+                    result.emails_sent,
+                    time.perf_counter() - started,
+                )
+            )
+        )
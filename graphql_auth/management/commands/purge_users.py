@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.retention import purge_users
+from graphql_auth.settings import RETENTION_POLICY_NAMES
+from graphql_auth.settings import graphql_auth_settings as app_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete archived and deactivated users according to the RETENTION_POLICIES "
+        "setting, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--policy",
+            action="append",
+            metavar="NAME=DAYS",
+            help=(
+                "Run this policy instead of RETENTION_POLICIES, e.g. --policy "
+                "archived=365 (repeatable)."
+            ),
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Users deleted per transaction."
+        )
+        parser.add_argument(
+            "--pause", type=float, help="Seconds to sleep between two batches."
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Only count the users to delete."
+        )
+
+    def get_policies(self, options):
+        if not options["policy"]:
+            return app_settings.RETENTION_POLICIES
+        policies = {}
+        for policy in options["policy"]:
+            name, _, days = policy.partition("=")
+            if name not in RETENTION_POLICY_NAMES:
+                raise CommandError(
+                    "Unknown policy %s, expected one of %s."
+                    % (name, ", ".join(RETENTION_POLICY_NAMES))
+                )
+            try:
+                policies[name] = timedelta(days=float(days))
+            except ValueError:
+                raise CommandError("Invalid number of days in --policy %s." % policy)
+        return policies
+
+    def handle(self, *args, **options):
+        policies = self.get_policies(options)
+        if not policies:
+            self.stdout.write("No retention policy configured.")
+            return
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        result = purge_users(
+            policies, options["batch_size"], options["pause"], options["dry_run"]
+        )
+        verb = "Would delete" if options["dry_run"] else "Deleted"
+        for policy, count in result.deleted.items():
+            self.stdout.write("%s %s %s users." % (verb, count, policy))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Done in %.2fs (%s batches)." % (result.seconds, result.batches)
+            )
+        )
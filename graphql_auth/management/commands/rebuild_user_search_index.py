@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Index the USER_SEARCH_FIELDS of all the users for the icontains / istartswith "
+        "filters, in batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Users indexed per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        result = rebuild_search_index(options["batch_size"])
+        self.stdout.write(
+            "Indexed %s users (%s trigrams)." % (result.users, result.grams)
+        )
+        self.stdout.write(self.style.SUCCESS("Done in %.2fs." % result.seconds))
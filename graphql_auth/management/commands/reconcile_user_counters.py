@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.counters import reconcile_user_counters
+from graphql_auth.settings import graphql_auth_settings as app_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the users and rewrite the counters of the USER_COUNTERS setting, "
+        "replacing any drift."
+    )
+
+    def handle(self, *args, **options):
+        if not app_settings.USER_COUNTERS:
+            raise CommandError("USER_COUNTERS is not enabled.")
+        counts = reconcile_user_counters()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "%(total)s users, %(verified)s verified, %(archived)s archived."
+                % counts
+            )
+        )
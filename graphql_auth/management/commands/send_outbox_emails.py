@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from graphql_auth.lanes import get_lanes
+from graphql_auth.outbox import dispatch_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the pending emails of the outbox (EMAIL_OUTBOX setting), retrying the "
+        "failed ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Emails sent per transaction and mail connection.",
+        )
+        parser.add_argument(
+            "--lane",
+            action="append",
+            dest="lanes",
+            help="Only send the emails of this lane (EMAIL_LANES), repeatable.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running, sending the emails as they are due.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to sleep between two runs of --loop.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        lanes = None
+        if options["lanes"]:
+            lanes = [lane for lane in get_lanes() if lane.name in options["lanes"]]
+            unknown = set(options["lanes"]) - {lane.name for lane in lanes}
+            if unknown:
+                raise CommandError("Unknown lanes: %s." % ", ".join(sorted(unknown)))
+        while True:
+            result = dispatch_emails(batch_size=options["batch_size"], lanes=lanes)
+            if result.sent or result.retried or result.failed or not options["loop"]:
+                self.stdout.write(
+                    "Sent %s emails, %s to retry, %s failed."
+                    % (result.sent, result.retried, result.failed)
+                )
+                self.stdout.write(self.style.SUCCESS("Done in %.2fs." % result.seconds))
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
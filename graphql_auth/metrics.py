@@ -0,0 +1,278 @@
+"""
+Prometheus style metrics of the auth mutations, see the `METRICS_REGISTRY` setting.
+
+Every mutation records:
+
+- `graphql_auth_mutation_seconds{mutation}`: latency histogram
+- `graphql_auth_mutation_total{mutation, outcome}`: counter by outcome,
+  `success`, the `Messages` error code (e.g. `invalid_credentials`) or `exception`
+- `graphql_auth_mutation_db_queries{mutation}` and
+  `graphql_auth_mutation_db_seconds{mutation}`: histograms of the number and time
+  of the database queries
+- `graphql_auth_stage_seconds{mutation, stage}`: histogram of the time spent in
+  each stage: `password_hash` (password check, or hash and save of the password forms),
+  `email_render`, `email_send`, `token_sign` and `token_verify` (email tokens),
+  `authenticate` (`graphql_jwt` password check and JWT signing on login) and
+  `jwt` (`graphql_jwt` verify, refresh and revoke)
+
+And `graphql_auth_email_coalesced_total{mutation, action}` counts the email requests
+dropped by the `EMAIL_COALESCE_WINDOW`.
+
+With the default no-op registry, nothing is measured.
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+from django.db import connection
+
+from .settings import graphql_auth_settings as app_settings
+
+# buckets of the histograms in seconds, and of the query count histogram
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# mutation being instrumented, to label the stages timed inside it
+current_mutation: ContextVar[str] = ContextVar("graphql_auth_mutation", default="")
+
+
+class MetricsRegistry:
+    """
+    No-op registry. Subclass it to export the metrics to a monitoring system,
+    e.g. with `prometheus_client`.
+    """
+
+    enabled = False
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """
+        Record `value` in the histogram `name`.
+        """
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        """
+        Increment the counter `name`.
+        """
+
+
+class Histogram:
+    __slots__ = ("buckets", "bucket_counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+
+
+class InMemoryRegistry(MetricsRegistry):
+    """
+    Registry keeping the metrics in memory, for tests and benchmarks,
+    with an `export` in the Prometheus text format.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return (name, tuple(sorted(labels.items())))
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                buckets = (
+                    COUNT_BUCKETS if name.endswith("_queries") else SECONDS_BUCKETS
+                )
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def get_counter(self, name: str, **labels) -> float:
+        return self.counters.get(self._key(name, labels), 0)
+
+    def get_histogram(self, name: str, **labels) -> Histogram | None:
+        return self.histograms.get(self._key(name, labels))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def export(self) -> str:
+        def format_labels(labels, **extra):
+            labels = (*labels, *extra.items())
+            if not labels:
+                return ""
+            return "{%s}" % ",".join(
+                '%s="%s"' % (key, str(value).replace('"', '\\"'))
+                for key, value in labels
+            )
+
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                lines.append("%s%s %s" % (name, format_labels(labels), value))
+            for (name, labels), histogram in sorted(
+                self.histograms.items(), key=lambda item: item[0]
+            ):
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append(
+                        "%s_bucket%s %s"
+                        % (name, format_labels(labels, le=bound), count)
+                    )
+                lines.append(
+                    "%s_bucket%s %s"
+                    % (name, format_labels(labels, le="+Inf"), histogram.count)
+                )
+                lines.append(
+                    "%s_sum%s %s" % (name, format_labels(labels), histogram.sum)
+                )
+                lines.append(
+                    "%s_count%s %s" % (name, format_labels(labels), histogram.count)
+                )
+        return "\n".join(lines) + "\n"
+
+
+NULL_REGISTRY = MetricsRegistry()
+
+_null_timer = nullcontext()
+
+
+def get_registry() -> MetricsRegistry:
+    return app_settings.metrics_registry or NULL_REGISTRY
+
+
+class _StageTimer:
+    __slots__ = ("registry", "stage", "started")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(
+            "graphql_auth_stage_seconds",
+            time.perf_counter() - self.started,
+            mutation=current_mutation.get(),
+            stage=self.stage,
+        )
+
+
+def timer(stage: str):
+    """
+    Context manager timing a stage of the current mutation:
+
+        with timer("password_hash"):
+            user.set_password(password)
+    """
+    registry = get_registry()
+    if not registry.enabled:
+        return _null_timer
+    return _StageTimer(registry, stage)
+
+
+class _QueryTracker:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def get_outcome(result) -> str:
+    """
+    `success`, or the code of the first error of a mutation output.
+    """
+    errors = getattr(result, "errors", None)
+    if hasattr(errors, "get_json_data"):  # form errors
+        errors = errors.get_json_data()
+    if not errors:
+        return "error" if getattr(result, "success", True) is False else "success"
+    if isinstance(errors, dict):
+        if isinstance(errors.get("code"), str):
+            return errors["code"]
+        for error in errors.values():
+            if isinstance(error, list) and error:
+                error = error[0]
+            if isinstance(error, dict) and isinstance(error.get("code"), str):
+                return error["code"]
+    return "error"
+
+
+def instrument_mutation(mutation: str, resolve, root, info, kwargs: dict):
+    """
+    Call `resolve(root, info, **kwargs)` as `current_mutation`,
+    recording the metrics of `mutation`.
+    """
+    token = current_mutation.set(mutation)
+    try:
+        registry = get_registry()
+        if not registry.enabled:
+            return resolve(root, info, **kwargs)
+        return _measure_mutation(registry, mutation, resolve, root, info, kwargs)
+    finally:
+        current_mutation.reset(token)
+
+
+def _measure_mutation(
+    registry: MetricsRegistry, mutation: str, resolve, root, info, kwargs: dict
+):
+    tracker = _QueryTracker()
+    outcome = "exception"
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(tracker):
+            result = resolve(root, info, **kwargs)
+        outcome = get_outcome(result)
+        return result
+    except Exception as error:
+        extensions = getattr(error, "extensions", None)
+        if isinstance(extensions, dict) and isinstance(extensions.get("code"), str):
+            outcome = extensions["code"]
+        raise
+    finally:
+        registry.observe(
+            "graphql_auth_mutation_seconds",
+            time.perf_counter() - started,
+            mutation=mutation,
+        )
+        registry.increment(
+            "graphql_auth_mutation_total", mutation=mutation, outcome=outcome
+        )
+        registry.observe(
+            "graphql_auth_mutation_db_queries", tracker.count, mutation=mutation
+        )
+        registry.observe(
+            "graphql_auth_mutation_db_seconds", tracker.seconds, mutation=mutation
+        )
@@ -0,0 +1,27 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def set_archived_at(apps, schema_editor):
+    # the retention period of the users already archived starts now
+    UserStatus = apps.get_model("graphql_auth", "UserStatus")
+    UserStatus._default_manager.filter(archived=True, archived_at__isnull=True).update(archived_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("graphql_auth", "0001_initial")]
+
+    operations = [
+        migrations.AddField(
+            model_name="userstatus",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="userstatus",
+            name="deactivated_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(set_archived_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+
+def set_registered_at(apps, schema_editor):
+    # users registered when they joined, if the user model knows
+    UserStatus = apps.get_model("graphql_auth", "UserStatus")
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    if any(field.name == "date_joined" for field in User._meta.concrete_fields):
+        UserStatus._default_manager.update(
+            registered_at=Subquery(User._default_manager.filter(pk=OuterRef("user_id")).values("date_joined")[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("graphql_auth", "0002_userstatus_archived_at_deactivated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userstatus",
+            name="registered_at",
+            field=models.DateTimeField(db_index=True, default=timezone.now),
+        ),
+        migrations.RunPython(set_registered_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("graphql_auth", "0003_userstatus_registered_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailOutbox",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("method", models.CharField(max_length=64)),
+                ("args", models.JSONField(blank=True, default=list)),
+                ("domain", models.CharField(max_length=255)),
+                ("secure", models.BooleanField(default=False)),
+                ("idempotency_key", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.PositiveSmallIntegerField(
+                        choices=[(0, "pending"), (1, "sent"), (2, "failed")], default=0
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("next_attempt_at", models.DateTimeField(default=timezone.now)),
+                ("created_at", models.DateTimeField(default=timezone.now)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("last_error", models.TextField(blank=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["status", "next_attempt_at"], name="graphql_auth_emailoutbox_due")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="emailoutbox",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("status", 0)),
+                fields=("idempotency_key",),
+                name="graphql_auth_emailoutbox_pending_key",
+            ),
+        ),
+    ]
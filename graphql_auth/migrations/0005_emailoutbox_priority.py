@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("graphql_auth", "0004_emailoutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emailoutbox",
+            name="priority",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.RemoveIndex(
+            model_name="emailoutbox",
+            name="graphql_auth_emailoutbox_due",
+        ),
+        migrations.AddIndex(
+            model_name="emailoutbox",
+            index=models.Index(fields=["status", "priority", "next_attempt_at"], name="graphql_auth_emailoutbox_lane"),
+        ),
+    ]
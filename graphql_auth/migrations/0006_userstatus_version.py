@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("graphql_auth", "0005_emailoutbox_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userstatus",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("graphql_auth", "0006_userstatus_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSearchGram",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("field", models.CharField(max_length=64)),
+                ("gram", models.CharField(max_length=3)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="+", to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["field", "gram", "user"], name="graphql_auth_search_gram")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="usersearchgram",
+            constraint=models.UniqueConstraint(fields=("user", "field", "gram"), name="graphql_auth_search_unique"),
+        ),
+    ]
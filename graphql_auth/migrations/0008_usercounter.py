@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("graphql_auth", "0007_usersearchgram"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserCounter",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=32)),
+                ("shard", models.PositiveSmallIntegerField(default=0)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="usercounter",
+            constraint=models.UniqueConstraint(fields=("name", "shard"), name="graphql_auth_usercounter_unique"),
+        ),
+    ]
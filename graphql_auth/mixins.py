@@ -1,19 +1,26 @@
+import hashlib
 from smtplib import SMTPException
 
 import graphene
 from django.contrib.auth import get_user_model
-from django.contrib.auth.forms import PasswordChangeForm, SetPasswordForm
+from django.core.cache import caches
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.signing import BadSignature, SignatureExpired
 from django.db import transaction
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
 from graphene.types.generic import GenericScalar
-from graphql_jwt.decorators import token_auth
-from graphql_jwt.exceptions import JSONWebTokenError, JSONWebTokenExpired
 
 from .bases import SuccessErrorsOutput
+from .cache import invalidate_users_cache
 from .constants import Messages, TokenAction
-from .decorators import password_confirmation_required, secondary_email_required, verification_required
+from .counters import update_user_counters
+from .decorators import (
+    lazy_token_auth,
+    password_confirmation_required,
+    secondary_email_required,
+    verification_required,
+)
 from .exceptions import (
     EmailAlreadyInUseError,
     InvalidCredentialsError,
@@ -23,17 +30,111 @@ from .exceptions import (
     UserNotVerifiedError,
     WrongUsageError,
 )
-from .forms import EmailForm, PasswordLessRegisterForm, RegisterForm, UpdateAccountForm
-from .models import UserStatus
-from .queries import UserNode
+from .metrics import current_mutation, get_registry, timer
+from .models import UserStatus, bump_version
 from .settings import graphql_auth_settings as app_settings
 from .shortcuts import async_email_func, get_user_by_email, get_user_to_login
 from .signals import user_registered, user_verified
-from .utils import get_token_payload, revoke_user_refresh_token, using_refresh_tokens
+from .status import select_status
+from .tracing import is_valid, span
+from .utils import (
+    get_token_payload,
+    lazy_class_attribute,
+    revoke_user_refresh_token,
+    using_refresh_tokens,
+)
 
 UserModel = get_user_model()
 
 
+def send_email(user, method: str, info, *args, func=None) -> None:
+    """
+    Send the email of the `UserStatus` method `method` (called through `func`
+    if given): through the outbox (`EMAIL_OUTBOX`), the `EMAIL_ASYNC_TASK`
+    or right away.
+    """
+    if app_settings.EMAIL_OUTBOX:
+        from .outbox import enqueue_email
+
+        enqueue_email(user, method, info, *args)
+        return
+    func = func or getattr(user.status, method)
+    if async_email_func:
+        async_email_func(func, (info, *args))
+    else:
+        func(info, *args)
+
+
+class CoalescedEmail:
+    """
+    Email method of `send_coalesced_email`, releasing the coalescing key when
+    the email fails: when called, in the `EMAIL_ASYNC_TASK` worker, or later on
+    delivery by the `AsyncSMTPEmailBackend` it is given. The next request then
+    sends the email again.
+    """
+
+    def __init__(self, func, cache_alias: str, key: str):
+        self.func = func
+        self.cache_alias = cache_alias
+        self.key = key
+        # the lanes pick the lane of the email by the name of the method
+        self.__name__ = func.__name__
+
+    def __call__(self, *args, **kwargs):
+        try:
+            result = self.func(*args, **kwargs)
+        except BaseException:
+            self.release()
+            raise
+        for future in getattr(kwargs.get("connection"), "futures", ()):
+            future.add_done_callback(self._release_on_failure)
+        return result
+
+    def release(self) -> None:
+        caches[self.cache_alias].delete(self.key)
+
+    def _release_on_failure(self, future) -> None:
+        if future.exception() is not None:
+            self.release()
+
+
+def get_coalescing_key(user, action: str, *args) -> str:
+    # per recipient, e.g. the secondary email of a password reset
+    recipients = args[0] if args else [getattr(user, UserModel.EMAIL_FIELD)]
+    recipient = ",".join(sorted(str(email).lower() for email in recipients))
+    digest = hashlib.sha256(recipient.encode()).hexdigest()[:16]
+    return "graphql_auth:email:%s:%s:%s" % (action, user.pk, digest)
+
+
+def send_coalesced_email(user, action: str, method: str, info, *args) -> None:
+    """
+    `send_email`, unless an email of `action` was already requested for the user
+    and the same recipients within `EMAIL_COALESCE_WINDOW`: the user is left with
+    that one, in flight or sent.
+    """
+    window = app_settings.EMAIL_COALESCE_WINDOW
+    if window is None:
+        return send_email(user, method, info, *args)
+    cache = caches[app_settings.EMAIL_COALESCE_CACHE]
+    key = get_coalescing_key(user, action, *args)
+    if not cache.add(key, True, window.total_seconds()):
+        get_registry().increment(
+            "graphql_auth_email_coalesced_total",
+            mutation=current_mutation.get(),
+            action=action,
+        )
+        return
+    func = CoalescedEmail(
+        getattr(user.status, method), app_settings.EMAIL_COALESCE_CACHE, key
+    )
+    try:
+        send_email(user, method, info, *args, func=func)
+    except BaseException:
+        # not sent, the next request sends it
+        cache.delete(key)
+        raise
+
+
 class RegisterMixin(SuccessErrorsOutput):
     """
     Register user with fields defined in the settings.
@@ -61,10 +162,16 @@ class RegisterMixin(SuccessErrorsOutput):
         if using_refresh_tokens():
             refresh_token = graphene.Field(graphene.String)
 
-    form = PasswordLessRegisterForm if app_settings.ALLOW_PASSWORDLESS_REGISTRATION else RegisterForm
+    form = lazy_class_attribute(
+        lambda: import_string(
+            "graphql_auth.forms.PasswordLessRegisterForm"
+            if app_settings.ALLOW_PASSWORDLESS_REGISTRATION
+            else "graphql_auth.forms.RegisterForm"
+        )
+    )
 
     @classmethod
-    @token_auth
+    @lazy_token_auth
     def login_on_register(cls, root, info, **kwargs):
         return cls()
 
@@ -73,10 +180,19 @@ class RegisterMixin(SuccessErrorsOutput):
         try:
             with transaction.atomic():
                 f = cls.form(kwargs)
-                if f.is_valid():
+                if is_valid(f):
                     email = kwargs.get(UserModel.EMAIL_FIELD, False)  # type: ignore
-                    UserStatus.clean_email(email)
-                    user = f.save()
+                    email_in_use = getattr(f, "email_in_use", None)
+                    if email_in_use is None:
+                        # custom form without the single query check
+                        UserStatus.clean_email(email)
+                    elif email_in_use:
+                        raise EmailAlreadyInUseError
+                    # inserted with the user,
+                    # by the (possibly overridden) save of the form
+                    UserStatus.attach(f.instance)
+                    with timer("password_hash"):
+                        user = f.save()
                     send_activation = app_settings.SEND_ACTIVATION_EMAIL is True and email
                     send_password_set = (
                         app_settings.ALLOW_PASSWORDLESS_REGISTRATION is True
@@ -84,21 +200,19 @@ class RegisterMixin(SuccessErrorsOutput):
                         and email
                     )
                     if send_activation:
-                        if app_settings.is_async_email:
-                            async_email_func(user.status.send_activation_email, (info,))  # type: ignore
-                        else:
-                            user.status.send_activation_email(info)
+                        send_email(user, "send_activation_email", info)
 
                     if send_password_set:
-                        if async_email_func:
-                            async_email_func(user.status.send_password_set_email, (info,))
-                        else:
-                            user.status.send_password_set_email(info)
+                        send_email(user, "send_password_set_email", info)
 
-                    user_registered.send(sender=cls, user=user)
+                    with span("graphql_auth.signal", signal="user_registered"):
+                        user_registered.send(sender=cls, user=user)
 
                     if app_settings.ALLOW_LOGIN_NOT_VERIFIED:
-                        payload = cls.login_on_register(root, info, password=kwargs.get("password1"), **kwargs)
+                        with timer("authenticate"), span("graphql_auth.authenticate"):
+                            payload = cls.login_on_register(
+                                root, info, password=kwargs.get("password1"), **kwargs
+                            )
                         return_value = {}
                         for field in cls._meta.fields:  # type: ignore
                             return_value[field] = getattr(payload, field)
@@ -185,19 +299,18 @@ class ResendActivationEmailMixin(SuccessErrorsOutput):
     a successful response is returned.
     """
 
-    form = EmailForm
+    form = lazy_class_attribute("graphql_auth.forms.EmailForm")
 
     @classmethod
     def resolve_mutation(cls, root, info, **kwargs):
         try:
             email = kwargs.get("email")
             f = cls.form({"email": email})
-            if f.is_valid():
+            if is_valid(f):
                 user = get_user_by_email(email)
-                if async_email_func:
-                    async_email_func(user.status.resend_activation_email, (info,))  # type: ignore
-                else:
-                    user.status.resend_activation_email(info)  # type: ignore
+                send_coalesced_email(
+                    user, TokenAction.ACTIVATION, "resend_activation_email", info
+                )
                 return cls(success=True)
             return cls(success=False, errors=f.errors)
         except ObjectDoesNotExist:
@@ -221,19 +334,22 @@ class SendPasswordResetEmailMixin(SuccessErrorsOutput):
     a successful response is returned.
     """
 
-    form = EmailForm
+    form = lazy_class_attribute("graphql_auth.forms.EmailForm")
 
     @classmethod
     def resolve_mutation(cls, root, info, **kwargs):
         email = kwargs.get("email")
         try:
             f = cls.form({"email": email})
-            if f.is_valid():
+            if is_valid(f):
                 user = get_user_by_email(email)
-                if async_email_func:
-                    async_email_func(user.status.send_password_reset_email, (info, [email]))  # type: ignore
-                else:
-                    user.status.send_password_reset_email(info, [email])  # type: ignore
+                send_coalesced_email(
+                    user,
+                    TokenAction.PASSWORD_RESET,
+                    "send_password_reset_email",
+                    info,
+                    [email],
+                )
                 return cls(success=True)
             return cls(success=False, errors=f.errors)
         except ObjectDoesNotExist:
@@ -244,10 +360,9 @@ class SendPasswordResetEmailMixin(SuccessErrorsOutput):
     @classmethod
     def _resend_activation_email(cls, info, user):  # pragma: no cover
         try:
-            if async_email_func:
-                async_email_func(user.status.resend_activation_email, (info,))  # type: ignore
-            else:
-                user.status.resend_activation_email(info)  # type: ignore
+            send_coalesced_email(
+                user, TokenAction.ACTIVATION, "resend_activation_email", info
+            )
             return cls(success=False, errors=Messages.NOT_VERIFIED_PASSWORD_RESET)
         except SMTPException:
             return cls(success=False, errors=Messages.EMAIL_FAIL)
@@ -266,7 +381,7 @@ class PasswordResetMixin(SuccessErrorsOutput):
     Also, if user has not been verified yet, verify it.
     """
 
-    form = SetPasswordForm
+    form = lazy_class_attribute("django.contrib.auth.forms.SetPasswordForm")
 
     @classmethod
     def resolve_mutation(cls, root, info, **kwargs):
@@ -277,16 +392,21 @@ class PasswordResetMixin(SuccessErrorsOutput):
                 TokenAction.PASSWORD_RESET,
                 app_settings.EXPIRATION_PASSWORD_RESET_TOKEN,
             )
-            user = UserModel._default_manager.get(**payload)
+            user = select_status(UserModel._default_manager.all()).get(**payload)
             f = cls.form(user, kwargs)
-            if f.is_valid():
+            if is_valid(f):
                 revoke_user_refresh_token(user)
-                user = f.save()
+                with timer("password_hash"):
+                    user = f.save()
 
                 if user.status.verified is False:  # type: ignore
                     user.status.verified = True  # type: ignore
-                    user.status.save(update_fields=["verified"])  # type: ignore
-                    user_verified.send(sender=cls, user=user)
+                    user.status.save_and_bump_version(  # type: ignore
+                        update_fields=["verified"]
+                    )
+                    update_user_counters(user.pk, verified=1)
+                    with span("graphql_auth.signal", signal="user_verified"):
+                        user_verified.send(sender=cls, user=user)
 
                 return cls(success=True)
             return cls(success=False, errors=f.errors)
@@ -309,7 +429,7 @@ class PasswordSetMixin(SuccessErrorsOutput):
     Also, if user has not been verified yet, verify it.
     """
 
-    form = SetPasswordForm
+    form = lazy_class_attribute("django.contrib.auth.forms.SetPasswordForm")
 
     @classmethod
     def resolve_mutation(cls, root, info, **kwargs):
@@ -320,18 +440,22 @@ class PasswordSetMixin(SuccessErrorsOutput):
                 TokenAction.PASSWORD_SET,
                 app_settings.EXPIRATION_PASSWORD_SET_TOKEN,
             )
-            user = UserModel._default_manager.get(**payload)
+            user = select_status(UserModel._default_manager.all()).get(**payload)
             f = cls.form(user, kwargs)
-            if f.is_valid():
+            if is_valid(f):
                 # Check if user has already set a password
                 if user.has_usable_password():
                     raise PasswordAlreadySetError
                 revoke_user_refresh_token(user)
-                user = f.save()
+                with timer("password_hash"):
+                    user = f.save()
 
                 if user.status.verified is False:  # type: ignore
                     user.status.verified = True  # type: ignore
-                    user.status.save(update_fields=["verified"])  # type: ignore
+                    user.status.save_and_bump_version(  # type: ignore
+                        update_fields=["verified"]
+                    )
+                    update_user_counters(user.pk, verified=1)
 
                 return cls(success=True)
             return cls(success=False, errors=f.errors)
@@ -360,7 +484,7 @@ class ObtainJSONWebTokenMixin(SuccessErrorsOutput):
 
     refresh_expires_in = graphene.Int()
     payload = GenericScalar()
-    user = graphene.Field(UserNode)
+    user = graphene.Field("graphql_auth.queries.UserNode")
     unarchiving = graphene.Boolean(default_value=False)
 
     user_to_login = None
@@ -377,6 +501,8 @@ class ObtainJSONWebTokenMixin(SuccessErrorsOutput):
 
     @classmethod
     def resolve_mutation(cls, root, info, **kwargs):
+        from graphql_jwt.exceptions import JSONWebTokenError
+
         if len(kwargs.items()) != 2:
             raise WrongUsageError(
                 "Must login with password and one of the following fields %s." % (app_settings.LOGIN_ALLOWED_FIELDS)
@@ -401,7 +527,10 @@ class ObtainJSONWebTokenMixin(SuccessErrorsOutput):
             }
 
             if cls.user_to_login.status.verified or app_settings.ALLOW_LOGIN_NOT_VERIFIED:  # type: ignore
-                return cls.parent_resolve(root, info, **final_kwargs)  # type: ignore
+                with timer("authenticate"), span("graphql_auth.authenticate"):
+                    return cls.parent_resolve(  # type: ignore
+                        root, info, **final_kwargs
+                    )
             else:
                 raise UserNotVerifiedError
         except (JSONWebTokenError, ObjectDoesNotExist, InvalidCredentialsError):
@@ -452,9 +581,9 @@ class DeleteAccountMixin(ArchiveOrDeleteMixin):
         if app_settings.ALLOW_DELETE_ACCOUNT:
             revoke_user_refresh_token(user=user)
             user.delete()
+            invalidate_users_cache(on_commit=True)
         else:
-            user.is_active = False
-            user.save(update_fields=["is_active"])
+            UserStatus.deactivate(user)
             revoke_user_refresh_token(user=user)
 
 
@@ -469,10 +598,10 @@ class PasswordChangeMixin(SuccessErrorsOutput):
     if using_refresh_tokens():
         refresh_token = graphene.Field(graphene.String)
 
-    form = PasswordChangeForm
+    form = lazy_class_attribute("django.contrib.auth.forms.PasswordChangeForm")
 
     @classmethod
-    @token_auth
+    @lazy_token_auth
     def login_on_password_change(cls, root, info, **kwargs):
         return cls()
 
@@ -482,15 +611,21 @@ class PasswordChangeMixin(SuccessErrorsOutput):
     def resolve_mutation(cls, root, info, **kwargs):
         user = info.context.user
         f = cls.form(user, kwargs)
-        if f.is_valid():
+        if is_valid(f):
             revoke_user_refresh_token(user)
-            user = f.save()
-            payload = cls.login_on_password_change(
-                root,
-                info,
-                password=kwargs.get("new_password1"),
-                **{user.USERNAME_FIELD: getattr(user, user.USERNAME_FIELD)}  # type: ignore
-            )
+            with timer("password_hash"):
+                user = f.save()
+            with timer("authenticate"), span("graphql_auth.authenticate"):
+                payload = cls.login_on_password_change(
+                    root,
+                    info,
+                    password=kwargs.get("new_password1"),
+                    **{
+                        user.USERNAME_FIELD: getattr(  # type: ignore
+                            user, user.USERNAME_FIELD
+                        )
+                    },
+                )
             return_value = {}
             for field in cls._meta.fields:  # type: ignore
                 return_value[field] = getattr(payload, field)
@@ -506,7 +641,7 @@ class UpdateAccountMixin(SuccessErrorsOutput):
     User must be verified.
     """
 
-    form = UpdateAccountForm
+    form = lazy_class_attribute("graphql_auth.forms.UpdateAccountForm")
 
     @classmethod
     @verification_required
@@ -517,8 +652,9 @@ class UpdateAccountMixin(SuccessErrorsOutput):
             if field not in kwargs:
                 kwargs[field] = getattr(user, field)
         f = cls.form(kwargs, instance=user)
-        if f.is_valid():
+        if is_valid(f):
             f.save()
+            bump_version(user)
             return cls(success=True)
         return cls(success=False, errors=f.errors)
 
@@ -531,8 +667,11 @@ class VerifyOrRefreshOrRevokeTokenMixin(SuccessErrorsOutput):
 
     @classmethod
     def resolve_mutation(cls, root, info, **kwargs):
+        from graphql_jwt.exceptions import JSONWebTokenError, JSONWebTokenExpired
+
         try:
-            return cls.parent_resolve(root, info, **kwargs)  # type: ignore
+            with timer("jwt"):
+                return cls.parent_resolve(root, info, **kwargs)  # type: ignore
         except JSONWebTokenExpired:
             return cls(success=False, errors=Messages.EXPIRED_TOKEN)
         except JSONWebTokenError as e:
@@ -548,19 +687,18 @@ class SendSecondaryEmailActivationMixin(SuccessErrorsOutput):
     User must be verified and confirm password.
     """
 
+    form = lazy_class_attribute("graphql_auth.forms.EmailForm")
+
     @classmethod
     @verification_required
     @password_confirmation_required
     def resolve_mutation(cls, root, info, **kwargs):
         try:
             email = kwargs.get("email")
-            f = EmailForm({"email": email})
-            if f.is_valid():
+            f = cls.form({"email": email})
+            if is_valid(f):
                 user = info.context.user
-                if async_email_func:
-                    async_email_func(user.status.send_secondary_email_activation, (info, email))
-                else:
-                    user.status.send_secondary_email_activation(info, email)
+                send_email(user, "send_secondary_email_activation", info, email)
                 return cls(success=True)
             return cls(success=False, errors=f.errors)
         except EmailAlreadyInUseError:
@@ -1,4 +1,5 @@
 import time
+import types
 
 from django.conf import settings as django_settings
 from django.contrib.auth import get_user_model
@@ -6,17 +7,98 @@ from django.contrib.sites.shortcuts import get_current_site
 from django.core.mail import send_mail
 from django.db import models, transaction
 from django.template.loader import render_to_string
+from django.utils import timezone
 from django.utils.html import strip_tags
 
+from .cache import invalidate_users_cache
 from .constants import TokenAction
 from .exceptions import EmailAlreadyInUseError, UserAlreadyVerifiedError, WrongUsageError
+from .metrics import timer
 from .settings import graphql_auth_settings as app_settings
 from .signals import user_verified
+from .status import STATUS_FIELDS, status_lookup, status_on_user_model
+from .tracing import span
 from .utils import get_token, get_token_payload
 
 UserModel = get_user_model()
 
 
+class UserStatusManager(models.Manager):
+    def bulk_create_for_users(
+        self, users, batch_size=None, **fields
+    ) -> list["UserStatus"]:
+        """
+        Create the statuses of users created with `bulk_create`
+        (which does not send `post_save`) in batched INSERTs.
+
+        `fields` are set on every status, e.g. `verified=True`,
+        unless a status was attached to the user (see `UserStatus.attach`).
+        The statuses are attached to the users, so `user.status`
+        does not query the database.
+
+        With the status fields on the user model, the `fields` are updated
+        on the users and their `UserStatusFacade` are returned.
+        """
+        users = list(users)
+        if status_on_user_model():
+            if fields:
+                for user in users:
+                    for name, value in fields.items():
+                        setattr(user, name, value)
+                UserModel._default_manager.bulk_update(
+                    users, list(fields), batch_size=batch_size
+                )
+            return [user.status for user in users]
+        if any(user.pk is None for user in users):
+            # backends not returning primary keys from bulk_create
+            USERNAME_FIELD = UserModel.USERNAME_FIELD  # type: ignore
+            pks = dict(
+                UserModel._default_manager.filter(
+                    **{
+                        "%s__in"
+                        % USERNAME_FIELD: [
+                            getattr(user, USERNAME_FIELD) for user in users
+                        ]
+                    }
+                ).values_list(USERNAME_FIELD, "pk")
+            )
+            for user in users:
+                user.pk = pks[getattr(user, USERNAME_FIELD)]
+        relation = self.model._meta.get_field("user").remote_field
+        statuses = []
+        for user in users:
+            status = relation.get_cached_value(user, default=None)
+            if status is None or not status._state.adding:
+                status = self.model(**fields)
+            status.user = user
+            statuses.append(status)
+        return self.bulk_create(statuses, batch_size=batch_size)
+
+    def bulk_update_statuses(
+        self, statuses, fields=STATUS_FIELDS, batch_size=None
+    ) -> int:
+        """
+        `bulk_update` of statuses or of their users with the status fields
+        on the user model, bumping their `version`.
+        """
+        statuses = list(statuses)
+        for status in statuses:
+            status.version = models.F("version") + 1
+        fields = [*fields, "version"]
+        if status_on_user_model():
+            instances = [status.user for status in statuses]
+            updated = UserModel._default_manager.bulk_update(
+                instances, fields, batch_size=batch_size
+            )
+        else:
+            instances = statuses
+            updated = self.bulk_update(statuses, fields, batch_size=batch_size)
+        for instance in instances:
+            # the new version is read from the database on access
+            vars(instance).pop("version", None)
+        return updated
+
+
 class UserStatus(models.Model):
     """
     A helper model that handles user account stuff.
@@ -26,23 +108,73 @@ class UserStatus(models.Model):
     verified = models.BooleanField(default=False)
     archived = models.BooleanField(default=False)
     secondary_email = models.EmailField(blank=True, null=True)
+    archived_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    deactivated_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    registered_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # bumped by the mutations changing the user, see `bump_version`
+    version = models.PositiveIntegerField(default=0)
+
+    objects = UserStatusManager()
 
     def __str__(self):
         return "%s - status" % (self.user)
 
-    def send(self, subject, template, context, recipient_list=None):
-        _subject = render_to_string(subject, context).replace("\n", " ").strip()
-        html_message = render_to_string(template, context)
-        message = strip_tags(html_message)
-
-        return send_mail(
-            subject=_subject,
-            from_email=app_settings.EMAIL_FROM,
-            message=message,
-            html_message=html_message,
-            recipient_list=(recipient_list or [getattr(self.user, UserModel.EMAIL_FIELD)]),  # type: ignore
-            fail_silently=False,
+    @classmethod
+    def attach(cls, user, **fields) -> "UserStatus":
+        """
+        Attach a new status to a user that is not saved yet.
+
+        When the user is saved, the status is inserted without
+        checking if it exists and `user.status` does not query
+        the database.
+        """
+        if status_on_user_model():
+            for name, value in fields.items():
+                setattr(user, name, value)
+            return user.status
+        return cls(user=user, **fields)
+
+    @classmethod
+    def get_for_user(cls, user) -> "UserStatus":
+        """
+        Read the status of a user from the database.
+        """
+        if status_on_user_model():
+            return user.status
+        return cls.objects.get(user=user)
+
+    def save_and_bump_version(self, update_fields=None) -> None:
+        """
+        Save the status (only `update_fields` if given)
+        and bump its `version` in the same query.
+        The new version is read from the database on access.
+        """
+        self.version = models.F("version") + 1
+        self.save(
+            update_fields=None if update_fields is None else [*update_fields, "version"]
         )
+        vars(self.user if status_on_user_model() else self).pop("version", None)
+
+    def send(self, subject, template, context, recipient_list=None, connection=None):
+        with span("graphql_auth.send_email", template=template):
+            with timer("email_render"):
+                _subject = render_to_string(subject, context).replace("\n", " ").strip()
+                html_message = render_to_string(template, context)
+                message = strip_tags(html_message)
+
+            with timer("email_send"):
+                return send_mail(
+                    subject=_subject,
+                    from_email=app_settings.EMAIL_FROM,
+                    message=message,
+                    html_message=html_message,
+                    recipient_list=(
+                        recipient_list
+                        or [getattr(self.user, UserModel.EMAIL_FIELD)]  # type: ignore
+                    ),
+                    fail_silently=False,
+                    connection=connection,
+                )
 
     def get_email_context(self, info, path, action, **kwargs):
         token = get_token(self.user, action, **kwargs)
@@ -88,7 +220,7 @@ class UserStatus(models.Model):
         subject = app_settings.EMAIL_SUBJECT_PASSWORD_RESET
         return self.send(subject, template, email_context, *args, **kwargs)
 
-    def send_secondary_email_activation(self, info, email):
+    def send_secondary_email_activation(self, info, email, **kwargs):
         if not self.email_is_free(email):
             raise EmailAlreadyInUseError
         email_context = self.get_email_context(
@@ -99,12 +231,15 @@ class UserStatus(models.Model):
         )
         template = app_settings.EMAIL_TEMPLATE_SECONDARY_EMAIL_ACTIVATION
         subject = app_settings.EMAIL_SUBJECT_SECONDARY_EMAIL_ACTIVATION
-        return self.send(subject, template, email_context, recipient_list=[email])
+        return self.send(
+            subject, template, email_context, recipient_list=[email], **kwargs
+        )
 
     @classmethod
     def email_is_free(cls, email) -> bool:
         return not UserModel._default_manager.filter(
-            models.Q(**{UserModel.EMAIL_FIELD: email}) | models.Q(status__secondary_email=email)  # type: ignore
+            models.Q(**{UserModel.EMAIL_FIELD: email})  # type: ignore
+            | models.Q(**{status_lookup("secondary_email"): email})
         ).exists()
 
     @classmethod
@@ -117,11 +252,13 @@ class UserStatus(models.Model):
     def verify(cls, token):
         payload = get_token_payload(token, TokenAction.ACTIVATION, app_settings.EXPIRATION_ACTIVATION_TOKEN)
         user = UserModel._default_manager.get(**payload)
-        user_status = cls.objects.get(user=user)
+        user_status = cls.get_for_user(user)
         if user_status.verified is False:
             user_status.verified = True
-            user_status.save(update_fields=["verified"])
-            user_verified.send(sender=cls, user=user)
+            user_status.save_and_bump_version(update_fields=["verified"])
+            _update_user_counters(user.pk, verified=1)
+            with span("graphql_auth.signal", signal="user_verified"):
+                user_verified.send(sender=cls, user=user)
         else:
             raise UserAlreadyVerifiedError
 
@@ -136,22 +273,52 @@ class UserStatus(models.Model):
         if not cls.email_is_free(secondary_email):
             raise EmailAlreadyInUseError
         user = UserModel._default_manager.get(**payload)
-        user_status = cls.objects.get(user=user)
+        user_status = cls.get_for_user(user)
         user_status.secondary_email = secondary_email
-        user_status.save(update_fields=["secondary_email"])
+        user_status.save_and_bump_version(update_fields=["secondary_email"])
 
     @classmethod
     def unarchive(cls, user):
         if user.status.archived is True:
             user.status.archived = False
-            user.status.save()
+            user.status.archived_at = None
+            user.status.save_and_bump_version()
+            _update_user_counters(user.pk, archived=-1)
 
     @classmethod
     def archive(cls, user):
-        user_status = cls.objects.get(user=user)
+        user_status = cls.get_for_user(user)
         if user_status.archived is False:
             user_status.archived = True
-            user_status.save(update_fields=["archived"])
+            user_status.archived_at = timezone.now()
+            user_status.save_and_bump_version(update_fields=["archived", "archived_at"])
+            _update_user_counters(user.pk, archived=1)
+
+    @classmethod
+    def deactivate(cls, user):
+        """
+        Set `user.is_active=False` (soft delete), keeping the time for the retention
+        policies in `deactivated_at` (cleared when the user is saved active again).
+        """
+        user.is_active = False
+        now = timezone.now()
+        if status_on_user_model():
+            user.status.deactivated_at = now
+            user.status.save_and_bump_version(
+                update_fields=["is_active", "deactivated_at"]
+            )
+            return
+        user.save(update_fields=["is_active"])
+        UserStatus.objects.filter(user=user).update(
+            deactivated_at=now, version=models.F("version") + 1
+        )
+        status = UserStatus._meta.get_field("user").remote_field.get_cached_value(
+            user, default=None
+        )
+        if status is not None:
+            status.deactivated_at = now
+            # the new version is read from the database on access
+            vars(status).pop("version", None)
 
     def swap_emails(self):
         if not self.secondary_email:
@@ -162,11 +329,211 @@ class UserStatus(models.Model):
             setattr(self.user, EMAIL_FIELD, self.secondary_email)
             self.secondary_email = primary
             self.user.save(update_fields=[EMAIL_FIELD])
-            self.save(update_fields=["secondary_email"])
+            self.save_and_bump_version(update_fields=["secondary_email"])
 
     def remove_secondary_email(self):
         if not self.secondary_email:
             raise WrongUsageError
         with transaction.atomic():
             self.secondary_email = None
-            self.save(update_fields=["secondary_email"])
+            self.save_and_bump_version(update_fields=["secondary_email"])
+
+
+def _update_user_counters(shard_key: int, **deltas: int) -> None:
+    # graphql_auth.counters imports the models
+    from .counters import update_user_counters
+
+    update_user_counters(shard_key, **deltas)
+
+
+def bump_version(user) -> None:
+    """
+    Bump the version of the user (e.g. `me`), to call on changes
+    of the user made out of the mutations of the package.
+    """
+    if status_on_user_model():
+        UserModel._default_manager.filter(pk=user.pk).update(
+            version=models.F("version") + 1
+        )
+        vars(user).pop("version", None)
+    else:
+        UserStatus.objects.filter(user=user).update(version=models.F("version") + 1)
+        status = UserStatus._meta.get_field("user").remote_field.get_cached_value(
+            user, default=None
+        )
+        if status is not None:
+            vars(status).pop("version", None)
+    invalidate_users_cache(on_commit=True)
+
+
+def _user_field(name):
+    return property(
+        lambda self: getattr(self.user, name),
+        lambda self, value: setattr(self.user, name, value),
+    )
+
+
+class UserStatusFacade:
+    """
+    `user.status` when the status fields are on the user model
+    (see `graphql_auth.status.UserStatusFieldsMixin`).
+
+    It reads and saves the status fields of the user and has
+    the methods of `UserStatus`, so no other table is queried.
+    """
+
+    __slots__ = ("user",)
+
+    def __init__(self, user):
+        self.user = user
+
+    def __getattr__(self, name):
+        if name not in vars(UserStatus):
+            raise AttributeError(
+                "%r object has no attribute %r" % (type(self).__name__, name)
+            )
+        value = getattr(UserStatus, name)
+        if isinstance(value, types.FunctionType):
+            return types.MethodType(value, self)
+        return value
+
+    def __eq__(self, other):
+        return isinstance(other, UserStatusFacade) and other.user == self.user
+
+    def __hash__(self):
+        return hash(self.user)
+
+    def __str__(self):
+        return "%s - status" % (self.user)
+
+    @property
+    def pk(self):
+        return self.user.pk
+
+    @property
+    def user_id(self):
+        return self.user.pk
+
+    @property
+    def _state(self):
+        return self.user._state
+
+    verified = _user_field("verified")
+    archived = _user_field("archived")
+    secondary_email = _user_field("secondary_email")
+    archived_at = _user_field("archived_at")
+    deactivated_at = _user_field("deactivated_at")
+    registered_at = _user_field("registered_at")
+    version = _user_field("version")
+
+    def save(self, *args, **kwargs):
+        self.user.save(*args, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None):
+        self.user.refresh_from_db(using=using, fields=fields or STATUS_FIELDS)
+
+
+class UserStatusDescriptor:
+    """
+    `user.status` returning a `UserStatusFacade`, installed on the user model
+    in place of the `UserStatus` relation when the status fields are on the user model.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return UserStatusFacade(instance)
+
+
+class EmailOutbox(models.Model):
+    """
+    Email of a `UserStatus` method, written in the transaction of the mutation
+    and sent once it commits, see the `EMAIL_OUTBOX` setting and `graphql_auth.outbox`.
+    """
+
+    PENDING, SENT, FAILED = 0, 1, 2
+    STATUS_CHOICES = ((PENDING, "pending"), (SENT, "sent"), (FAILED, "failed"))
+
+    user = models.ForeignKey(
+        django_settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    method = models.CharField(max_length=64)
+    args = models.JSONField(default=list, blank=True)
+    domain = models.CharField(max_length=255)
+    secure = models.BooleanField(default=False)
+    idempotency_key = models.CharField(max_length=255)
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES, default=PENDING)
+    # of the lane of the email, lower is sent first
+    priority = models.PositiveSmallIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        constraints = [
+            # one pending email per key, repeated requests are dropped until it is sent
+            models.UniqueConstraint(
+                fields=["idempotency_key"],
+                condition=models.Q(status=0),
+                name="graphql_auth_emailoutbox_pending_key",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["status", "priority", "next_attempt_at"],
+                name="graphql_auth_emailoutbox_lane",
+            ),
+        ]
+
+    def __str__(self):
+        return "%s - %s" % (self.method, self.idempotency_key)
+
+
+class UserSearchGram(models.Model):
+    """
+    Trigram of the value of a user field of `USER_SEARCH_FIELDS`,
+    see `graphql_auth.search`.
+    """
+
+    user = models.ForeignKey(
+        django_settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+"
+    )
+    field = models.CharField(max_length=64)
+    gram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "field", "gram"], name="graphql_auth_search_unique"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["field", "gram", "user"], name="graphql_auth_search_gram"
+            ),
+        ]
+
+    def __str__(self):
+        return "%s - %s" % (self.field, self.gram)
+
+
+class UserCounter(models.Model):
+    """
+    Shard of a counter of the users, see `USER_COUNTERS` and `graphql_auth.counters`.
+    """
+
+    name = models.CharField(max_length=32)
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "shard"], name="graphql_auth_usercounter_unique"
+            ),
+        ]
+
+    def __str__(self):
+        return "%s[%s] = %s" % (self.name, self.shard, self.value)
@@ -0,0 +1,222 @@
+"""
+Transactional outbox of the emails, see the `EMAIL_OUTBOX` setting.
+
+The mutations write an `EmailOutbox` row in their transaction instead of talking
+to the mail server, so a slow or failing mail server neither holds the transaction
+open nor rolls back a valid registration. Once the transaction commits, the row is
+handed to the `EMAIL_ASYNC_TASK` (`EMAIL_OUTBOX_DISPATCH_ON_COMMIT`) or left to the
+`send_outbox_emails` worker, which also retries failed emails with exponential backoff.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+
+from django.core.mail import get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db import connection as db_connection
+from django.utils import timezone
+
+from .exceptions import EmailAlreadyInUseError, UserAlreadyVerifiedError
+from .lanes import EMAIL_METHOD_ACTIONS, Lane, get_lane
+from .models import EmailOutbox, UserStatus
+from .settings import graphql_auth_settings as app_settings
+from .shortcuts import async_email_func
+from .utils import EmailInfo
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DispatchResult:
+    sent: int = 0
+    # failed, to retry later
+    retried: int = 0
+    # failed for the last time
+    failed: int = 0
+    seconds: float = 0.0
+
+
+def get_idempotency_key(user, method: str, args: list) -> str:
+    """
+    Key of an email, the same for repeated requests of the same email.
+    """
+    payload = json.dumps([method, str(user.pk), args], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _check_email(user, method: str, args: list) -> None:
+    # fail the mutation like sending right away would
+    if method == "resend_activation_email" and user.status.verified:
+        raise UserAlreadyVerifiedError
+    if method == "send_secondary_email_activation" and not UserStatus.email_is_free(
+        args[0]
+    ):
+        raise EmailAlreadyInUseError
+
+
+def enqueue_email(
+    user, method: str, info, *args, idempotency_key: str | None = None
+) -> EmailOutbox | None:
+    """
+    Write the email of the `UserStatus` method `method` to the outbox, to be sent
+    with `args` once the current transaction commits. Returns `None` if an email
+    with the same idempotency key is already pending.
+    """
+    args = list(args)
+    _check_email(user, method, args)
+    request = info.context
+    email = EmailOutbox(
+        user=user,
+        method=method,
+        args=args,
+        domain=request.get_host(),
+        secure=request.is_secure(),
+        idempotency_key=idempotency_key or get_idempotency_key(user, method, args),
+        priority=get_lane(EMAIL_METHOD_ACTIONS.get(method)).priority,
+    )
+    try:
+        with transaction.atomic():
+            email.save(force_insert=True)
+    except IntegrityError:
+        return None
+    if app_settings.EMAIL_OUTBOX_DISPATCH_ON_COMMIT and async_email_func:
+        # never sent in the request, which would wait on the mail server
+        transaction.on_commit(partial(_dispatch_on_commit, email.pk, method))
+    return email
+
+
+def send_outbox_email(pk: int, method: str, connection=None) -> DispatchResult:
+    """
+    Send the outbox email `pk`, the `EMAIL_ASYNC_TASK` job of the outbox
+    (`method` tags the job with the lane of the email).
+    """
+    return dispatch_emails([pk], connection=connection)
+
+
+def _dispatch_on_commit(pk: int, method: str) -> None:
+    try:
+        async_email_func(send_outbox_email, (pk, method))
+    except Exception:
+        # the row stays pending for the send_outbox_emails worker,
+        # the committed mutation must not fail because of it
+        logger.exception("Failed to dispatch the outbox email %s", pk)
+
+
+def get_retry_delay(attempts: int) -> timedelta:
+    return app_settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def _lock_due_emails(
+    pks: list | None, lanes: list[Lane] | None, batch_size: int, now: datetime
+) -> list[EmailOutbox]:
+    queryset = EmailOutbox.objects.filter(
+        status=EmailOutbox.PENDING, next_attempt_at__lte=now
+    )
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    if lanes is not None:
+        methods = [
+            method
+            for method, action in EMAIL_METHOD_ACTIONS.items()
+            if get_lane(action) in lanes
+        ]
+        queryset = queryset.filter(method__in=methods)
+    if db_connection.features.has_select_for_update_skip_locked:
+        # concurrent workers each take other rows, so an email is sent once
+        queryset = queryset.select_for_update(skip_locked=True, of=("self",))
+    return list(
+        queryset.select_related("user").order_by("priority", "next_attempt_at", "pk")[
+            :batch_size
+        ]
+    )
+
+
+def _claim_due_emails(
+    pks: list | None, lanes: list[Lane] | None, batch_size: int, now: datetime
+):
+    """
+    Take a batch of due emails in a short transaction,
+    returning them and the number of rows read.
+
+    Each email is claimed with a conditional UPDATE of its attempts (left pending,
+    and not due again until its retry delay), so without `skip_locked` two dispatchers
+    reading the same row do not both send it, and an email claimed by a crashed worker
+    is retried.
+    """
+    with transaction.atomic():
+        emails = _lock_due_emails(pks, lanes, batch_size, now)
+        claimed = []
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt_at = now + get_retry_delay(email.attempts)
+            taken = EmailOutbox.objects.filter(
+                pk=email.pk, status=EmailOutbox.PENDING, attempts=email.attempts - 1
+            ).update(attempts=F("attempts") + 1, next_attempt_at=email.next_attempt_at)
+            if taken:
+                claimed.append(email)
+    return claimed, len(emails)
+
+
+def _send(email: EmailOutbox, mail_connection) -> None:
+    send = getattr(email.user.status, email.method)
+    send(EmailInfo(email.domain, email.secure), *email.args, connection=mail_connection)
+
+
+def dispatch_emails(
+    pks: list | None = None,
+    batch_size: int | None = None,
+    connection=None,
+    lanes: list[Lane] | None = None,
+) -> DispatchResult:
+    """
+    Send the pending emails that are due (only those of `pks` or of `lanes` if given)
+    by lane priority, in batches over one mail connection (`connection`, or a new one
+    of the `EMAIL_BACKEND` per batch). The emails of a batch are claimed in a short
+    transaction and sent outside of it, so a slow mail server holds no lock.
+    """
+    batch_size = batch_size or app_settings.EMAIL_OUTBOX_BATCH_SIZE
+    result = DispatchResult()
+    started = time.perf_counter()
+    while True:
+        emails, read = _claim_due_emails(pks, lanes, batch_size, timezone.now())
+        if not read:
+            break
+        mail_connection = connection or get_connection()
+        for email in emails:
+            try:
+                _send(email, mail_connection)
+            except Exception as error:
+                email.last_error = "%s: %s" % (type(error).__name__, error)
+                permanent = isinstance(
+                    error, (UserAlreadyVerifiedError, EmailAlreadyInUseError)
+                )
+                if (
+                    permanent
+                    or email.attempts >= app_settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+                ):
+                    email.status = EmailOutbox.FAILED
+                    result.failed += 1
+                else:
+                    email.next_attempt_at = timezone.now() + get_retry_delay(
+                        email.attempts
+                    )
+                    result.retried += 1
+            else:
+                email.status = EmailOutbox.SENT
+                email.sent_at = timezone.now()
+                result.sent += 1
+        if connection is None:
+            mail_connection.close()
+        EmailOutbox.objects.bulk_update(
+            emails, ["status", "next_attempt_at", "sent_at", "last_error"]
+        )
+        if read < batch_size:
+            break
+    result.seconds = time.perf_counter() - started
+    return result
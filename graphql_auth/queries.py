@@ -1,20 +1,111 @@
+from functools import partial
 from typing import Any
 
 import graphene
 from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from django_filters import FilterSet
+from graphene.utils.str_converters import to_camel_case
+from graphql import FieldNode, FragmentSpreadNode, get_named_type
 from graphene_django.filter.fields import DjangoFilterConnectionField
 from graphene_django.types import DjangoObjectType
+from graphene_django.utils import maybe_queryset
 
+from .cache import get_page_cache_key, get_users_cache
 from .connection import CountableConnection
+from .counters import get_user_stats
+from .rows import UserRow, get_user_rows
+from .search import SEARCH_LOOKUPS, search_users
 from .settings import graphql_auth_settings as app_settings
+from .status import select_status, status_on_user_model
 
 UserModel = get_user_model()
 
+PAGE_INFO_FIELDS = ('has_next_page', 'has_previous_page', 'start_cursor', 'end_cursor')
+
+# `UserNode` fields resolved from the status
+STATUS_NODE_FIELDS = ("archived", "verified", "secondary_email", "version")
+
+
+def get_user_filterset_class() -> type[FilterSet]:
+    """
+    FilterSet of `USER_NODE_FILTER_FIELDS`, with the `icontains` / `istartswith` filters
+    going through the search index of `USER_SEARCH_FIELDS` (see `graphql_auth.search`).
+    When the status fields are on the user model, the `status__<field>` filters
+    (e.g. `status_Verified`) are kept and filter the user fields.
+    """
+    filter_fields = app_settings.USER_NODE_FILTER_FIELDS
+    if not isinstance(filter_fields, dict):
+        filter_fields = dict.fromkeys(filter_fields, ['exact'])
+    fields, declared_filters = {}, {}
+    for lookup, lookup_exprs in filter_fields.items():
+        on_status = lookup.startswith('status__')
+        if on_status and not status_on_user_model():
+            fields[lookup] = lookup_exprs
+            continue
+        field_name = lookup[len('status__') :] if on_status else lookup
+        for lookup_expr in lookup_exprs:
+            if not on_status and lookup_expr not in SEARCH_LOOKUPS:
+                fields.setdefault(lookup, []).append(lookup_expr)
+                continue
+            name = (
+                lookup if lookup_expr == 'exact' else '%s__%s' % (lookup, lookup_expr)
+            )
+            declared_filters[name] = FilterSet.filter_for_field(
+                UserModel._meta.get_field(field_name), field_name, lookup_expr
+            )
+            if lookup_expr in SEARCH_LOOKUPS:
+                declared_filters[name].method = partial(
+                    search_users, lookup_expr=lookup_expr
+                )
+    meta = type('Meta', (), {'model': UserModel, 'fields': fields})
+    return type('UserFilterSet', (FilterSet,), {'Meta': meta, **declared_filters})
+
+
+def _collect_fields(selection_sets, fragments) -> dict[str, list[FieldNode]]:
+    fields: dict[str, list[FieldNode]] = {}
+    for selection_set in selection_sets:
+        if selection_set is None:
+            continue
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                fields.setdefault(selection.name.value, []).append(selection)
+                continue
+            fragment = (
+                fragments[selection.name.value]
+                if isinstance(selection, FragmentSpreadNode)
+                else selection
+            )
+            for name, nodes in _collect_fields(
+                [fragment.selection_set], fragments
+            ).items():
+                fields.setdefault(name, []).extend(nodes)
+    return fields
+
+
+def get_selected_fields(info, node_type: str) -> set[str]:
+    """
+    Names of the fields of `node_type` selected under the field of `info`, returning
+    `node_type` or a connection of it (through its `edges { node }`).
+    """
+    fields = _collect_fields(
+        [node.selection_set for node in info.field_nodes], info.fragments
+    )
+    if get_named_type(info.return_type).name != node_type:
+        edges = _collect_fields(
+            [node.selection_set for node in fields.get("edges", [])], info.fragments
+        )
+        fields = _collect_fields(
+            [node.selection_set for node in edges.get("node", [])], info.fragments
+        )
+    return set(fields)
+
 
 class UserNode(DjangoObjectType):
     class Meta:
         model = UserModel
-        filter_fields = app_settings.USER_NODE_FILTER_FIELDS
+        filterset_class = get_user_filterset_class()
         exclude = app_settings.USER_NODE_EXCLUDE_FIELDS
         interfaces = (graphene.relay.Node,)
         connection_class = CountableConnection
@@ -23,6 +114,7 @@ class UserNode(DjangoObjectType):
     archived = graphene.Boolean()
     verified = graphene.Boolean()
     secondary_email = graphene.String()
+    version = graphene.Int()
 
     def resolve_pk(self, info):
         return self.pk
@@ -36,9 +128,71 @@ class UserNode(DjangoObjectType):
     def resolve_secondary_email(self, info):
         return self.status.secondary_email  # type: ignore
 
+    def resolve_version(self, info):
+        return self.status.version  # type: ignore
+
+    @classmethod
+    def is_type_of(cls, root, info):
+        if isinstance(root, UserRow):
+            return True
+        return super().is_type_of(root, info)
+
+    @classmethod
+    def get_only_fields(
+        cls, selected: set[str], columns_only: bool = False
+    ) -> tuple[list[str], list[str]] | None:
+        """
+        The user and status fields needed to resolve the `selected` fields,
+        or `None` if a field is not resolved from the columns of the user
+        (or is a relation, with `columns_only`).
+        """
+        names = {to_camel_case(name): name for name in cls._meta.fields}
+        user_fields, status_fields = [], []
+        for graphql_name in selected:
+            name = names.get(graphql_name, graphql_name)
+            if name in ("id", "pk", "__typename"):
+                continue
+            if name in STATUS_NODE_FIELDS:
+                status_fields.append(name)
+                continue
+            try:
+                field = UserModel._meta.get_field(name)
+            except FieldDoesNotExist:
+                # a custom field, which may read any column
+                return None
+            if columns_only and field.is_relation:
+                # read through the related instances
+                return None
+            if field.concrete and not field.many_to_many:
+                user_fields.append(name)
+        return user_fields, status_fields
+
     @classmethod
     def get_queryset(cls, queryset, info):
-        return queryset.select_related('status')
+        """
+        Fetch only the columns of the selected fields, and the status if a status
+        field is selected. With `USER_NODE_ROWS`, the pages of a connection are read
+        as `UserRow`s (see `graphql_auth.rows`).
+        """
+        selected = get_selected_fields(info, cls._meta.name)
+        if (
+            app_settings.USER_NODE_ROWS
+            and get_named_type(info.return_type).name != cls._meta.name
+        ):
+            fields = cls.get_only_fields(selected, columns_only=True)
+            if fields is not None:
+                return get_user_rows(queryset, *fields)
+        fields = cls.get_only_fields(selected)
+        if fields is None:
+            return select_status(queryset)
+        user_fields, status_fields = fields
+        if status_on_user_model():
+            return queryset.only(*user_fields, *status_fields)
+        if status_fields:
+            queryset = queryset.select_related("status")
+        return queryset.only(
+            *user_fields, *("status__%s" % name for name in status_fields)
+        )
 
     @classmethod
     def get_node(cls, info, id) -> Any:
@@ -51,9 +205,65 @@ class UserNode(DjangoObjectType):
         return None
 
 
+class UserConnectionField(DjangoFilterConnectionField):
+    """
+    Connection caching its pages as primary keys when `USERS_CACHE_TIMEOUT` is set,
+    see `graphql_auth.cache`.
+    """
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        iterable = maybe_queryset(iterable)
+        timeout = app_settings.USERS_CACHE_TIMEOUT
+        if (
+            timeout is None
+            or not isinstance(iterable, QuerySet)
+            or iterable.query.is_empty()
+        ):
+            return super().resolve_connection(connection, args, iterable, max_limit)
+        cache = get_users_cache()
+        key = get_page_cache_key(iterable, args, max_limit)
+        page = cache.get(key)
+        if page is None:
+            result = super().resolve_connection(connection, args, iterable, max_limit)
+            page = {
+                'pks': [edge.node.pk for edge in result.edges],
+                'cursors': [edge.cursor for edge in result.edges],
+                'page_info': {
+                    name: getattr(result.page_info, name) for name in PAGE_INFO_FIELDS
+                },
+                'length': result.length,
+            }
+            cache.set(key, page, timeout.total_seconds())
+            return result
+        users = iterable.in_bulk(page['pks'])
+        result = connection(
+            edges=[
+                connection.Edge(node=users[pk], cursor=cursor)
+                for pk, cursor in zip(page['pks'], page['cursors'])
+                if pk in users
+            ],
+            page_info=graphene.relay.PageInfo(**page['page_info']),
+        )
+        result.iterable = iterable
+        result.length = page['length']
+        return result
+
+
+class UserStats(graphene.ObjectType):
+    total = graphene.Int()
+    verified = graphene.Int()
+    unverified = graphene.Int()
+    archived = graphene.Int()
+
+    def resolve_unverified(self, info):
+        return self.total - self.verified
+
+
 class UserQuery(graphene.ObjectType):
     user = graphene.relay.Node.Field(UserNode)
-    users = DjangoFilterConnectionField(UserNode)
+    users = UserConnectionField(UserNode)
+    user_stats = graphene.Field(UserStats)
 
     def resolve_users(self, info, **kwargs):
         """
@@ -64,12 +274,41 @@ class UserQuery(graphene.ObjectType):
             return UserModel.objects.all()
         return UserModel.objects.none()
 
+    def resolve_user_stats(self, info):
+        """
+        Allows only staff users to get the counts of users,
+        see the `USER_COUNTERS` setting.
+        """
+        user = info.context.user
+        if user.is_authenticated and user.is_staff:
+            return UserStats(**get_user_stats())
+        return None
+
+
+class MeIfModified(graphene.ObjectType):
+    not_modified = graphene.Boolean()
+    version = graphene.Int()
+    user = graphene.Field(UserNode)
+
 
 class MeQuery(graphene.ObjectType):
     me = graphene.Field(UserNode)
+    me_if_modified = graphene.Field(MeIfModified, version=graphene.Int())
 
     def resolve_me(self, info):
         user = info.context.user
         if user.is_authenticated:
             return user
         return None
+
+    def resolve_me_if_modified(self, info, version=None):
+        """
+        The user, or only `notModified` if its version is still `version`.
+        """
+        user = info.context.user
+        if not user.is_authenticated:
+            return None
+        current = user.status.version
+        if current == version:
+            return MeIfModified(not_modified=True, version=current)
+        return MeIfModified(not_modified=False, version=current, user=user)
@@ -0,0 +1,237 @@
+"""
+Retention of archived and deactivated users, see the `RETENTION_POLICIES` setting,
+and expiration of unverified users, see `UNVERIFIED_USER_EXPIRATION`.
+"""
+
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .cache import invalidate_users_cache
+from .counters import collect_counter_updates, update_user_counters
+from .models import UserStatus
+from .settings import graphql_auth_settings as app_settings
+from .signals import unverified_users_expired, users_purged
+from .status import status_lookup, status_on_user_model
+from .utils import using_refresh_tokens
+
+UserModel = get_user_model()
+
+
+@dataclass
+class PurgeResult:
+    # users deleted (or to delete on dry run) per policy
+    deleted: dict[str, int] = field(default_factory=dict)
+    batches: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class SweepResult:
+    # users deleted or archived (or to delete / archive on dry run)
+    count: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+
+def get_policy_queryset(
+    policy: str, age: timedelta, now: datetime | None = None
+) -> models.QuerySet:
+    """
+    Users to delete by the `archived` or `deactivated` policy: archived (or deactivated)
+    for longer than `age`, filtered on the indexed `archived_at` (or `deactivated_at`).
+    """
+    deadline = (now or timezone.now()) - age
+    if policy == "archived":
+        lookups = {
+            status_lookup("archived"): True,
+            status_lookup("archived_at") + "__lt": deadline,
+        }
+    elif policy == "deactivated":
+        lookups = {
+            "is_active": False,
+            status_lookup("deactivated_at") + "__lt": deadline,
+        }
+    else:
+        raise ValueError("Unknown retention policy: %s" % policy)
+    return UserModel._default_manager.filter(**lookups)
+
+
+def stamp_deactivated_users(now: datetime | None = None) -> int:
+    """
+    Set `deactivated_at` of the deactivated users without one (deactivated out of
+    `DeleteAccount`, e.g. in the admin, or before the retention policies) with one
+    UPDATE, starting their retention period. Returns the number of users stamped.
+    """
+    now = now or timezone.now()
+    if status_on_user_model():
+        queryset = UserModel._default_manager.filter(
+            is_active=False, deactivated_at__isnull=True
+        )
+    else:
+        queryset = UserStatus.objects.filter(
+            user__is_active=False, deactivated_at__isnull=True
+        )
+    return queryset.update(deactivated_at=now)
+
+
+def delete_users(pks: list) -> None:
+    """
+    Delete users by pk with their refresh tokens and status,
+    with one DELETE per table instead of collecting the related rows per user,
+    updating the counters and dropping the cached pages of the users connection once.
+    """
+    with transaction.atomic(), collect_counter_updates(pks[0]):
+        if using_refresh_tokens():
+            from graphql_jwt.refresh_token.utils import get_refresh_token_model
+
+            get_refresh_token_model()._default_manager.filter(user_id__in=pks).delete()
+        if not status_on_user_model():
+            UserStatus.objects.filter(user_id__in=pks).delete()
+        UserModel._default_manager.filter(pk__in=pks).delete()
+        invalidate_users_cache(on_commit=True)
+
+
+def purge_users(
+    policies: dict[str, timedelta] | None = None,
+    batch_size: int | None = None,
+    pause: float | None = None,
+    dry_run: bool = False,
+) -> PurgeResult:
+    """
+    Delete the users matching the retention policies (`RETENTION_POLICIES` by default)
+    in batches of `batch_size` users, each in its own transaction and followed by
+    a `pause` (in seconds) so other queries are not locked out. `users_purged`
+    is sent after each batch. Deactivated users without `deactivated_at` are
+    stamped first, so they are deleted by a later run.
+    """
+    policies = app_settings.RETENTION_POLICIES if policies is None else policies
+    batch_size = batch_size or app_settings.RETENTION_BATCH_SIZE
+    pause = app_settings.RETENTION_BATCH_PAUSE if pause is None else pause
+    result = PurgeResult()
+    started = time.perf_counter()
+    now = timezone.now()
+    if "deactivated" in policies and not dry_run:
+        stamp_deactivated_users(now)
+    for policy, age in policies.items():
+        queryset = get_policy_queryset(policy, age, now)
+        if dry_run:
+            result.deleted[policy] = queryset.count()
+            continue
+        result.deleted[policy] = 0
+        while True:
+            pks = list(
+                queryset.order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            delete_users(pks)
+            users_purged.send(sender=UserStatus, policy=policy, user_pks=pks)
+            result.deleted[policy] += len(pks)
+            result.batches += 1
+            if len(pks) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def get_unverified_queryset(
+    age: timedelta, action: str = "delete", now: datetime | None = None
+) -> models.QuerySet:
+    """
+    Users not verified `age` after registering, filtered on the indexed `registered_at`.
+    Staff and superusers (e.g. from `createsuperuser`, never verified) are left alone,
+    as are already archived users when archiving.
+    """
+    lookups = {
+        status_lookup("verified"): False,
+        status_lookup("registered_at") + "__lt": (now or timezone.now()) - age,
+    }
+    if action == "archive":
+        lookups[status_lookup("archived")] = False
+    queryset = UserModel._default_manager.filter(**lookups)
+    for flag in ("is_staff", "is_superuser"):
+        if any(
+            model_field.name == flag for model_field in UserModel._meta.concrete_fields
+        ):
+            queryset = queryset.exclude(**{flag: True})
+    return queryset
+
+
+def archive_users(pks: list, now: datetime | None = None) -> None:
+    """
+    Archive users by pk with one UPDATE.
+    """
+    values = {
+        "archived": True,
+        "archived_at": now or timezone.now(),
+        "version": models.F("version") + 1,
+    }
+    if status_on_user_model():
+        archived = UserModel._default_manager.filter(pk__in=pks).update(**values)
+    else:
+        archived = UserStatus.objects.filter(user_id__in=pks).update(**values)
+    update_user_counters(pks[0], archived=archived)
+    invalidate_users_cache(on_commit=True)
+
+
+def _lock_batch(queryset: models.QuerySet, batch_size: int) -> list:
+    # skip the rows locked by another node sweeping at the same time,
+    # where supported (SQLite has no row locks but serializes writes)
+    if connection.features.has_select_for_update_skip_locked:
+        queryset = queryset.select_for_update(skip_locked=True, of=("self",))
+    return list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+
+
+def expire_unverified_users(
+    age: timedelta | None = None,
+    action: str | None = None,
+    batch_size: int | None = None,
+    pause: float | None = None,
+    dry_run: bool = False,
+) -> SweepResult:
+    """
+    Delete (or archive) the users still not verified `age` after registering
+    (`UNVERIFIED_USER_EXPIRATION` by default), so they stop holding their email
+    and username. Runs in batches of `batch_size` users, each locked, processed and
+    committed in its own transaction, so several nodes can sweep concurrently.
+    `unverified_users_expired` is sent after each batch.
+    """
+    age = app_settings.UNVERIFIED_USER_EXPIRATION if age is None else age
+    action = action or app_settings.UNVERIFIED_USER_EXPIRATION_ACTION
+    batch_size = batch_size or app_settings.RETENTION_BATCH_SIZE
+    pause = app_settings.RETENTION_BATCH_PAUSE if pause is None else pause
+    if action not in ("delete", "archive"):
+        raise ValueError("Unknown action: %s" % action)
+    result = SweepResult()
+    if age is None:
+        return result
+    started = time.perf_counter()
+    now = timezone.now()
+    queryset = get_unverified_queryset(age, action, now)
+    if dry_run:
+        result.count = queryset.count()
+    while not dry_run:
+        with transaction.atomic():
+            pks = _lock_batch(queryset, batch_size)
+            if not pks:
+                break
+            if action == "delete":
+                delete_users(pks)
+            else:
+                archive_users(pks, now)
+        unverified_users_expired.send(sender=UserStatus, action=action, user_pks=pks)
+        result.count += len(pks)
+        result.batches += 1
+        if len(pks) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,68 @@
+"""
+Lightweight rows of the pages of the `users` connection,
+see the `USER_NODE_ROWS` setting.
+
+Building a model instance per user (`__init__`, `post_init`, `_state`, the `__dict__`
+of every field) dominates large pages. With the setting, the connection reads the
+selected columns (and status columns) with `values_list`, and yields each row as a
+`UserRow`: a tuple with named fields and no `__dict__`, which the `UserNode` resolvers
+read like a user (`row.username`, `row.pk`, `row.status.verified`).
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db.models import QuerySet
+from django.db.models.query import ValuesListIterable
+
+from .status import status_on_user_model
+
+
+class UserRow:
+    """
+    Read-only view of the selected columns of a user and its status.
+    """
+
+    __slots__ = ()
+
+    @property
+    def status(self):
+        # the status columns are read with the user
+        return self
+
+
+@lru_cache
+def get_row_class(names: tuple[str, ...]) -> type[UserRow]:
+    """
+    `UserRow` class of the rows of `names` (e.g. `status__verified` read as `verified`).
+    """
+    names = tuple(name.rpartition("__")[2] for name in names)
+    return type("UserRow", (namedtuple("UserRow", names), UserRow), {"__slots__": ()})
+
+
+class UserRowIterable(ValuesListIterable):
+    """
+    Iterable of a `values_list` queryset yielding a `UserRow` for each row.
+    """
+
+    def __iter__(self):
+        row_class = get_row_class(self.queryset._fields)
+        new = tuple.__new__
+        for row in super().__iter__():
+            yield new(row_class, row)
+
+
+def get_user_rows(
+    queryset: QuerySet, user_fields: list[str], status_fields: list[str]
+) -> QuerySet:
+    """
+    `queryset` yielding the `user_fields` and `status_fields` (and `pk`)
+    of the users as `UserRow`s.
+    Still a queryset, which can be filtered, counted and sliced.
+    """
+    if not status_on_user_model():
+        status_fields = ["status__%s" % name for name in status_fields]
+    queryset = queryset.values_list("pk", *dict.fromkeys(user_fields), *status_fields)
+    # like `values_list(named=True)`, with the rows understood by `UserNode`
+    queryset._iterable_class = UserRowIterable
+    return queryset
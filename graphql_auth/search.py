@@ -0,0 +1,132 @@
+"""
+Trigram search index of the user fields of the `USER_SEARCH_FIELDS` setting.
+
+The `icontains` / `istartswith` filters of `UserNode` are `UPPER(field) LIKE '%X%'`,
+which no B-tree index serves. The trigrams of the upper cased values are stored in
+`UserSearchGram` (maintained on save), so these filters first look up the users having
+every trigram of the searched value in its index, and only check the `LIKE` on them.
+The trigrams are computed in Python, the same way on every database (SQLite included).
+
+The users created or changed without `post_save` (`bulk_create`, `QuerySet.update`...)
+are indexed by `index_users` or the `rebuild_user_search_index` command.
+"""
+
+import time
+from dataclasses import dataclass
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, QuerySet
+
+from .models import UserSearchGram
+from .settings import graphql_auth_settings as app_settings
+
+UserModel = get_user_model()
+
+# pads the values, so their first trigrams only match the prefix searches
+START = "\x02"
+
+SEARCH_LOOKUPS = ("icontains", "istartswith")
+
+
+@dataclass
+class RebuildResult:
+    users: int = 0
+    grams: int = 0
+    seconds: float = 0.0
+
+
+def get_grams(value: str, prefix: bool = False) -> set[str]:
+    """
+    Trigrams of `value`, with the padded ones of its start if `prefix`
+    (always indexed, matched by `istartswith`).
+    """
+    value = value.upper()
+    if prefix:
+        value = START * 2 + value
+    return {value[i : i + 3] for i in range(len(value) - 2)}
+
+
+def _build_grams(user_pk, field: str, value) -> list[UserSearchGram]:
+    if not value:
+        return []
+    return [
+        UserSearchGram(user_id=user_pk, field=field, gram=gram)
+        for gram in get_grams(str(value), prefix=True)
+    ]
+
+
+def index_users(users, fields: list[str] | None = None, created: bool = False) -> int:
+    """
+    (Re)index the `fields` (default `USER_SEARCH_FIELDS`) of `users`,
+    skipping the removal of their former trigrams if they were just `created`.
+
+    Returns the number of trigrams written.
+    """
+    fields = app_settings.USER_SEARCH_FIELDS if fields is None else fields
+    users = list(users)
+    if not fields or not users:
+        return 0
+    grams = [
+        gram
+        for user in users
+        for field in fields
+        for gram in _build_grams(user.pk, field, getattr(user, field))
+    ]
+    with transaction.atomic():
+        if not created:
+            UserSearchGram.objects.filter(
+                user__in=[user.pk for user in users], field__in=fields
+            ).delete()
+        UserSearchGram.objects.bulk_create(grams, batch_size=1000)
+    return len(grams)
+
+
+def rebuild_search_index(batch_size: int = 1000) -> RebuildResult:
+    """
+    Index the `USER_SEARCH_FIELDS` of all the users, in batches,
+    and remove the trigrams of the fields no longer listed.
+    """
+    fields = app_settings.USER_SEARCH_FIELDS
+    result = RebuildResult()
+    started = time.perf_counter()
+    UserSearchGram.objects.exclude(field__in=fields).delete()
+    if fields:
+        queryset = UserModel._default_manager.order_by("pk").only(*fields)
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            users = list(batch[:batch_size])
+            if not users:
+                break
+            result.grams += index_users(users, fields)
+            result.users += len(users)
+            last_pk = users[-1].pk
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def search_users(
+    queryset: QuerySet, field: str, value: str, lookup_expr: str = "icontains"
+) -> QuerySet:
+    """
+    Filter `queryset` on `<field>__<lookup_expr>=value` (`icontains` or `istartswith`),
+    through the trigram index if `field` is in `USER_SEARCH_FIELDS`.
+    """
+    if field in app_settings.USER_SEARCH_FIELDS:
+        # the values shorter than a trigram are only searched with LIKE
+        grams = get_grams(value, prefix=lookup_expr == "istartswith")
+        if len(value) > 1:
+            # implied by the next (and rarer) prefix trigram
+            grams.discard(START * 2 + value[:1].upper())
+        if grams:
+            matching = (
+                UserSearchGram.objects.filter(field=field, gram__in=grams)
+                .values("user_id")
+                .annotate(matches=Count("pk"))
+                .filter(matches=len(grams))
+                .values("user_id")
+            )
+            queryset = queryset.filter(pk__in=matching)
+    # the trigrams only narrow down the candidates
+    return queryset.filter(**{"%s__%s" % (field, lookup_expr): value})
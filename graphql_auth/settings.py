@@ -10,10 +10,13 @@ Graphene settings, checking for user settings first, then falling
 back to the defaults.
 """
 
+import threading
 from datetime import timedelta
 
 from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
 from django.test.signals import setting_changed
+from django.utils.module_loading import import_string
 
 # Copied shamelessly from Graphene / Django REST Framework
 
@@ -77,8 +80,245 @@ DEFAULTS = {
     # registration with no password
     'ALLOW_PASSWORDLESS_REGISTRATION': False,
     'SEND_PASSWORD_SET_EMAIL': False,
+    # load AUTH_PASSWORD_VALIDATORS (and the common passwords list) at startup
+    'PRELOAD_PASSWORD_VALIDATORS': True,
+    # retention: delete users archived / deactivated for longer than,
+    # e.g. {'archived': timedelta(days=365)}
+    'RETENTION_POLICIES': {},
+    'RETENTION_BATCH_SIZE': 500,
+    # seconds to sleep between two batches of deletes
+    'RETENTION_BATCH_PAUSE': 0.1,
+    # delete (or archive) users not verified this long after registering,
+    # None to keep them
+    'UNVERIFIED_USER_EXPIRATION': None,
+    'UNVERIFIED_USER_EXPIRATION_ACTION': 'delete',
+    # write the emails to the EmailOutbox table in the mutation transaction,
+    # sent once it commits
+    'EMAIL_OUTBOX': False,
+    # hand them to EMAIL_ASYNC_TASK right after the commit, without it (or with False)
+    # they are only sent by the send_outbox_emails worker
+    'EMAIL_OUTBOX_DISPATCH_ON_COMMIT': True,
+    'EMAIL_OUTBOX_MAX_ATTEMPTS': 5,
+    # delay before the first retry of a failed email, doubled on each attempt
+    'EMAIL_OUTBOX_RETRY_DELAY': timedelta(seconds=30),
+    'EMAIL_OUTBOX_BATCH_SIZE': 100,
+    # persistent SMTP connections of the asyncio sender
+    # (graphql_auth.smtp.async_email_task)
+    'EMAIL_SMTP_POOL_SIZE': 4,
+    # ResendActivationEmail / SendPasswordResetEmail requests of a user within
+    # this window do not send the email again, None to always send it
+    'EMAIL_COALESCE_WINDOW': None,
+    # alias of the Django cache holding the coalescing keys
+    'EMAIL_COALESCE_CACHE': 'default',
+    # lanes of the emails by token action: threads of graphql_auth.lanes.lane_email_task
+    # and outbox priority (lower first), emails of unlisted actions go to the last lane
+    'EMAIL_LANES': {
+        'urgent': {
+            'actions': ['password_reset', 'activation_secondary_email', 'password_set'],
+            'workers': 4,
+            'priority': 0,
+        },
+        'bulk': {'actions': ['activation'], 'workers': 2, 'priority': 1},
+    },
+    # user fields whose `icontains` / `istartswith` filters go through the trigram index
+    # of graphql_auth.search, maintained on save, e.g. ['username', 'email']
+    'USER_SEARCH_FIELDS': [],
+    # cache the pages of the users connection (as primary keys) for this long,
+    # None to disable, dropped on every save or delete of a user or status
+    # (see graphql_auth.cache)
+    'USERS_CACHE_TIMEOUT': None,
+    # alias of the Django cache holding the pages of the users connection
+    'USERS_CACHE': 'default',
+    # keep the counters of the userStats query (total, verified, archived users)
+    # in a table updated by the changes of the users, instead of counting the users
+    # on every query
+    'USER_COUNTERS': False,
+    # read the pages of the users connection as lightweight rows of the selected
+    # columns instead of model instances, when no selected field needs the model
+    # (relations, custom fields)
+    'USER_NODE_ROWS': False,
+    # import path of a graphql_auth.metrics.MetricsRegistry subclass
+    # recording the mutation metrics
+    'METRICS_REGISTRY': None,
+    # import path of an OpenTelemetry style tracer class (or factory)
+    # for spans around the auth stages
+    'TRACER': None,
+}
+
+RETENTION_POLICY_NAMES = ('archived', 'deactivated')
+
+UNVERIFIED_USER_EXPIRATION_ACTIONS = ('delete', 'archive')
+
+
+# settings holding an import path that is resolved on first access
+# of the matching attribute, e.g. `graphql_auth_settings.async_email_func`
+IMPORT_STRINGS = {
+    'EMAIL_ASYNC_TASK': 'async_email_func',
+    'CUSTOM_ERROR_TYPE': 'output_error_type',
+    'METRICS_REGISTRY': 'metrics_registry',
+    'TRACER': 'tracer',
 }
 
+# import strings of classes (or factories) resolved to an instance
+INSTANTIATED_IMPORT_STRINGS = ('METRICS_REGISTRY', 'TRACER')
+
+
+def validate_timedelta(name, value):
+    if isinstance(value, timedelta):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return timedelta(seconds=value)
+    raise ImproperlyConfigured(
+        f"GRAPHQL_AUTH['{name}'] must be a timedelta or a number of seconds."
+    )
+
+
+def validate_setting(name, value, default):
+    """
+    Check the type of a user setting against its default value,
+    returning the value normalized (e.g. seconds to timedelta).
+    """
+    if name in IMPORT_STRINGS:
+        if value in (None, False) or isinstance(value, str) or callable(value):
+            return value
+        raise ImproperlyConfigured(
+            f"GRAPHQL_AUTH['{name}'] must be an import path or a callable."
+        )
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise ImproperlyConfigured(f"GRAPHQL_AUTH['{name}'] must be a boolean.")
+        return value
+    if isinstance(default, timedelta):
+        return validate_timedelta(name, value)
+    if name in (
+        'UNVERIFIED_USER_EXPIRATION',
+        'EMAIL_COALESCE_WINDOW',
+        'USERS_CACHE_TIMEOUT',
+    ):
+        return None if value is None else validate_timedelta(name, value)
+    if (
+        name == 'UNVERIFIED_USER_EXPIRATION_ACTION'
+        and value not in UNVERIFIED_USER_EXPIRATION_ACTIONS
+    ):
+        raise ImproperlyConfigured(
+            f"GRAPHQL_AUTH['{name}'] must be one of "
+            f"{', '.join(UNVERIFIED_USER_EXPIRATION_ACTIONS)}."
+        )
+    if name == 'EMAIL_LANES':
+        if not isinstance(value, dict) or not value:
+            raise ImproperlyConfigured(
+                f"GRAPHQL_AUTH['{name}'] must be a non-empty dict of lanes."
+            )
+        for lane_name, lane in value.items():
+            if not isinstance(lane, dict) or not isinstance(
+                lane.get('actions'), (list, tuple)
+            ):
+                raise ImproperlyConfigured(
+                    f"GRAPHQL_AUTH['{name}']['{lane_name}'] must be a dict "
+                    "with a list of actions."
+                )
+            workers, priority = lane.get('workers', 1), lane.get('priority', 0)
+            if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+                raise ImproperlyConfigured(
+                    f"GRAPHQL_AUTH['{name}']['{lane_name}']['workers'] "
+                    "must be a positive integer."
+                )
+            if (
+                not isinstance(priority, int)
+                or isinstance(priority, bool)
+                or priority < 0
+            ):
+                raise ImproperlyConfigured(
+                    f"GRAPHQL_AUTH['{name}']['{lane_name}']['priority'] "
+                    "must be a positive integer."
+                )
+        return value
+    if name == 'RETENTION_POLICIES':
+        if not isinstance(value, dict) or not set(value).issubset(
+            RETENTION_POLICY_NAMES
+        ):
+            raise ImproperlyConfigured(
+                f"GRAPHQL_AUTH['{name}'] must be a dict with keys among "
+                f"{', '.join(RETENTION_POLICY_NAMES)}."
+            )
+        return {
+            key: validate_timedelta(f'{name}.{key}', age) for key, age in value.items()
+        }
+    if isinstance(default, int):
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ImproperlyConfigured(
+                f"GRAPHQL_AUTH['{name}'] must be a positive integer."
+            )
+        return value
+    if isinstance(default, float):
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0:
+            raise ImproperlyConfigured(
+                f"GRAPHQL_AUTH['{name}'] must be a positive number."
+            )
+        return float(value)
+    if name.endswith('_FIELDS') or name.endswith('_FIELDS_OPTIONAL'):
+        if isinstance(value, (list, tuple)):
+            return list(value)
+        if isinstance(value, dict):
+            return value
+        raise ImproperlyConfigured(f"GRAPHQL_AUTH['{name}'] must be a list or a dict.")
+    if isinstance(default, dict):
+        if not isinstance(value, dict):
+            raise ImproperlyConfigured(f"GRAPHQL_AUTH['{name}'] must be a dict.")
+        return value
+    if isinstance(default, str):
+        if not isinstance(value, str):
+            raise ImproperlyConfigured(f"GRAPHQL_AUTH['{name}'] must be a string.")
+        return value
+    return value
+
+
+class SettingsSnapshot(object):
+    """
+    The validated values of one version of the settings, in slots, so reading
+    a setting is a plain attribute load. Never modified once built, except to
+    cache the resolution of an import string on its first access.
+    """
+
+    __slots__ = (*DEFAULTS, *IMPORT_STRINGS.values(), 'is_async_email', '_lock')
+
+    def __init__(self, values: dict):
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(
+            f"graphql_auth settings are read-only, can not set: {attr}"
+        )
+
+    def __delattr__(self, attr):
+        raise AttributeError(
+            f"graphql_auth settings are read-only, can not delete: {attr}"
+        )
+
+    def __getattr__(self, attr):
+        # only called when the slot is empty: an import string not resolved yet
+        if attr not in IMPORT_STRINGS.values():
+            raise AttributeError(f"Invalid graphql_auth setting: {attr}")
+        setting = next(key for key, value in IMPORT_STRINGS.items() if value == attr)
+        # imported without the lock,
+        # the imported module may read the settings in another thread
+        value = getattr(self, setting)
+        if isinstance(value, str):
+            value = import_string(value)
+        elif not callable(value):
+            value = None
+        if value is not None and setting in INSTANTIATED_IMPORT_STRINGS:
+            value = value()
+        with self._lock:
+            try:
+                # resolved by another thread first, the same instance is kept
+                return object.__getattribute__(self, attr)
+            except AttributeError:
+                object.__setattr__(self, attr, value)
+                return value
+
 
 class GraphQLAuthSettings(object):
     """
@@ -86,60 +326,95 @@ class GraphQLAuthSettings(object):
     For example:
         from graphql_auth.settings import settings
         print(settings)
+
+    All settings are loaded and validated at once, on first access, into
+    a read-only `SettingsSnapshot`, which attribute access is delegated to.
+    `reload` builds a new snapshot and publishes it with a single assignment,
+    so readers see either the former settings or the new ones, never a mix.
+    Read several settings from one `snapshot` to keep them consistent.
     """
 
+    __slots__ = ('defaults', '_user_settings', '_snapshot', '_lock')
+
     def __init__(self, user_settings=None, defaults=None):
+        object.__setattr__(self, 'defaults', defaults or DEFAULTS)
+        object.__setattr__(self, '_snapshot', None)
+        object.__setattr__(self, '_lock', threading.Lock())
         if user_settings:
-            self._user_settings = user_settings
-        self.defaults = defaults or DEFAULTS
+            object.__setattr__(self, '_user_settings', user_settings)
 
     @property
     def user_settings(self):
-        if not hasattr(self, '_user_settings'):
-            self._user_settings = getattr(django_settings, 'GRAPHQL_AUTH', {})
-        return self._user_settings
+        try:
+            return self._user_settings
+        except AttributeError:
+            object.__setattr__(
+                self,
+                '_user_settings',
+                getattr(django_settings, 'GRAPHQL_AUTH', None) or {},
+            )
+            return self._user_settings
+
+    @property
+    def snapshot(self) -> SettingsSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    values = self._compile(self.user_settings)
+                    object.__setattr__(self, '_snapshot', SettingsSnapshot(values))
+                snapshot = self._snapshot
+        return snapshot
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(
+            f"graphql_auth settings are read-only, can not set: {attr}"
+        )
+
+    def __delattr__(self, attr):
+        raise AttributeError(
+            f"graphql_auth settings are read-only, can not delete: {attr}"
+        )
 
     def __getattr__(self, attr):
-        if attr not in self.defaults:
+        if attr not in self.defaults and attr not in SettingsSnapshot.__slots__:
             raise AttributeError(f"Invalid graphql_auth setting: {attr}")
+        return getattr(self.snapshot, attr)
 
-        try:
-            # Check if present in user settings
-            val = self.user_settings[attr]
-        except KeyError:
-            # Fall back to defaults
-            val = self.defaults[attr]
-
-        # Cache the result
-        setattr(self, attr, val)
-        return val
+    def _compile(self, user_settings) -> dict:
+        values = {}
+        for key, default in self.defaults.items():
+            if key in user_settings:
+                values[key] = validate_setting(key, user_settings[key], default)
+            else:
+                values[key] = default
+        email_async_task = values['EMAIL_ASYNC_TASK']
+        values['is_async_email'] = bool(
+            email_async_task
+            and (isinstance(email_async_task, str) or callable(email_async_task))
+        )
+        return values
 
-    @property
-    def is_async_email(self) -> bool:
-        try:
-            return self._is_declared_async_email
-        except AttributeError:
-            self._is_declared_async_email = bool(self.EMAIL_ASYNC_TASK and isinstance(self.EMAIL_ASYNC_TASK, str))
-            return self._is_declared_async_email
+    def reload(self, user_settings=None) -> None:
+        """
+        Validate the new settings first and only then
+        swap them in, so invalid settings leave the
+        current ones untouched.
+        """
+        user_settings = user_settings or {}
+        snapshot = SettingsSnapshot(self._compile(user_settings))
+        with self._lock:
+            object.__setattr__(self, '_user_settings', user_settings)
+            object.__setattr__(self, '_snapshot', snapshot)
 
 
 graphql_auth_settings = GraphQLAuthSettings(None, DEFAULTS)
 
 
 def reload_graphql_auth_settings(*args, **kwargs):
-    global graphql_auth_settings
     setting, value = kwargs['setting'], kwargs['value']
     if setting == 'GRAPHQL_AUTH':
-        for key in DEFAULTS.keys():
-            try:
-                delattr(graphql_auth_settings, key)
-            except AttributeError:
-                pass
-        try:
-            delattr(graphql_auth_settings, '_is_declared_async_email')
-        except AttributeError:
-            pass
-        graphql_auth_settings._user_settings = value
+        graphql_auth_settings.reload(value)
 
 
 setting_changed.connect(reload_graphql_auth_settings)
@@ -3,22 +3,27 @@ from typing import Callable
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
-from django.utils.module_loading import import_string
 
 from .settings import graphql_auth_settings as app_settings
+from .status import select_status, status_lookup
+from .tracing import traced
 from .types import ExpectedErrorType
 
 UserModel = get_user_model()
 
 
+@traced("graphql_auth.get_user_by_email")
 def get_user_by_email(email):
     """
     get user by email or by secondary email
     raise ObjectDoesNotExist
     """
     user = (
-        UserModel._default_manager.select_related('status')
-        .filter(Q(**{UserModel.EMAIL_FIELD: email}) | Q(status__secondary_email=email))  # type: ignore
+        select_status(UserModel._default_manager.all())
+        .filter(
+            Q(**{UserModel.EMAIL_FIELD: email})  # type: ignore
+            | Q(**{status_lookup('secondary_email'): email})
+        )
         .first()
     )
     if user is None:
@@ -26,6 +31,7 @@ def get_user_by_email(email):
     return user
 
 
+@traced("graphql_auth.get_user_to_login")
 def get_user_to_login(**kwargs):
     """
     get user by kwargs or secondary email
@@ -35,10 +41,14 @@ def get_user_to_login(**kwargs):
     if 'email' in kwargs.keys():
         lookup_filter = Q(email=kwargs['email'])
         if app_settings.ALLOW_LOGIN_WITH_SECONDARY_EMAIL:
-            lookup_filter |= Q(status__secondary_email=kwargs['email'])
-        user = UserModel._default_manager.select_related('status').filter(lookup_filter).first()
+            lookup_filter |= Q(**{status_lookup('secondary_email'): kwargs['email']})
+        user = (
+            select_status(UserModel._default_manager.all())
+            .filter(lookup_filter)
+            .first()
+        )
     else:
-        user = UserModel._default_manager.select_related('status').filter(**kwargs).first()
+        user = select_status(UserModel._default_manager.all()).filter(**kwargs).first()
     if user:
         return user
     else:
@@ -46,19 +56,35 @@ def get_user_to_login(**kwargs):
 
 
 def get_async_email_func() -> Callable | None:
-    if app_settings.is_async_email:
-        return import_string(app_settings.EMAIL_ASYNC_TASK)
-    return None
+    return app_settings.async_email_func
 
 
-async_email_func = get_async_email_func()
+class LazyAsyncEmailFunc:
+    """
+    Proxy of the `EMAIL_ASYNC_TASK` function, imported
+    on first use instead of at import time.
+
+    It is falsy when no async email task is configured.
+    """
+
+    __slots__ = ()
+
+    def __bool__(self) -> bool:
+        return app_settings.async_email_func is not None
+
+    def __call__(self, *args, **kwargs):
+        return app_settings.async_email_func(*args, **kwargs)  # type: ignore
+
+
+async_email_func = LazyAsyncEmailFunc()
 
 
 def get_output_error_type():
-    if app_settings.CUSTOM_ERROR_TYPE and isinstance(app_settings.CUSTOM_ERROR_TYPE, str):
-        return import_string(app_settings.CUSTOM_ERROR_TYPE)
-    else:
-        return ExpectedErrorType
+    return app_settings.output_error_type or ExpectedErrorType
 
 
-OutputErrorType = get_output_error_type()
+def __getattr__(name):
+    # `OutputErrorType` used to be resolved at import time
+    if name == "OutputErrorType":
+        return get_output_error_type()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
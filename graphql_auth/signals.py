@@ -1,5 +1,5 @@
 from django.conf import settings as django_settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import Signal, receiver
 
 
@@ -7,9 +7,109 @@ from django.dispatch import Signal, receiver
 def create_user_status(sender, instance, created, **kwargs):
     if created:
         from .models import UserStatus
+        from .status import status_on_user_model
 
-        UserStatus._default_manager.get_or_create(user=instance)
+        if status_on_user_model():
+            return
+
+        # status attached in memory before saving the user (see UserStatus.attach)
+        # is inserted straight away, no need to check if it exists
+        status = UserStatus._meta.get_field("user").remote_field.get_cached_value(
+            instance, default=None
+        )
+        if status is not None and status._state.adding:
+            status.user = instance
+            status.save(force_insert=True)
+        else:
+            UserStatus._default_manager.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=django_settings.AUTH_USER_MODEL)
+def update_user_search_grams(sender, instance, created, update_fields=None, **kwargs):
+    from .settings import graphql_auth_settings as app_settings
+
+    fields = app_settings.USER_SEARCH_FIELDS
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    if fields:
+        from .search import index_users
+
+        index_users([instance], fields, created=created)
+
+
+@receiver(post_save, sender=django_settings.AUTH_USER_MODEL)
+def count_created_user(sender, instance, created, **kwargs):
+    from .settings import graphql_auth_settings as app_settings
+
+    if created and app_settings.USER_COUNTERS:
+        from .counters import get_counter_deltas, update_user_counters
+
+        update_user_counters(instance.pk, **get_counter_deltas([instance.status]))
+
+
+@receiver(post_delete, sender=django_settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender="graphql_auth.UserStatus")
+def count_deleted_user(sender, instance, **kwargs):
+    from .models import UserStatus
+    from .settings import graphql_auth_settings as app_settings
+    from .status import status_on_user_model
+
+    # counted from the model holding the status fields, the status row is
+    # deleted with its user
+    if not app_settings.USER_COUNTERS or status_on_user_model() == (
+        sender is UserStatus
+    ):
+        return
+    from .counters import get_counter_deltas, update_user_counters
+
+    pk = instance.user_id if sender is UserStatus else instance.pk
+    update_user_counters(pk, **get_counter_deltas([instance], -1))
+
+
+@receiver(post_save, sender=django_settings.AUTH_USER_MODEL)
+def clear_deactivation_time(sender, instance, created, update_fields=None, **kwargs):
+    # a reactivated user starts a new retention period on its next deactivation
+    if created or not instance.is_active:
+        return
+    if update_fields is not None and "is_active" not in update_fields:
+        return
+    from .models import UserStatus
+    from .status import status_on_user_model
+
+    if status_on_user_model():
+        status, queryset = instance, sender._default_manager.filter(pk=instance.pk)
+        if "deactivated_at" in instance.get_deferred_fields():
+            status = None
+    else:
+        status = UserStatus._meta.get_field("user").remote_field.get_cached_value(
+            instance, default=None
+        )
+        queryset = UserStatus._default_manager.filter(user=instance)
+    if status is not None:
+        if status.deactivated_at is None:
+            return
+        status.deactivated_at = None
+    queryset.filter(deactivated_at__isnull=False).update(deactivated_at=None)
+
+
+# not post_delete, which would load and signal every deleted row instead of
+# deleting them in one query: deletions invalidate the cache once per batch
+@receiver(post_save, sender=django_settings.AUTH_USER_MODEL)
+@receiver(post_save, sender="graphql_auth.UserStatus")
+def drop_cached_user_pages(sender, update_fields=None, **kwargs):
+    # graphql_jwt saves the last login on every login
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+    from .cache import invalidate_users_cache
+
+    invalidate_users_cache(on_commit=True)
 
 
 user_registered = Signal()
 user_verified = Signal()
+# sent after each batch of users deleted by a retention policy,
+# with `policy` and `user_pks`
+users_purged = Signal()
+# sent after each batch of unverified users expired,
+# with `action` ("delete" or "archive") and `user_pks`
+unverified_users_expired = Signal()
@@ -0,0 +1,436 @@
+"""
+Asyncio SMTP sender keeping a pool of persistent connections to the `EMAIL_HOST`
+of the Django settings, so sending an email does not tie up the worker thread
+for the whole SMTP conversation.
+
+The sender runs on a background event loop thread. Sync code hands the messages
+over and returns (`async_email_task` as `EMAIL_ASYNC_TASK`), async code awaits the
+delivery (`asend_email`), and `AsyncSMTPEmailBackend` waits for it by default.
+The messages of a connection are sent back to back, with the envelope pipelined
+when the server supports `PIPELINING` (RFC 2920).
+"""
+
+import asyncio
+import base64
+import logging
+import ssl
+import threading
+from concurrent.futures import Future
+from email.utils import parseaddr
+from smtplib import (
+    SMTPAuthenticationError,
+    SMTPDataError,
+    SMTPNotSupportedError,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPSenderRefused,
+    SMTPServerDisconnected,
+)
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+from django.core.mail.utils import DNS_NAME
+
+from .settings import graphql_auth_settings as app_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPConnection:
+    """
+    One SMTP session over asyncio streams, used by one message batch at a time.
+    """
+
+    def __init__(self, sender: "AsyncSMTPSender"):
+        self.sender = sender
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+        self.extensions: set[str] = set()
+
+    @property
+    def pipelining(self) -> bool:
+        return "PIPELINING" in self.extensions
+
+    async def connect(self) -> None:
+        sender = self.sender
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                sender.host,
+                sender.port,
+                ssl=sender.get_ssl_context() if sender.use_ssl else None,
+                server_hostname=sender.host if sender.use_ssl else None,
+            ),
+            sender.timeout,
+        )
+        await self.expect(220)
+        await self.ehlo()
+        if sender.use_tls:
+            if not hasattr(self.writer, "start_tls"):
+                raise SMTPNotSupportedError("STARTTLS requires Python 3.11.")
+            await self.command("STARTTLS", 220)
+            await self.writer.start_tls(
+                sender.get_ssl_context(), server_hostname=sender.host
+            )
+            await self.ehlo()
+        if sender.username:
+            credentials = base64.b64encode(
+                ("\0%s\0%s" % (sender.username, sender.password)).encode()
+            ).decode()
+            code, message = await self.command("AUTH PLAIN " + credentials)
+            if code != 235:
+                raise SMTPAuthenticationError(code, message)
+
+    async def ehlo(self) -> None:
+        code, message = await self.command("EHLO " + self.sender.local_hostname)
+        if code != 250:
+            raise SMTPResponseException(code, message)
+        self.extensions = {
+            line.split(" ", 1)[0].upper() for line in message.splitlines()[1:]
+        }
+
+    async def read_reply(self) -> tuple[int, str]:
+        lines = []
+        while True:
+            line = await asyncio.wait_for(
+                self.reader.readline(), self.sender.timeout  # type: ignore
+            )
+            if not line:
+                raise SMTPServerDisconnected("Connection unexpectedly closed")
+            lines.append(line[4:].decode(errors="replace").rstrip("\r\n"))
+            if line[3:4] != b"-":
+                return int(line[:3]), "\n".join(lines)
+
+    async def expect(self, expected_code: int) -> str:
+        code, message = await self.read_reply()
+        if code != expected_code:
+            raise SMTPResponseException(code, message)
+        return message
+
+    async def command(
+        self, line: str, expected_code: int | None = None
+    ) -> tuple[int, str]:
+        self.writer.write(line.encode() + b"\r\n")  # type: ignore
+        await self.writer.drain()  # type: ignore
+        if expected_code is not None:
+            return expected_code, await self.expect(expected_code)
+        return await self.read_reply()
+
+    async def send(self, message) -> None:
+        encoding = message.encoding or settings.DEFAULT_CHARSET
+        from_email = parseaddr(sanitize_address(message.from_email, encoding))[1]
+        recipients = [
+            parseaddr(sanitize_address(address, encoding))[1]
+            for address in message.recipients()
+        ]
+        commands = (
+            ["MAIL FROM:<%s>" % from_email]
+            + ["RCPT TO:<%s>" % address for address in recipients]
+            + ["DATA"]
+        )
+        if self.pipelining:
+            # the whole envelope in one write, then its replies in order
+            data = "".join(command + "\r\n" for command in commands).encode()
+            self.writer.write(data)  # type: ignore
+            await self.writer.drain()  # type: ignore
+            replies = [await self.read_reply() for _ in commands]
+        else:
+            replies = [await self.command(commands[0])]
+            if replies[0][0] == 250:
+                replies += [await self.command(command) for command in commands[1:-1]]
+                if any(code in (250, 251) for code, _ in replies[1:]):
+                    replies.append(await self.command("DATA"))
+
+        data_started = len(replies) == len(commands) and replies[-1][0] == 354
+        code, reply = replies[0]
+        if code != 250:
+            await self.reset(data_started)
+            raise SMTPSenderRefused(code, reply.encode(), from_email)
+        refused = {
+            address: (code, reply.encode())
+            for address, (code, reply) in zip(
+                recipients, replies[1 : len(recipients) + 1]
+            )
+            if code not in (250, 251)
+        }
+        if len(refused) == len(recipients):
+            await self.reset(data_started)
+            raise SMTPRecipientsRefused(refused)
+        code, reply = replies[-1]
+        if code != 354:
+            await self.reset()
+            raise SMTPDataError(code, reply)
+
+        data = message.message().as_bytes(linesep="\r\n")
+        # dot-stuffing of the lines starting with "."
+        data = b"\r\n".join(
+            b"." + line if line.startswith(b".") else line
+            for line in data.split(b"\r\n")
+        )
+        if not data.endswith(b"\r\n"):
+            data += b"\r\n"
+        self.writer.write(data + b".\r\n")  # type: ignore
+        await self.writer.drain()  # type: ignore
+        code, reply = await self.read_reply()
+        if code != 250:
+            raise SMTPDataError(code, reply)
+        if refused:
+            logger.warning("Recipients refused: %s", refused)
+
+    async def reset(self, data_started: bool = False) -> None:
+        if data_started:
+            # the server accepted DATA of a pipelined envelope:
+            # end it empty, then drop the message
+            self.writer.write(b".\r\n")  # type: ignore
+            await self.read_reply()
+        await self.command("RSET")
+
+    async def close(self) -> None:
+        if self.writer is None:
+            return
+        try:
+            await asyncio.wait_for(self.command("QUIT"), self.sender.timeout)
+        except (OSError, asyncio.TimeoutError, SMTPServerDisconnected):
+            pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+        self.writer = None
+
+
+class AsyncSMTPSender:
+    """
+    Pool of at most `pool_size` persistent SMTP connections,
+    on its own event loop thread.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 25,
+        username: str = "",
+        password: str = "",
+        use_tls: bool = False,
+        use_ssl: bool = False,
+        timeout: float | None = None,
+        pool_size: int = 4,
+        local_hostname: str | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.local_hostname = local_hostname or str(DNS_NAME)
+        self._idle: list[SMTPConnection] = []
+        self._slots: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "AsyncSMTPSender":
+        return cls(
+            host=settings.EMAIL_HOST,
+            port=settings.EMAIL_PORT,
+            username=settings.EMAIL_HOST_USER,
+            password=settings.EMAIL_HOST_PASSWORD,
+            use_tls=settings.EMAIL_USE_TLS,
+            use_ssl=settings.EMAIL_USE_SSL,
+            timeout=settings.EMAIL_TIMEOUT,
+            pool_size=app_settings.EMAIL_SMTP_POOL_SIZE,
+        )
+
+    def get_ssl_context(self) -> ssl.SSLContext:
+        context = ssl.create_default_context()
+        if settings.EMAIL_SSL_CERTFILE:
+            context.load_cert_chain(
+                settings.EMAIL_SSL_CERTFILE, settings.EMAIL_SSL_KEYFILE
+            )
+        return context
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="graphql-auth-smtp", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _send_messages(self, messages: list) -> int:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            connected = reused
+            try:
+                if connection is None:
+                    connection = SMTPConnection(self)
+                    await connection.connect()
+                connected = True
+                for index, message in enumerate(messages):
+                    try:
+                        await connection.send(message)
+                    except (OSError, SMTPServerDisconnected):
+                        if not reused or index:
+                            raise
+                        # the server closed the idle connection, reconnect once
+                        await connection.close()
+                        reused = connected = False
+                        connection = SMTPConnection(self)
+                        await connection.connect()
+                        connected = True
+                        await connection.send(message)
+            except (SMTPResponseException, SMTPRecipientsRefused):
+                if connected:
+                    # e.g. a refused recipient, the session is still usable
+                    self._idle.append(connection)
+                else:
+                    await connection.close()  # type: ignore
+                raise
+            except BaseException:
+                await connection.close()  # type: ignore
+                raise
+            self._idle.append(connection)
+        return len(messages)
+
+    def submit(self, messages: list) -> Future:
+        """
+        Send `messages` (`EmailMessage`) over one connection of the pool,
+        from any thread.
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._send_messages(list(messages)), self.loop
+        )
+
+    async def asend_messages(self, messages: list) -> int:
+        """
+        Coroutine sending `messages`, to await from any event loop.
+        """
+        return await asyncio.wrap_future(self.submit(messages))
+
+    def close(self) -> None:
+        """
+        Close the connections, once the sends in progress are done,
+        and stop the event loop thread.
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def close_connections():
+            # wait for the sends in progress
+            for _ in range(self.pool_size if self._slots else 0):
+                await self._slots.acquire()  # type: ignore
+            while self._idle:
+                await self._idle.pop().close()
+
+        asyncio.run_coroutine_threadsafe(close_connections(), loop).result(self.timeout)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(self.timeout)  # type: ignore
+        loop.close()
+        self._slots = None
+
+
+def _log_failure(future: Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Failed to send emails", exc_info=future.exception())
+
+
+_sender: AsyncSMTPSender | None = None
+_sender_lock = threading.Lock()
+
+
+def get_sender() -> AsyncSMTPSender:
+    """
+    The sender shared by the process, built from the settings on first use.
+    """
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            _sender = AsyncSMTPSender.from_settings()
+        return _sender
+
+
+def close_sender() -> None:
+    global _sender
+    with _sender_lock:
+        sender, _sender = _sender, None
+    if sender is not None:
+        sender.close()
+
+
+class AsyncSMTPEmailBackend(BaseEmailBackend):
+    """
+    Email backend handing the messages over to the shared `AsyncSMTPSender`.
+
+    `send_messages` waits for the delivery, like the Django backends: it returns
+    the number of messages sent and raises on failure unless `fail_silently`.
+    With `wait=False` it returns once the messages are queued, counting them
+    all as sent: the failures are only logged (`fail_silently` does not apply),
+    or seen on the futures of the submitted messages, kept in `futures`.
+    """
+
+    def __init__(
+        self,
+        fail_silently: bool = False,
+        wait: bool = True,
+        sender: AsyncSMTPSender | None = None,
+        **kwargs
+    ):
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.wait = wait
+        self.sender = sender or get_sender()
+        self.futures: list[Future] = []
+
+    def send_messages(self, email_messages) -> int:
+        messages = [message for message in email_messages if message.recipients()]
+        if not messages:
+            return 0
+        future = self.sender.submit(messages)
+        self.futures.append(future)
+        if not self.wait:
+            future.add_done_callback(_log_failure)
+            return len(messages)
+        try:
+            return future.result()
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+
+
+def async_email_task(func, args):
+    """
+    `EMAIL_ASYNC_TASK` sending the emails with the asyncio sender:
+
+        "EMAIL_ASYNC_TASK": "graphql_auth.smtp.async_email_task"
+    """
+    from .outbox import send_outbox_email
+
+    # the outbox has to know whether the emails were sent, to retry them
+    backend = AsyncSMTPEmailBackend(wait=func is send_outbox_email)
+    return func(*args, connection=backend)
+
+
+async def asend_email(func, args):
+    """
+    Async version of `async_email_task`, for async mutations: renders the email
+    in a thread and awaits its delivery on the sender event loop.
+    """
+    backend = AsyncSMTPEmailBackend(wait=False)
+    result = await sync_to_async(func)(*args, connection=backend)
+    for future in backend.futures:
+        await asyncio.wrap_future(future)
+    return result
@@ -0,0 +1,168 @@
+"""
+Optional mode storing the status fields (`verified`, `archived` and
+`secondary_email`) on a custom user model instead of `UserStatus`,
+so reading a user with its status needs no join:
+
+    class User(UserStatusFieldsMixin, AbstractUser):
+        pass
+
+`user.status` is then a `UserStatusFacade` over the user fields, with the same API.
+
+This module does not import the user model, so it can be imported from the
+module defining it.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings as django_settings
+from django.db import models
+from django.utils import timezone
+
+STATUS_FIELDS = (
+    "verified",
+    "archived",
+    "secondary_email",
+    "archived_at",
+    "deactivated_at",
+    "registered_at",
+)
+
+
+class UserStatusFieldsMixin(models.Model):
+    """
+    Status fields of `UserStatus` to add to a custom user model.
+    """
+
+    verified = models.BooleanField(default=False)
+    archived = models.BooleanField(default=False)
+    secondary_email = models.EmailField(blank=True, null=True)
+    archived_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    deactivated_at = models.DateTimeField(blank=True, null=True, db_index=True)
+    registered_at = models.DateTimeField(default=timezone.now, db_index=True)
+    # bumped by the mutations changing the user, see `graphql_auth.models.bump_version`
+    version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+@lru_cache(maxsize=None)
+def status_on_user_model() -> bool:
+    from django.contrib.auth import get_user_model
+
+    return issubclass(get_user_model(), UserStatusFieldsMixin)
+
+
+def status_lookup(field: str) -> str:
+    """
+    Lookup of a status field from the user model, e.g. `status__verified`.
+    """
+    if status_on_user_model():
+        return field
+    return "status__%s" % field
+
+
+def select_status(queryset: models.QuerySet) -> models.QuerySet:
+    """
+    Read the status of the users in the same query.
+    """
+    if status_on_user_model():
+        return queryset
+    return queryset.select_related("status")
+
+
+def _get_models(apps):
+    if apps is None:
+        from django.apps import apps
+    User, UserStatus = apps.get_model(django_settings.AUTH_USER_MODEL), apps.get_model(
+        "graphql_auth", "UserStatus"
+    )
+    # the (historical) models may not have all the fields yet, the version
+    # is copied too so clients polling `me` do not see it go back
+    fields = tuple(
+        name
+        for name in (*STATUS_FIELDS, "version")
+        if any(model_field.name == name for model_field in User._meta.concrete_fields)
+        and any(
+            model_field.name == name for model_field in UserStatus._meta.concrete_fields
+        )
+    )
+    return User, UserStatus, fields
+
+
+def _invalidate_users_cache() -> None:
+    # imported here, so the module of the user model can import this one
+    from .cache import invalidate_users_cache
+
+    invalidate_users_cache(on_commit=True)
+
+
+def copy_status_to_user_model(
+    apps=None, schema_editor=None, batch_size: int = 1000
+) -> int:
+    """
+    Copy the `UserStatus` rows to the status fields of the user model, in batches.
+
+    Use it in a data migration of the app of the custom user model, once the
+    `UserStatusFieldsMixin` fields are added (depending on `graphql_auth`'s
+    latest migration):
+
+        migrations.RunPython(copy_status_to_user_model, copy_status_from_user_model)
+
+    Returns the number of users updated.
+    """
+    User, UserStatus, fields = _get_models(apps)
+    queryset = UserStatus._default_manager.order_by("pk").values_list(
+        "pk", "user_id", *fields
+    )
+    _invalidate_users_cache()
+    last_pk, updated = 0, 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            return updated
+        users = [
+            User(pk=user_id, **dict(zip(fields, values)))
+            for _, user_id, *values in rows
+        ]
+        User._default_manager.bulk_update(users, fields)
+        updated += len(users)
+        last_pk = rows[-1][0]
+
+
+def copy_status_from_user_model(
+    apps=None, schema_editor=None, batch_size: int = 1000
+) -> int:
+    """
+    Copy the status fields of the user model back to `UserStatus`
+    (creating missing rows), in batches. Reverse of `copy_status_to_user_model`.
+
+    Returns the number of statuses updated or created.
+    """
+    User, UserStatus, fields = _get_models(apps)
+    queryset = User._default_manager.order_by("pk").values_list("pk", *fields)
+    _invalidate_users_cache()
+    last_pk, copied = 0, 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            return copied
+        existing = dict(
+            UserStatus._default_manager.filter(
+                user_id__in=[row[0] for row in rows]
+            ).values_list("user_id", "pk")
+        )
+        statuses = [
+            UserStatus(
+                pk=existing.get(user_id), user_id=user_id, **dict(zip(fields, values))
+            )
+            for user_id, *values in rows
+        ]
+        UserStatus._default_manager.bulk_update(
+            [status for status in statuses if status.pk], fields
+        )
+        UserStatus._default_manager.bulk_create(
+            [status for status in statuses if not status.pk]
+        )
+        copied += len(statuses)
+        last_pk = rows[-1][0]
@@ -0,0 +1,134 @@
+"""
+Tracing spans around the stages of the auth mutations, see the `TRACER` setting.
+
+The tracer has the `start_as_current_span(name, attributes=None)` context manager
+of the OpenTelemetry tracers, so `graphql_auth.tracing.get_opentelemetry_tracer`
+plugs the spans into an OpenTelemetry trace. Spans:
+
+- `graphql_auth.mutation`: the whole mutation, with a `mutation` attribute
+- `graphql_auth.get_user_to_login` and `graphql_auth.get_user_by_email`: user lookups
+- `graphql_auth.form_validation`: `is_valid()` of the mutation form,
+  with a `form` attribute
+- `graphql_auth.check_password` and `graphql_auth.authenticate` (`graphql_jwt` login)
+- `graphql_auth.get_token` and `graphql_auth.get_token_payload`: email tokens
+- `graphql_auth.send_email`, with a `template` attribute
+- `graphql_auth.revoke_refresh_tokens`
+- `graphql_auth.signal`: `user_registered` and `user_verified` dispatch,
+  with a `signal` attribute
+
+Without tracer, `span` returns a shared no-op context manager and
+`traced` functions only check the setting.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+
+from .settings import graphql_auth_settings as app_settings
+
+_null_span = nullcontext()
+
+
+def span(name: str, **attributes):
+    """
+    Context manager of a span of the configured tracer, a no-op without tracer.
+    """
+    tracer = app_settings.tracer
+    if tracer is None:
+        return _null_span
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(name: str):
+    """
+    Decorator running the function in a span.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            tracer = app_settings.tracer
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with tracer.start_as_current_span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def is_valid(form) -> bool:
+    """
+    `form.is_valid()` in a `graphql_auth.form_validation` span.
+    """
+    with span("graphql_auth.form_validation", form=type(form).__name__):
+        return form.is_valid()
+
+
+def get_opentelemetry_tracer():
+    """
+    Tracer of the `opentelemetry-api` package, for `TRACER`:
+
+        "TRACER": "graphql_auth.tracing.get_opentelemetry_tracer"
+    """
+    from opentelemetry import trace
+
+    return trace.get_tracer("graphql_auth")
+
+
+@dataclass
+class FinishedSpan:
+    name: str
+    attributes: dict
+    parent: "FinishedSpan | None"
+    start: float
+    end: float = 0.0
+    error: BaseException | None = None
+    children: list = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def set_attribute(self, key, value) -> None:
+        self.attributes[key] = value
+
+
+class InMemoryTracer:
+    """
+    Tracer keeping the finished spans in memory, for tests.
+    """
+
+    def __init__(self):
+        self.spans: list[FinishedSpan] = []
+        self._current: ContextVar[FinishedSpan | None] = ContextVar(
+            "graphql_auth_span", default=None
+        )
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        parent = self._current.get()
+        current = FinishedSpan(
+            name, dict(attributes or {}), parent, time.perf_counter()
+        )
+        if parent is not None:
+            parent.children.append(current)
+        token = self._current.set(current)
+        try:
+            yield current
+        except BaseException as error:
+            current.error = error
+            raise
+        finally:
+            current.end = time.perf_counter()
+            self._current.reset(token)
+            self.spans.append(current)
+
+    def get_spans(self, name: str) -> list[FinishedSpan]:
+        return [finished for finished in self.spans if finished.name == name]
+
+    def clear(self) -> None:
+        self.spans.clear()
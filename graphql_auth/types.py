@@ -1,7 +1,7 @@
 import graphene
-from graphene_django.utils import camelize
 
 from .exceptions import WrongUsageError
+from .utils import camelize_errors
 
 
 class ExpectedErrorType(graphene.Scalar):
@@ -35,9 +35,7 @@ class ExpectedErrorType(graphene.Scalar):
     @staticmethod
     def serialize(errors):
         if isinstance(errors, dict):
-            if errors.get("__all__", False):
-                errors["non_field_errors"] = errors.pop("__all__")
-            return camelize(errors)
+            return camelize_errors(errors)
         elif isinstance(errors, list):
             return {"nonFieldErrors": errors}
         raise WrongUsageError("`errors` must be list or dict!")
@@ -1,20 +1,30 @@
 import inspect
 import types
 import warnings
+from functools import lru_cache
 from importlib import import_module
 
+import graphene
 from django.conf import settings as django_settings
-from django.contrib.auth import get_user_model
+from django.contrib.auth import get_user_model, password_validation
 from django.contrib.auth.models import AbstractBaseUser
 from django.core import signing
+from django.http import HttpRequest
+from django.utils.functional import Promise
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext as _
+from graphene.utils.str_converters import to_camel_case
 from graphene_django.utils import camelize
 
+from .constants import FrozenErrors
 from .exceptions import TokenScopeError
+from .metrics import timer
+from .tracing import traced
 
 warnings.simplefilter("once")
 
 
+@traced("graphql_auth.get_token")
 def get_token(user, action, **kwargs):
     username = user.get_username()
     if hasattr(username, "pk"):
@@ -22,12 +32,15 @@ def get_token(user, action, **kwargs):
     payload = {user.USERNAME_FIELD: username, "action": action}
     if kwargs:
         payload.update(**kwargs)
-    token = signing.dumps(payload)
+    with timer("token_sign"):
+        token = signing.dumps(payload)
     return token
 
 
+@traced("graphql_auth.get_token_payload")
 def get_token_payload(token, action, exp=None):
-    payload = signing.loads(token, max_age=exp)
+    with timer("token_verify"):
+        payload = signing.loads(token, max_age=exp)
     _action = payload.pop("action")
     if _action != action:
         raise TokenScopeError
@@ -51,6 +64,7 @@ def using_refresh_tokens():
     )
 
 
+@traced("graphql_auth.revoke_refresh_tokens")
 def revoke_user_refresh_token(user):
     if using_refresh_tokens():
         refresh_tokens = user.refresh_tokens.all()
@@ -75,13 +89,72 @@ def normalize_fields(dict_or_list, extra_list):
     other fields on mutations
     """
     if isinstance(dict_or_list, dict):
-        for i in extra_list:
-            dict_or_list[i] = "String"
-        return dict_or_list
+        return {**dict_or_list, **{i: "String" for i in extra_list}}
     else:
         return dict_or_list + extra_list
 
 
+@lru_cache(maxsize=None)
+def get_graphene_type(type_name: str) -> type:
+    return getattr(graphene, type_name)
+
+
+def _freeze_fields(dict_or_list) -> tuple[tuple[str, str], ...]:
+    if isinstance(dict_or_list, dict):
+        return tuple(dict_or_list.items())
+    return tuple((key, "String") for key in dict_or_list)
+
+
+@lru_cache(maxsize=None)
+def _compile_dynamic_fields(
+    fields, required_fields
+) -> tuple[tuple[str, type, bool], ...]:
+    compiled = {key: (get_graphene_type(type_name), False) for key, type_name in fields}
+    compiled.update(
+        {
+            key: (get_graphene_type(type_name), True)
+            for key, type_name in required_fields
+        }
+    )
+    return tuple((key, _type, required) for key, (_type, required) in compiled.items())
+
+
+def compile_dynamic_fields(
+    dict_or_list, required_dict_or_list
+) -> tuple[tuple[str, type, bool], ...]:
+    """
+    Precompile the settings-driven fields of a mutation into
+    a tuple of (name, graphene type, required), resolving every
+    graphene type name only once per process.
+    """
+    return _compile_dynamic_fields(
+        _freeze_fields(dict_or_list), _freeze_fields(required_dict_or_list)
+    )
+
+
+class lazy_class_attribute:
+    """
+    Class attribute resolved on first access and then cached on the class.
+
+    Accepts a dotted import path or a callable returning the value,
+    so heavy objects (like model forms) are not built at import time.
+    """
+
+    def __init__(self, import_path_or_callable):
+        self.import_path_or_callable = import_path_or_callable
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if callable(self.import_path_or_callable):
+            value = self.import_path_or_callable()
+        else:
+            value = import_string(self.import_path_or_callable)
+        setattr(owner, self.name, value)
+        return value
+
+
 def get_classes(module: str | types.ModuleType, class_type: type | None = None) -> list[tuple[str, type]]:
     """
     Returns list of all classes od type `class_type` defined in the given module path.
@@ -93,11 +166,76 @@ def get_classes(module: str | types.ModuleType, class_type: type | None = None)
     return [item for item in inspect.getmembers(module, inspect.isclass) if issubclass(item[1], class_type)]
 
 
+@lru_cache(maxsize=1024)
+def camelize_key(key: str) -> str:
+    if key == '__all__':
+        return 'nonFieldErrors'
+    return to_camel_case(key)
+
+
+def camelize_errors(errors):
+    """
+    Same output as `graphene_django.utils.camelize` with `__all__`
+    renamed to `nonFieldErrors`, but without mutating the given errors,
+    caching the key conversions and returning `FrozenErrors` as is.
+    """
+    if isinstance(errors, FrozenErrors):
+        return errors
+    if isinstance(errors, dict):
+        return {
+            (
+                camelize_key(str(key)) if isinstance(key, (str, Promise)) else key
+            ): camelize_errors(value)
+            for key, value in errors.items()
+        }
+    if isinstance(errors, (str, Promise)):
+        return errors
+    if isinstance(errors, (list, tuple)):
+        return [camelize_errors(error) for error in errors]
+    return camelize(errors)
+
+
 def camelize_form_errors(errors: dict) -> dict:
     """Camelize dict of django form errors"""
-    if errors.get('__all__', False):
-        errors['non_field_errors'] = errors.pop('__all__')
-    return camelize(errors)  # type: ignore
+    return camelize_errors(errors)
+
+
+def preload_password_validators() -> None:
+    """
+    Instantiate the `AUTH_PASSWORD_VALIDATORS` (cached by Django), so the common
+    passwords list is read at startup instead of on the first registration.
+    """
+    password_validation.get_default_password_validators()
+
+
+class EmailRequest(HttpRequest):
+    """
+    Request built from a domain, to render emails outside of
+    a request/response cycle (e.g. in management commands).
+    """
+
+    def __init__(self, domain: str, secure: bool = False):
+        super().__init__()
+        host, separator, port = domain.partition(":")
+        self.secure = secure
+        self.META["HTTP_HOST"] = domain
+        self.META["SERVER_NAME"] = host
+        self.META["SERVER_PORT"] = port or ("443" if secure else "80")
+
+    def _get_scheme(self):
+        return "https" if self.secure else "http"
+
+
+class EmailInfo:
+    """
+    Stand-in for the resolver `info`, the email methods
+    of `UserStatus` only use `info.context`.
+    """
+
+    __slots__ = ("context",)
+
+    def __init__(self, domain: str, secure: bool = False):
+        self.context = EmailRequest(domain, secure)
 
 
 def get_user_by_natural_key(username) -> AbstractBaseUser | None:
@@ -105,5 +243,11 @@ def get_user_by_natural_key(username) -> AbstractBaseUser | None:
     A difference approach from the original method (graphql_jwt.utils.get_user_by_natural_key)
     is using `select_related('status')`
     """
+    from .status import select_status
+
     UserModel = get_user_model()
-    return UserModel._default_manager.select_related('status').filter(**{UserModel.USERNAME_FIELD: username}).first()  # type: ignore
+    return (
+        select_status(UserModel._default_manager.all())
+        .filter(**{UserModel.USERNAME_FIELD: username})  # type: ignore
+        .first()
+    )
@@ -0,0 +1,151 @@
+import hashlib
+import json
+from functools import wraps
+
+from django.http import (
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    HttpResponseNotModified,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+
+from .bulk import EXPORT_CONTENT_TYPES, export_users
+
+
+def get_request_user(request):
+    """
+    The session user, or the user of the JWT sent in the request
+    (like the GraphQL view).
+    """
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user
+    from graphql_jwt.exceptions import JSONWebTokenError
+    from graphql_jwt.shortcuts import get_user_by_token
+    from graphql_jwt.utils import get_credentials
+
+    token = get_credentials(request)
+    if token is None:
+        return None
+    try:
+        return get_user_by_token(token, request)
+    except JSONWebTokenError:
+        return None
+
+
+@require_GET
+def export_users_view(request, format="csv"):
+    """
+    Stream all users with their status to staff users, as `?format=csv|jsonl|parquet`.
+    """
+    user = get_request_user(request)
+    if user is None or not user.is_staff:
+        return HttpResponseForbidden()
+    format = request.GET.get("format", format)
+    if format not in EXPORT_CONTENT_TYPES:
+        return HttpResponseBadRequest("Unknown format: %s" % format)
+    response = StreamingHttpResponse(
+        export_users(format), content_type=EXPORT_CONTENT_TYPES[format]
+    )
+    response["Content-Disposition"] = 'attachment; filename="users.%s"' % format
+    return response
+
+
+# top level fields of the queries depending only on the version of the user
+ME_FIELDS = {"me", "meIfModified", "__typename"}
+
+
+def _get_graphql_params(request) -> tuple | None:
+    if request.method == "GET":
+        data = request.GET
+    elif request.method == "POST" and request.content_type == "application/json":
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+    else:
+        return None
+    variables = data.get("variables")
+    if isinstance(variables, str):
+        try:
+            variables = json.loads(variables)
+        except ValueError:
+            return None
+    return data.get("query"), variables, data.get("operationName")
+
+
+def _is_me_query(query: str) -> bool:
+    from graphql import (
+        FieldNode,
+        GraphQLError,
+        OperationDefinitionNode,
+        OperationType,
+        parse,
+    )
+
+    try:
+        document = parse(query)
+    except GraphQLError:
+        return False
+    for definition in document.definitions:
+        if not isinstance(definition, OperationDefinitionNode):
+            continue
+        if definition.operation != OperationType.QUERY:
+            return False
+        for selection in definition.selection_set.selections:
+            if (
+                not isinstance(selection, FieldNode)
+                or selection.name.value not in ME_FIELDS
+            ):
+                return False
+    return True
+
+
+def get_me_etag(request) -> str | None:
+    """
+    ETag of the response of a GraphQL request querying only `me`: the version of
+    the user and the hash of the query, or `None` for other requests and anonymous
+    users.
+    """
+    params = _get_graphql_params(request)
+    if params is None or not isinstance(params[0], str) or not _is_me_query(params[0]):
+        return None
+    user = get_request_user(request)
+    if user is None:
+        return None
+    query_hash = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode()
+    ).hexdigest()[:16]
+    return '"%s-%s-%s"' % (user.pk, user.status.version, query_hash)
+
+
+def conditional_me_view(view):
+    """
+    Wrap the GraphQL view to answer the `me` polls with the user unchanged
+    by `304 Not Modified`, without executing the query:
+
+        path("graphql", csrf_exempt(conditional_me_view(GraphQLView.as_view())))
+    """
+
+    @wraps(view)
+    def wrapped_view(request, *args, **kwargs):
+        etag = get_me_etag(request)
+        if etag is None:
+            return view(request, *args, **kwargs)
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        # cached by the client only, and revalidated on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return wrapped_view
@@ -35,6 +35,9 @@ setup(
         "graphene>=3.3",
         "PyJWT>=2.8.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Environment :: Web Environment",
@@ -0,0 +1,6 @@
+"""
+Performance benchmarks of graphql_auth, run against the test_project settings
+on a throwaway test database, e.g.:
+
+    PYTHONPATH=. python -m test_project.benchmarks.register --iterations 200
+"""
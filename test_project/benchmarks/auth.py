@@ -0,0 +1,191 @@
+"""
+Throughput and p50/p99 latency of the auth mutations and queries on seeded
+datasets, written as JSON to compare commits, e.g. from the repository root:
+
+    python -m test_project.benchmarks.auth --users 10000 100000 --output before.json
+"""
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from .base import benchmark_database, get_argument_parser, run_benchmark, seed_users, setup_django
+
+PASSWORDS = ('aaa&&111', 'bbb&&222')
+
+
+def get_commit() -> str | None:
+    try:
+        process = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return process.stdout.strip()
+
+
+def get_benchmark_client():
+    """
+    A `CommonTestCase` outside of the test runner, for its request helpers.
+    """
+    from graphql_auth.common_testcase import CommonTestCase
+
+    class BenchmarkClient(CommonTestCase):
+        RESPONSE_RESULT_KEY = ''
+
+        def __init__(self):
+            super().__init__()
+            self.client = self.client_class()
+
+        def run(self, query: str, key: str, token: str | None = None) -> dict:
+            headers = self.get_authorization_header(token) if token else None
+            response = self.query(query, headers=headers)
+            data = response.json()
+            assert not data.get('errors'), response.content
+            result = data['data'][key]
+            assert result.get('success', True), response.content
+            return result
+
+    return BenchmarkClient()
+
+
+def get_benchmarks(client, iterations: int) -> dict:
+    """
+    The benchmarked operations, as `{name: func(iteration)}`, with the users they need.
+    """
+    from graphql_jwt.refresh_token.shortcuts import create_refresh_token
+
+    from graphql_auth.constants import TokenAction
+    from graphql_auth.utils import get_token
+
+    user = client.create_user(
+        username='bench',
+        email='bench@email.com',
+        password=PASSWORDS[0],
+        verified=True,
+        secondary_email='bench_secondary@email.com',
+    )
+    client.create_user(username='bench_staff', email='bench_staff@email.com', verified=True, is_staff=True)
+    password_user = client.create_user(username='bench_password', email='bench_password@email.com', verified=True)
+
+    def login(field: str, value: str, password: str = PASSWORDS[0]) -> dict:
+        return client.run(
+            'mutation { tokenAuth(%s: "%s", password: "%s") { success, errors, token, refreshToken } }'
+            % (field, value, password),
+            'tokenAuth',
+        )
+
+    tokens = login('username', 'bench')
+    staff_token = login('username', 'bench_staff', client.default_password)['token']
+    password_token = login('username', 'bench_password', client.default_password)['token']
+    password_reset_token = get_token(password_user, TokenAction.PASSWORD_RESET)
+    state = {'refresh_token': tokens['refreshToken'], 'password': client.default_password, 'cursor': ''}
+    revoke_tokens = [create_refresh_token(user).get_token() for _ in range(iterations)]
+
+    def register(index: int) -> None:
+        client.run(
+            'mutation { register(email: "bench%d@email.com", username: "bench%d", password1: "%s", password2: "%s")'
+            ' { success, errors } }' % (index, index, PASSWORDS[0], PASSWORDS[0]),
+            'register',
+        )
+
+    def refresh_token(index: int) -> None:
+        result = client.run(
+            'mutation { refreshToken(refreshToken: "%s") { success, errors, token, refreshToken } }'
+            % state['refresh_token'],
+            'refreshToken',
+        )
+        state['refresh_token'] = result['refreshToken']
+
+    def revoke_token(index: int) -> None:
+        client.run(
+            'mutation { revokeToken(refreshToken: "%s") { success, errors } }' % revoke_tokens[index],
+            'revokeToken',
+        )
+
+    def password_change(index: int) -> None:
+        new_password = PASSWORDS[index % 2]
+        client.run(
+            'mutation { passwordChange(oldPassword: "%s", newPassword1: "%s", newPassword2: "%s")'
+            ' { success, errors } }' % (state['password'], new_password, new_password),
+            'passwordChange',
+            password_token,
+        )
+        state['password'] = new_password
+
+    def password_reset(index: int) -> None:
+        new_password = PASSWORDS[index % 2]
+        client.run(
+            'mutation { passwordReset(token: "%s", newPassword1: "%s", newPassword2: "%s") { success, errors } }'
+            % (password_reset_token, new_password, new_password),
+            'passwordReset',
+        )
+
+    def users(index: int) -> None:
+        result = client.run(
+            'query { users(first: 20, after: "%s") { totalCount, edges { node { username, verified } }'
+            ' pageInfo { hasNextPage, endCursor } } }' % state['cursor'],
+            'users',
+            staff_token,
+        )
+        state['cursor'] = result['pageInfo']['endCursor'] if result['pageInfo']['hasNextPage'] else ''
+
+    return {
+        'register': register,
+        'login_username': lambda index: login('username', 'bench'),
+        'login_email': lambda index: login('email', 'bench@email.com'),
+        'login_secondary_email': lambda index: login('email', 'bench_secondary@email.com'),
+        'verify_token': lambda index: client.run(
+            'mutation { verifyToken(token: "%s") { success, errors } }' % tokens['token'], 'verifyToken'
+        ),
+        'refresh_token': refresh_token,
+        'revoke_token': revoke_token,
+        'password_change': password_change,
+        'password_reset': password_reset,
+        'me': lambda index: client.run('query { me { username, verified } }', 'me', tokens['token']),
+        'users': users,
+    }
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__)
+    parser.add_argument('--users', type=int, nargs='+', default=[10_000], help='Seeded users, one run per count.')
+    parser.add_argument('--only', nargs='+', help='Names of the benchmarks to run.')
+    parser.add_argument('--output', help='JSON file of the results, standard output by default.')
+    args = parser.parse_args()
+    setup_django()
+
+    import django
+    from django.db import connection
+
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'iterations': args.iterations,
+        'fast_hasher': args.fast_hasher,
+        'datasets': [],
+    }
+    for count in args.users:
+        with benchmark_database(fast_hasher=args.fast_hasher):
+            started = time.perf_counter()
+            seed_users(count)
+            dataset = {'users': count, 'seed_seconds': round(time.perf_counter() - started, 2), 'results': []}
+            print(f'seeded {count} users in {dataset["seed_seconds"]}s', file=sys.stderr)
+            for name, func in get_benchmarks(get_benchmark_client(), args.iterations).items():
+                if args.only and name not in args.only:
+                    continue
+                result = run_benchmark(name, func, args.iterations)
+                print(result, file=sys.stderr)
+                dataset['results'].append(result.as_dict())
+            report['datasets'].append(dataset)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import argparse
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+
+def setup_django() -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_project.settings')
+    import django
+
+    django.setup()
+
+
+def get_argument_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument(
+        '--fast-hasher',
+        action='store_true',
+        help='Hash passwords with MD5 to measure graphql_auth overhead without the hashing cost.',
+    )
+    return parser
+
+
+@contextmanager
+def benchmark_database(fast_hasher: bool = False):
+    """
+    Create the test database (and remove it afterwards) like the test runner does.
+    """
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    hashers = ['django.contrib.auth.hashers.MD5PasswordHasher'] if fast_hasher else None
+    try:
+        if hashers:
+            with override_settings(PASSWORD_HASHERS=hashers):
+                yield
+        else:
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    total_seconds: float
+    requests_per_second: float
+    p50_ms: float
+    p99_ms: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def __str__(self) -> str:
+        return (
+            f'{self.name}: {self.iterations} iterations in {self.total_seconds:.2f}s, '
+            f'{self.requests_per_second:.1f} req/s, p50 {self.p50_ms:.2f}ms, p99 {self.p99_ms:.2f}ms'
+        )
+
+
+def run_benchmark(name: str, func: Callable[[int], object], iterations: int) -> BenchmarkResult:
+    """
+    Call `func(iteration)` `iterations` times and collect its latencies.
+    """
+    latencies = []
+    started = time.perf_counter()
+    for iteration in range(iterations):
+        call_started = time.perf_counter()
+        func(iteration)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    total = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        total_seconds=total,
+        requests_per_second=iterations / total if total else 0.0,
+        p50_ms=quantiles[49],
+        p99_ms=quantiles[98],
+    )
+
+
+def seed_users(count: int, chunk_size: int = 10_000, username: Callable[[int], str] | None = None) -> None:
+    """
+    Insert `count` users (`user<N>` or `username(N)`, every other one verified) with their status.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.db import transaction
+
+    from graphql_auth.models import UserStatus
+
+    UserModel = get_user_model()
+    password = make_password(None)
+    for start in range(0, count, chunk_size):
+        users = []
+        for index in range(start, min(start + chunk_size, count)):
+            name = username(index) if username else f'user{index}'
+            user = UserModel(username=name, email=f'{name}@email.com', password=password)
+            UserStatus.attach(user, verified=index % 2 == 0)
+            users.append(user)
+        with transaction.atomic():
+            UserStatus.objects.bulk_create_for_users(UserModel.objects.bulk_create(users))
@@ -0,0 +1,42 @@
+"""
+Streaming export throughput (rows per second) and memory of `graphql_auth.bulk.export_users`.
+"""
+import os
+import resource
+import time
+
+from .base import benchmark_database, get_argument_parser, seed_users, setup_django
+
+
+def max_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--formats', nargs='+', default=['csv', 'jsonl', 'parquet'])
+    args = parser.parse_args()
+    setup_django()
+
+    from graphql_auth.bulk import export_users
+
+    with benchmark_database():
+        started = time.perf_counter()
+        seed_users(args.rows)
+        print(f'seeded {args.rows} users in {time.perf_counter() - started:.1f}s, max RSS {max_rss_mb():.0f}MB')
+        for format in args.formats:
+            mode = 'wb' if format == 'parquet' else 'w'
+            started = time.perf_counter()
+            with open(os.devnull, mode) as file:
+                for chunk in export_users(format):
+                    file.write(chunk)
+            elapsed = time.perf_counter() - started
+            print(
+                f'export {format}: {args.rows} rows in {elapsed:.2f}s, {args.rows / elapsed:.0f} rows/s, '
+                f'max RSS {max_rss_mb():.0f}MB'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Cumulative import time (`python -X importtime`) of the graphql_auth modules imported
+by a project, after `django.setup()`, in fresh interpreters.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+from .base import get_argument_parser
+
+IMPORT_MARKER = 'graphql-auth-import-start'
+
+
+def get_import_times(module: str) -> dict[str, int]:
+    """
+    Import `module` after `django.setup()` in a fresh interpreter
+    with `-X importtime` and return the cumulative import time
+    (microseconds) of every module loaded by that import.
+    """
+    script = '\n'.join(
+        [
+            'import sys, django',
+            'django.setup()',
+            f'sys.stderr.write("{IMPORT_MARKER}\\n")',
+            f'import {module}',
+        ]
+    )
+    env = {
+        'DJANGO_SETTINGS_MODULE': 'test_project.settings',
+        **os.environ,
+        'PYTHONPATH': os.pathsep.join(path for path in sys.path if path),
+    }
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', script], env=env, capture_output=True, text=True, check=True
+    )
+    lines = process.stderr.split(IMPORT_MARKER, 1)[1].splitlines()
+    import_times = {}
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|')
+        import_times[name.strip()] = int(cumulative)
+    return import_times
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__)
+    parser.add_argument('--modules', nargs='+', default=['graphql_auth.mutations', 'graphql_auth.mixins'])
+    parser.set_defaults(iterations=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        times = [get_import_times(module)[module] / 1000 for _ in range(args.iterations)]
+        print(f'import {module}: median {statistics.median(times):.1f}ms, min {min(times):.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Registration throughput (requests per second) through the `register` mutation.
+"""
+from .base import benchmark_database, get_argument_parser, run_benchmark, setup_django
+
+REGISTER_MUTATION = """
+mutation {
+    register(email: "user%(index)d@email.com", username: "user%(index)d", password1: "%(password)s", password2: "%(password)s")
+    { success, errors }
+}
+"""
+
+
+def main() -> None:
+    args = get_argument_parser(__doc__).parse_args()
+    setup_django()
+
+    from django.test import Client
+    from graphene_django.utils.testing import graphql_query
+
+    with benchmark_database(fast_hasher=args.fast_hasher):
+        client = Client()
+
+        def register(index: int) -> None:
+            response = graphql_query(REGISTER_MUTATION % {'index': index, 'password': 'aaa&&111'}, client=client)
+            assert response.json()['data']['register']['success'], response.content
+
+        print(run_benchmark('register', register, args.iterations))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Time of building the full auth schema (AuthMutation + AuthRelayMutation) from scratch.
+"""
+import statistics
+import time
+
+from .base import get_argument_parser, setup_django
+
+
+def build_schema():
+    """Build the same schema as AuthMutation + AuthRelayMutation from scratch."""
+    import graphene
+    from graphene.utils.str_converters import to_snake_case
+
+    from graphql_auth import mutations, relay
+    from graphql_auth.utils import get_classes
+    from test_project.schema import Query
+
+    fields = {}
+    for name, mutation in get_classes(mutations, graphene.Mutation):
+        if mutation.__module__ == mutations.__name__:
+            fields[to_snake_case(name)] = mutation.Field()
+    for name, mutation in get_classes(relay, graphene.ClientIDMutation):
+        if mutation.__module__ == relay.__name__:
+            fields['relay_' + to_snake_case(name)] = mutation.Field()
+    mutation_type = type('BenchmarkMutation', (graphene.ObjectType,), fields)
+    return graphene.Schema(query=Query, mutation=mutation_type)
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__)
+    parser.set_defaults(iterations=10)
+    args = parser.parse_args()
+    setup_django()
+
+    started = time.perf_counter()
+    build_schema()
+    print(f'first build: {(time.perf_counter() - started) * 1000:.1f}ms')
+    times = []
+    for _ in range(args.iterations):
+        started = time.perf_counter()
+        build_schema()
+        times.append((time.perf_counter() - started) * 1000)
+    print(f'next builds: median {statistics.median(times):.1f}ms, max {max(times):.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Latency of the `username` `icontains` / `istartswith` filters (count and first page),
+with `UPPER(username) LIKE` only and through the trigram index of `graphql_auth.search`.
+"""
+import hashlib
+import time
+
+from .base import benchmark_database, get_argument_parser, run_benchmark, seed_users, setup_django
+
+SYLLABLES = [consonant + vowel for consonant in 'bcdfghjklmnprstvwxz' for vowel in 'aeiou']
+
+
+def username(index: int) -> str:
+    """Distinct, word like usernames, e.g. `kalomine42`."""
+    digest = hashlib.md5(str(index).encode()).digest()
+    return ''.join(SYLLABLES[byte % len(SYLLABLES)] for byte in digest[:4]) + str(index)
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    args = parser.parse_args()
+    setup_django()
+
+    from django.contrib.auth import get_user_model
+    from django.test.utils import override_settings
+
+    from graphql_auth.search import rebuild_search_index, search_users
+
+    UserModel = get_user_model()
+    terms = [
+        ('icontains', username(1234)[2:7]),
+        ('icontains', username(5678)[-6:-2]),
+        ('istartswith', username(4321)[:4]),
+        ('istartswith', 'zzz'),
+    ]
+
+    with benchmark_database(), override_settings(GRAPHQL_AUTH={'USER_SEARCH_FIELDS': ['username']}):
+        started = time.perf_counter()
+        seed_users(args.users, username=username)
+        print(f'seeded {args.users} users in {time.perf_counter() - started:.1f}s')
+        result = rebuild_search_index(batch_size=5000)
+        print(f'indexed {result.users} users ({result.grams} trigrams) in {result.seconds:.1f}s')
+
+        for lookup_expr, term in terms:
+
+            def like(_):
+                queryset = UserModel.objects.filter(**{f'username__{lookup_expr}': term}).order_by('pk')
+                return queryset.count(), list(queryset[:20])
+
+            def indexed(_):
+                queryset = search_users(UserModel.objects.order_by('pk'), 'username', term, lookup_expr)
+                return queryset.count(), list(queryset[:20])
+
+            print(f'{lookup_expr} {term!r}: {like(0)[0]} users')
+            print(run_benchmark('  like', like, args.iterations))
+            print(run_benchmark('  indexed', indexed, args.iterations))
+
+
+if __name__ == '__main__':
+    main()
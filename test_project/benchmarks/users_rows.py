@@ -0,0 +1,64 @@
+"""
+Latency and peak memory (tracemalloc) of large pages of the `users` connection,
+with model instances and with the lightweight rows of `USER_NODE_ROWS`.
+"""
+import time
+import tracemalloc
+
+from .base import benchmark_database, get_argument_parser, run_benchmark, seed_users, setup_django
+
+QUERY = '''
+query ($first: Int) {
+    users(first: $first, isActive: true) {
+        edges { node { id, username, email, isActive, verified, archived } }
+    }
+}
+'''
+
+
+def main() -> None:
+    parser = get_argument_parser(__doc__)
+    parser.set_defaults(iterations=20)
+    parser.add_argument('--page-size', type=int, default=10_000)
+    args = parser.parse_args()
+    setup_django()
+
+    import graphene
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+
+    from graphql_auth.queries import UserConnectionField, UserNode, UserQuery
+
+    class Query(UserQuery):
+        # the schema caps the pages at RELAY_CONNECTION_MAX_LIMIT
+        users = UserConnectionField(UserNode, max_limit=None)
+
+    schema = graphene.Schema(query=Query)
+
+    with benchmark_database():
+        started = time.perf_counter()
+        seed_users(args.page_size)
+        print(f'seeded {args.page_size} users in {time.perf_counter() - started:.1f}s')
+        request = RequestFactory().post('/graphql')
+        request.user = get_user_model().objects.create(username='staff', is_staff=True)
+
+        def users(_):
+            result = schema.execute(QUERY, variable_values={'first': args.page_size}, context_value=request)
+            assert not result.errors, result.errors
+            return result.data
+
+        for name, rows in (('instances', False), ('rows', True)):
+            with override_settings(GRAPHQL_AUTH={**settings.GRAPHQL_AUTH, 'USER_NODE_ROWS': rows}):
+                users(0)
+                tracemalloc.start()
+                users(0)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(run_benchmark(f'{name} ({args.page_size} users)', users, args.iterations))
+                print(f'  peak memory {peak / 2**20:.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from graphql_auth.status import copy_status_from_user_model, copy_status_to_user_model
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('custom_user', '0001_initial'),
+        ('graphql_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_status_to_user_model, copy_status_from_user_model),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_user', '0002_copy_user_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
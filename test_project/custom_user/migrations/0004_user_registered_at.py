@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-19 13:47
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('custom_user', '0003_user_archived_at_user_deactivated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='registered_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,7 @@
+from django.contrib.auth.models import AbstractUser
+
+from graphql_auth.status import UserStatusFieldsMixin
+
+
+class User(UserStatusFieldsMixin, AbstractUser):
+    pass
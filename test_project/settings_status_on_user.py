@@ -0,0 +1,12 @@
+"""
+Settings of the test project with the status fields on a custom user model
+(see `graphql_auth.status`), to run the tests with:
+
+    python manage.py test --settings=settings_status_on_user
+"""
+
+from settings import *  # noqa: F401, F403
+
+INSTALLED_APPS = [*INSTALLED_APPS, 'test_project.custom_user']  # noqa: F405
+
+AUTH_USER_MODEL = 'custom_user.User'
@@ -0,0 +1,141 @@
+"""
+Local stand-in SMTP server (in the spirit of `aiosmtpd`) for the tests of
+`graphql_auth.smtp`, running on its own event loop thread.
+"""
+import asyncio
+import base64
+import threading
+
+
+class StandInSMTPServer:
+    def __init__(self, pipelining=True, credentials=None, refused_recipients=()):
+        self.pipelining = pipelining
+        self.credentials = credentials
+        self.refused_recipients = set(refused_recipients)
+        # (mail_from, rcpt_tos, data) of the received messages
+        self.messages = []
+        self.connections = 0
+        # the commands received in each read, to check the pipelining
+        self.command_batches = []
+        self.port = None
+        self._writers = set()
+        self._received = threading.Condition()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self.handle, '127.0.0.1', 0), self._loop
+        ).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        self.drop_connections()
+
+        async def close():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def drop_connections(self):
+        """Close the open connections, like an idle timeout of the server."""
+
+        async def close():
+            for writer in list(self._writers):
+                writer.close()
+                await writer.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+
+    def wait_for_messages(self, count, timeout=5):
+        with self._received:
+            self._received.wait_for(lambda: len(self.messages) >= count, timeout)
+        return self.messages
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        session = {'authenticated': self.credentials is None, 'mail_from': None, 'rcpt_tos': [], 'data': None}
+        writer.write(b'220 stand-in ESMTP\r\n')
+        buffer = b''
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                *lines, buffer = buffer.split(b'\r\n')
+                commands = []
+                for line in lines:
+                    if session['data'] is not None:
+                        self.receive_data(session, line, writer)
+                        continue
+                    commands.append(line.decode())
+                    if not self.reply(session, line.decode(), writer):
+                        return
+                if commands:
+                    self.command_batches.append(commands)
+                await writer.drain()
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+            await writer.wait_closed()
+
+    def receive_data(self, session, line, writer):
+        if line != b'.':
+            session['data'].append(line[1:] if line.startswith(b'.') else line)
+            return
+        if session['rcpt_tos']:
+            with self._received:
+                self.messages.append((session['mail_from'], session['rcpt_tos'], b'\r\n'.join(session['data'])))
+                self._received.notify_all()
+            writer.write(b'250 OK\r\n')
+        else:
+            writer.write(b'554 No valid recipients\r\n')
+        session.update(mail_from=None, rcpt_tos=[], data=None)
+
+    def reply(self, session, line, writer):
+        verb, _, argument = line.partition(' ')
+        verb = verb.upper()
+        if verb == 'EHLO':
+            extensions = ['stand-in', 'AUTH PLAIN'] + (['PIPELINING'] if self.pipelining else [])
+            writer.write(
+                ''.join('250%s%s\r\n' % ('-' if i < len(extensions) - 1 else ' ', e) for i, e in enumerate(extensions))
+                .encode()
+            )
+        elif verb == 'AUTH':
+            _, username, password = base64.b64decode(argument.split(' ')[1]).decode().split('\0')
+            session['authenticated'] = (username, password) == self.credentials
+            writer.write(b'235 OK\r\n' if session['authenticated'] else b'535 Authentication failed\r\n')
+        elif verb in ('MAIL', 'RCPT', 'DATA') and not session['authenticated']:
+            writer.write(b'530 Authentication required\r\n')
+        elif verb == 'MAIL':
+            session['mail_from'] = argument[len('FROM:<') : -1]
+            writer.write(b'250 OK\r\n')
+        elif verb == 'RCPT':
+            address = argument[len('TO:<') : -1]
+            if address in self.refused_recipients:
+                writer.write(b'550 No such user\r\n')
+            else:
+                session['rcpt_tos'].append(address)
+                writer.write(b'250 OK\r\n')
+        elif verb == 'DATA':
+            if session['mail_from'] is None:
+                writer.write(b'503 Bad sequence of commands\r\n')
+            else:
+                session['data'] = []
+                writer.write(b'354 End data with <CR><LF>.<CR><LF>\r\n')
+        elif verb in ('RSET', 'NOOP'):
+            session.update(mail_from=None, rcpt_tos=[], data=None)
+            writer.write(b'250 OK\r\n')
+        elif verb == 'QUIT':
+            writer.write(b'221 Bye\r\n')
+            return False
+        else:
+            writer.write(b'500 Unknown command\r\n')
+        return True
@@ -1,9 +1,14 @@
 from copy import copy
+from datetime import timedelta
+from unittest import mock
 
 from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
 from django.test import TestCase
 
 from graphql_auth import settings
+from graphql_auth.types import ExpectedErrorType
+from test_project.pseudo_async_email_support import pseudo_async_email_support
 
 
 class AppSettingsTestCase(TestCase):
@@ -19,3 +24,101 @@ class AppSettingsTestCase(TestCase):
         graphql_auth.update({'ALLOW_LOGIN_NOT_VERIFIED': True})
         settings.reload_graphql_auth_settings(setting="GRAPHQL_AUTH", value=graphql_auth)
         self.assertTrue(settings.graphql_auth_settings.ALLOW_LOGIN_NOT_VERIFIED)
+
+    def test_settings_are_validated(self):
+        app_settings = settings.GraphQLAuthSettings({'EXPIRATION_ACTIVATION_TOKEN': 60})
+        self.assertEqual(app_settings.EXPIRATION_ACTIVATION_TOKEN, timedelta(seconds=60))
+
+        app_settings = settings.GraphQLAuthSettings({'LOGIN_ALLOWED_FIELDS': ('email',)})
+        self.assertEqual(app_settings.LOGIN_ALLOWED_FIELDS, ['email'])
+
+        app_settings = settings.GraphQLAuthSettings({'RETENTION_POLICIES': {'archived': 86400}})
+        self.assertEqual(app_settings.RETENTION_POLICIES, {'archived': timedelta(days=1)})
+
+        app_settings = settings.GraphQLAuthSettings({'UNVERIFIED_USER_EXPIRATION': 86400})
+        self.assertEqual(app_settings.UNVERIFIED_USER_EXPIRATION, timedelta(days=1))
+
+        for user_settings in [
+            {'ALLOW_LOGIN_NOT_VERIFIED': 'yes'},
+            {'EXPIRATION_PASSWORD_RESET_TOKEN': '1h'},
+            {'REGISTER_MUTATION_FIELDS': 'email'},
+            {'EMAIL_TEMPLATE_VARIABLES': []},
+            {'EMAIL_ASYNC_TASK': 1},
+            {'RETENTION_POLICIES': {'unverified': 86400}},
+            {'RETENTION_BATCH_SIZE': 0},
+            {'RETENTION_BATCH_PAUSE': '1s'},
+            {'UNVERIFIED_USER_EXPIRATION': '7d'},
+            {'UNVERIFIED_USER_EXPIRATION_ACTION': 'deactivate'},
+            {'EMAIL_COALESCE_WINDOW': '1m'},
+            {'EMAIL_LANES': {}},
+            {'EMAIL_LANES': {'urgent': ['password_reset']}},
+            {'EMAIL_LANES': {'urgent': {'actions': ['password_reset'], 'workers': 0}}},
+            {'USER_SEARCH_FIELDS': 'username'},
+            {'USERS_CACHE_TIMEOUT': '1m'},
+            {'USER_COUNTERS': 1},
+            {'USER_NODE_ROWS': 'yes'},
+        ]:
+            with self.subTest(user_settings=user_settings):
+                with self.assertRaises(ImproperlyConfigured):
+                    settings.GraphQLAuthSettings(user_settings).ALLOW_LOGIN_NOT_VERIFIED
+
+    def test_settings_are_read_only(self):
+        app_settings = settings.GraphQLAuthSettings({})
+        with self.assertRaises(AttributeError):
+            app_settings.ALLOW_LOGIN_NOT_VERIFIED = False
+        with self.assertRaisesMessage(AttributeError, 'Invalid graphql_auth setting: NOT_A_SETTING'):
+            app_settings.NOT_A_SETTING
+
+    def test_import_strings_are_resolved(self):
+        app_settings = settings.GraphQLAuthSettings(
+            {
+                'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+                'CUSTOM_ERROR_TYPE': 'graphql_auth.types.ExpectedErrorType',
+            }
+        )
+        self.assertTrue(app_settings.is_async_email)
+        self.assertIs(app_settings.async_email_func, pseudo_async_email_support)
+        self.assertIs(app_settings.output_error_type, ExpectedErrorType)
+
+        app_settings = settings.GraphQLAuthSettings({'EMAIL_ASYNC_TASK': False})
+        self.assertFalse(app_settings.is_async_email)
+        self.assertIsNone(app_settings.async_email_func)
+        self.assertIsNone(app_settings.output_error_type)
+
+    def test_invalid_reload_keeps_current_settings(self):
+        app_settings = settings.GraphQLAuthSettings({'EMAIL_ASYNC_TASK': False})
+        self.assertIsNone(app_settings.async_email_func)
+        with self.assertRaises(ImproperlyConfigured):
+            app_settings.reload({'ALLOW_DELETE_ACCOUNT': 1})
+        self.assertFalse(app_settings.ALLOW_DELETE_ACCOUNT)
+
+        app_settings.reload({'EMAIL_ASYNC_TASK': pseudo_async_email_support})
+        self.assertIs(app_settings.async_email_func, pseudo_async_email_support)
+
+    def test_reload_during_resolution(self):
+        app_settings = settings.GraphQLAuthSettings(
+            {'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support'}
+        )
+
+        def import_string(path):
+            # another thread reloads the settings meanwhile
+            app_settings.reload({'EMAIL_ASYNC_TASK': False})
+            return pseudo_async_email_support
+
+        with mock.patch('graphql_auth.settings.import_string', import_string):
+            self.assertIs(app_settings.async_email_func, pseudo_async_email_support)
+        # the function of the former settings is not cached
+        self.assertIsNone(app_settings.async_email_func)
+
+    def test_reload_swaps_snapshot(self):
+        app_settings = settings.GraphQLAuthSettings({'EMAIL_ASYNC_TASK': pseudo_async_email_support})
+        snapshot = app_settings.snapshot
+        app_settings.reload({'EMAIL_ASYNC_TASK': False, 'EMAIL_LANES': {'all': {'actions': []}}})
+        # a reader holding the former snapshot keeps consistent settings
+        self.assertIs(snapshot.async_email_func, pseudo_async_email_support)
+        self.assertIn('urgent', snapshot.EMAIL_LANES)
+        self.assertIsNot(app_settings.snapshot, snapshot)
+        self.assertIsNone(app_settings.async_email_func)
+        self.assertEqual(list(app_settings.EMAIL_LANES), ['all'])
+        with self.assertRaises(AttributeError):
+            snapshot.EMAIL_OUTBOX = True
@@ -0,0 +1,101 @@
+from concurrent.futures import Future
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import override_settings
+
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.metrics import get_registry
+from graphql_auth.models import UserStatus
+
+COALESCING_SETTINGS = {
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+    'EMAIL_COALESCE_WINDOW': 60,
+    'METRICS_REGISTRY': 'graphql_auth.metrics.InMemoryRegistry',
+}
+
+
+@override_settings(GRAPHQL_AUTH=COALESCING_SETTINGS)
+class EmailCoalescingTestCase(CommonTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = self.create_user(email='foo@email.com', username='foo')
+        self.verified_user = self.create_user(
+            email='bar@email.com', username='bar', verified=True, secondary_email='bar_secondary@email.com'
+        )
+
+    def request(self, mutation, email):
+        response = self.query('mutation { %s(email: "%s") { success, errors } }' % (mutation, email))
+        return response.json()['data'][mutation]
+
+    def test_resend_activation_email(self):
+        for _ in range(3):
+            self.assertEqual(self.request('resendActivationEmail', 'foo@email.com'), {'success': True, 'errors': None})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            get_registry().get_counter(
+                'graphql_auth_email_coalesced_total', mutation='ResendActivationEmail', action='activation'
+            ),
+            2,
+        )
+
+    def test_window_per_user_and_action(self):
+        self.request('sendPasswordResetEmail', 'bar@email.com')
+        self.request('sendPasswordResetEmail', 'bar_secondary@email.com')
+        self.request('sendPasswordResetEmail', 'foo@email.com')
+        self.request('resendActivationEmail', 'foo@email.com')
+        self.request('sendPasswordResetEmail', 'BAR@email.com')
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['bar@email.com'], ['bar_secondary@email.com'], ['foo@email.com'], ['foo@email.com']],
+        )
+
+    def test_window_expired(self):
+        self.request('sendPasswordResetEmail', 'bar@email.com')
+        cache.clear()
+        self.request('sendPasswordResetEmail', 'bar@email.com')
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_failed_email_is_not_coalesced(self):
+        with mock.patch('graphql_auth.models.UserStatus.send', side_effect=SMTPException):
+            self.assertFalse(self.request('sendPasswordResetEmail', 'bar@email.com')['success'])
+        self.assertTrue(self.request('sendPasswordResetEmail', 'bar@email.com')['success'])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_async_email_is_not_coalesced(self):
+        def failing_task(func, args):
+            # the worker fails, the request has returned
+            with mock.patch('graphql_auth.models.UserStatus.send', side_effect=SMTPException):
+                try:
+                    func(*args)
+                except SMTPException:
+                    pass
+
+        with mock.patch('graphql_auth.mixins.async_email_func', failing_task):
+            self.assertTrue(self.request('sendPasswordResetEmail', 'bar@email.com')['success'])
+        self.assertTrue(self.request('sendPasswordResetEmail', 'bar@email.com')['success'])
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_delivery_is_not_coalesced(self):
+        delivery = Future()
+
+        def task(func, args):
+            func(*args, connection=mock.Mock(futures=[delivery]))
+
+        with mock.patch('graphql_auth.mixins.async_email_func', task):
+            with mock.patch('graphql_auth.models.UserStatus.send'):
+                self.request('sendPasswordResetEmail', 'bar@email.com')
+                self.request('sendPasswordResetEmail', 'bar@email.com')
+                self.assertEqual(UserStatus.send.call_count, 1)
+                delivery.set_exception(SMTPException())
+                self.request('sendPasswordResetEmail', 'bar@email.com')
+                self.assertEqual(UserStatus.send.call_count, 2)
+
+    @override_settings(GRAPHQL_AUTH={**COALESCING_SETTINGS, 'EMAIL_COALESCE_WINDOW': None})
+    def test_disabled(self):
+        self.request('resendActivationEmail', 'foo@email.com')
+        self.request('resendActivationEmail', 'foo@email.com')
+        self.assertEqual(len(mail.outbox), 2)
@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase
+from graphene_django.utils import camelize
+
+from graphql_auth.constants import Messages
+from graphql_auth.forms import EmailForm
+from graphql_auth.types import ExpectedErrorType
+
+
+class ExpectedErrorTypeTestCase(SimpleTestCase):
+    def test_messages_are_serialized_as_is(self):
+        self.assertIs(ExpectedErrorType.serialize(Messages.INVALID_CREDENTIALS), Messages.INVALID_CREDENTIALS)
+        self.assertEqual(ExpectedErrorType.serialize(Messages.EMAIL_IN_USE), camelize(dict(Messages.EMAIL_IN_USE)))
+
+    def test_messages_are_read_only(self):
+        with self.assertRaises(TypeError):
+            Messages.INVALID_CREDENTIALS['code'] = 'other'  # type: ignore
+        with self.assertRaises(TypeError):
+            Messages.INVALID_CREDENTIALS.pop('code')
+        self.assertEqual(Messages.INVALID_CREDENTIALS['code'], 'invalid_credentials')
+
+    def test_nested_messages(self):
+        errors = {'old_password': Messages.INVALID_PASSWORD}
+        serialized = ExpectedErrorType.serialize(errors)
+        self.assertEqual(serialized, {'oldPassword': Messages.INVALID_PASSWORD})
+        self.assertIs(serialized['oldPassword'], Messages.INVALID_PASSWORD)
+
+    def test_form_errors_are_not_mutated(self):
+        form = EmailForm({'email': 'not-an-email'})
+        self.assertFalse(form.is_valid())
+        form.add_error(None, 'Non field error.')
+        serialized = ExpectedErrorType.serialize(form.errors)
+        self.assertEqual(
+            serialized,
+            {'email': ['Enter a valid email address.'], 'nonFieldErrors': ['Non field error.']},
+        )
+        self.assertIn('__all__', form.errors)
+        self.assertNotIn('non_field_errors', form.errors)
+
+    def test_list_errors(self):
+        self.assertEqual(ExpectedErrorType.serialize(['error']), {'nonFieldErrors': ['error']})
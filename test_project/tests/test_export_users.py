@@ -0,0 +1,116 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from graphql_jwt.shortcuts import get_token
+
+from graphql_auth.bulk import export_users, get_export_columns
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+UserModel = get_user_model()
+
+
+class ExportUsersTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(5):
+            user = UserModel.objects.create(username='user%d' % i, email='user%d@email.com' % i)
+            user.status.verified = i % 2 == 0  # type: ignore
+            user.status.secondary_email = 'secondary%d@email.com' % i if i == 3 else None  # type: ignore
+            user.status.save()  # type: ignore
+        cls.staff = UserModel.objects.create(username='staff', email='staff@email.com', is_staff=True)
+
+    def read_csv(self, content: str) -> list[dict]:
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_columns(self):
+        columns = get_export_columns()
+        self.assertNotIn('password', columns)
+        self.assertNotIn('is_superuser', columns)
+        self.assertEqual(
+            columns[-6:], ['verified', 'archived', 'secondary_email', 'archived_at', 'deactivated_at', 'registered_at']
+        )
+        with override_settings(GRAPHQL_AUTH={'USER_NODE_EXCLUDE_FIELDS': ['password', 'last_login', 'archived']}):
+            columns = get_export_columns()
+        self.assertIn('is_superuser', columns)
+        self.assertNotIn('last_login', columns)
+        self.assertNotIn('archived', columns)
+
+    def test_export_csv_in_chunks(self):
+        # one query for all the rows, no status query per user
+        with self.assertNumQueries(1):
+            chunks = list(export_users('csv', chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+        rows = self.read_csv(''.join(chunks))
+        self.assertEqual([row['username'] for row in rows], ['user0', 'user1', 'user2', 'user3', 'user4', 'staff'])
+        self.assertEqual(rows[0]['verified'], 'True')
+        self.assertEqual(rows[1]['verified'], 'False')
+        self.assertEqual(rows[3]['secondary_email'], 'secondary3@email.com')
+        self.assertEqual(rows[0]['secondary_email'], '')
+
+    def test_export_jsonl(self):
+        lines = ''.join(export_users('jsonl', queryset=UserModel.objects.filter(username='user3'))).splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual(
+            (row['username'], row['verified'], row['archived'], row['secondary_email']),
+            ('user3', False, False, 'secondary3@email.com'),
+        )
+        self.assertNotIn('password', row)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_users('xml')
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_export_parquet(self):
+        content = b''.join(export_users('parquet', chunk_size=2))
+        table = pyarrow.parquet.read_table(io.BytesIO(content))
+        self.assertEqual(table.num_rows, 6)
+        self.assertEqual(table.column('verified').to_pylist()[:2], [True, False])
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            call_command('export_users', path, '--chunk-size', '2', stderr=io.StringIO())
+            with open(path, newline='') as file:
+                rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 6)
+
+    def test_command_to_stdout(self):
+        stdout = io.StringIO()
+        call_command('export_users', '--format', 'jsonl', stdout=stdout)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 6)
+
+    def test_view_requires_staff_user(self):
+        self.assertEqual(self.client.get('/users/export').status_code, 403)
+        self.client.force_login(UserModel.objects.get(username='user0'))
+        self.assertEqual(self.client.get('/users/export').status_code, 403)
+
+    def test_view(self):
+        self.client.force_login(self.staff)
+        response = self.client.get('/users/export')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = self.read_csv(b''.join(response.streaming_content).decode())  # type: ignore
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(self.client.get('/users/export?format=xml').status_code, 400)
+
+    def test_view_with_token(self):
+        response = self.client.get(
+            '/users/export?format=jsonl', HTTP_AUTHORIZATION='JWT %s' % get_token(self.staff)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 6)  # type: ignore
+        response = self.client.get('/users/export', HTTP_AUTHORIZATION='JWT invalid')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+# modules that must be loaded on first use only, not when importing mutations
+LAZY_MODULES = [
+    'graphql_auth.forms',
+    'graphql_auth.queries',
+    'graphql_auth.connection',
+    'django.contrib.auth.forms',
+]
+
+
+def get_imported_modules(module: str) -> set[str]:
+    """
+    Import `module` after `django.setup()` in a fresh interpreter
+    and return the modules loaded by that import.
+    """
+    script = '\n'.join(
+        [
+            'import json, sys, django',
+            'django.setup()',
+            'loaded = set(sys.modules)',
+            f'import {module}',
+            'print(json.dumps(sorted(set(sys.modules) - loaded)))',
+        ]
+    )
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(path for path in sys.path if path)}
+    process = subprocess.run([sys.executable, '-c', script], env=env, capture_output=True, text=True, check=True)
+    return set(json.loads(process.stdout))
+
+
+class ImportTimeTestCase(SimpleTestCase):
+    """
+    The import time itself is measured by `test_project.benchmarks.import_time`.
+    """
+
+    def test_mutations_import_is_lazy(self):
+        modules = get_imported_modules('graphql_auth.mutations')
+        self.assertIn('graphql_auth.mutations', modules)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
+
+    def test_mixins_import_is_lazy(self):
+        modules = get_imported_modules('graphql_auth.mixins')
+        self.assertIn('graphql_auth.mixins', modules)
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules)
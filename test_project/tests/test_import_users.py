@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from graphql_auth.bulk import import_users, read_users
+from graphql_auth.status import status_on_user_model
+from graphql_auth.utils import EmailInfo
+
+UserModel = get_user_model()
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'users.json')
+
+# MD5 to hash fast, PBKDF2 to keep the hashed passwords of users.json
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher', 'django.contrib.auth.hashers.PBKDF2PasswordHasher']
+
+CSV_USERS = '''username,email,password,verified,archived,secondary_email,is_staff
+foo,foo@email.com,very-strong-password,true,false,foo@secondary.com,1
+bar,bar@email.com,,f,t,,0
+'''
+
+
+@override_settings(PASSWORD_HASHERS=PASSWORD_HASHERS)
+class ImportUsersTestCase(TestCase):
+    def test_import_csv(self):
+        result = import_users(read_users(io.StringIO(CSV_USERS), 'csv'), workers=0)
+        self.assertEqual((result.created, result.skipped), (2, 0))
+        foo = UserModel.objects.get(username='foo')
+        self.assertTrue(foo.check_password('very-strong-password'))
+        self.assertTrue(foo.is_staff)
+        self.assertEqual(
+            (foo.status.verified, foo.status.archived, foo.status.secondary_email),  # type: ignore
+            (True, False, 'foo@secondary.com'),
+        )
+        bar = UserModel.objects.get(username='bar')
+        self.assertFalse(bar.has_usable_password())
+        self.assertEqual((bar.status.verified, bar.status.archived), (False, True))  # type: ignore
+        self.assertIsNone(bar.status.secondary_email)  # type: ignore
+
+    def test_import_fixture(self):
+        with open(FIXTURE_PATH) as file:
+            records = json.load(file)
+        result = import_users(records, batch_size=2, workers=0)
+        self.assertEqual((result.created, result.skipped), (4, 0))
+        user = UserModel.objects.get(username='user1')
+        # hashed passwords are kept as they are
+        self.assertEqual(user.password, records[0]['fields']['password'])
+        self.assertEqual(
+            [
+                (user.status.verified, user.status.archived, user.status.secondary_email)  # type: ignore
+                for user in UserModel.objects.order_by('username')
+            ],
+            [(False, False, None), (True, False, None), (True, True, None), (True, False, 'user4_secondary@email.com')],
+        )
+
+    def test_fixture_statuses_before_users(self):
+        records = [
+            {'model': 'graphql_auth.userstatus', 'pk': 1, 'fields': {'user': 7, 'verified': True}},
+            {'model': 'graphql_auth.userstatus', 'pk': 2, 'fields': {'user': 8, 'verified': True}},
+            {'model': 'auth.user', 'pk': 7, 'fields': {'username': 'foo', 'email': 'foo@email.com'}},
+        ]
+        result = import_users(records, workers=0)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [(2, 'User of the status does not exist.')])
+        self.assertTrue(UserModel.objects.get(username='foo').status.verified)  # type: ignore
+
+    def test_import_jsonl_with_process_pool(self):
+        lines = '\n'.join(
+            json.dumps({'username': 'user%d' % i, 'email': 'user%d@email.com' % i, 'password': 'password%d' % i})
+            for i in range(4)
+        )
+        result = import_users(read_users(io.StringIO(lines), 'jsonl'), workers=2)
+        self.assertEqual(result.created, 4)
+        self.assertTrue(UserModel.objects.get(username='user3').check_password('password3'))
+
+    def test_collisions_are_skipped(self):
+        existing = UserModel.objects.create(username='existing', email='existing@email.com')
+        existing.status.secondary_email = 'taken@email.com'  # type: ignore
+        existing.status.save()  # type: ignore
+        records = [
+            {'username': 'Existing', 'email': 'new@email.com'},
+            {'username': 'new1', 'email': 'EXISTING@email.com'},
+            {'username': 'new2', 'email': 'taken@email.com'},
+            {'username': 'new3', 'email': 'new3@email.com', 'secondary_email': 'new3@email.com'},
+            {'username': 'new4', 'email': 'new4@email.com'},
+            {'username': 'new5', 'email': 'new4@email.com'},
+            {'username': 'new6', 'unknown': 'value'},
+            {'username': 'new7', 'email': 'not-an-email'},
+        ]
+        # 1 prefetch, SAVEPOINT, INSERT users, INSERT statuses (unless on the user model), RELEASE
+        with self.assertNumQueries(4 if status_on_user_model() else 5):
+            result = import_users(records, workers=0)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([number for number, _ in result.errors], [1, 2, 3, 4, 6, 7, 8])
+        self.assertEqual(result.errors[1][1], 'A user with that email already exists.')
+        self.assertTrue(UserModel.objects.filter(username='new4').exists())
+
+    def test_required_fields(self):
+        records = [
+            {'email': 'foo@email.com'},
+            {'username': 'bar'},
+            {'username': 'baz', 'email': ''},
+            {'username': 'qux', 'email': 'qux@email.com'},
+        ]
+        result = import_users(records, workers=0)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            result.errors,
+            [
+                (1, 'Missing required fields: username.'),
+                (2, 'Missing required fields: email.'),
+                (3, 'Missing required fields: email.'),
+            ],
+        )
+
+    def test_activation_emails(self):
+        records = [
+            {'username': 'foo', 'email': 'foo@email.com'},
+            {'username': 'bar', 'email': 'bar@email.com', 'verified': True},
+        ]
+        with override_settings(GRAPHQL_AUTH={}):  # without EMAIL_ASYNC_TASK, over one connection
+            result = import_users(records, workers=0, info=EmailInfo('testserver', secure=True))
+        self.assertEqual(result.emails_sent, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['foo@email.com'])
+        self.assertIn('https://testserver/activate/', mail.outbox[0].body)
+
+
+@override_settings(PASSWORD_HASHERS=PASSWORD_HASHERS)
+class ImportUsersCommandTestCase(TestCase):
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as file:
+            file.write(CSV_USERS + 'foo,other@email.com,,,,,\n')
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_users', file.name, '--workers', '0', stdout=stdout, stderr=stderr)
+        self.assertIn('Imported 2 users, skipped 1', stdout.getvalue())
+        self.assertIn('Record 3 skipped: A user with that username already exists.', stderr.getvalue())
+        self.assertEqual(UserModel.objects.count(), 2)
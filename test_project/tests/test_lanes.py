@@ -0,0 +1,81 @@
+import io
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from graphql_auth.constants import TokenAction
+from graphql_auth.lanes import get_email_action, get_email_lane, get_lane, lane_email_task, lane_executor
+from graphql_auth.models import EmailOutbox, UserStatus
+from graphql_auth.outbox import dispatch_emails, enqueue_email, send_outbox_email
+from graphql_auth.utils import EmailInfo
+
+UserModel = get_user_model()
+
+LANES_SETTINGS = {
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+    'EMAIL_OUTBOX': True,
+    'EMAIL_OUTBOX_DISPATCH_ON_COMMIT': False,
+    'EMAIL_LANES': {
+        'urgent': {'actions': [TokenAction.PASSWORD_RESET], 'workers': 1, 'priority': 0},
+        'bulk': {'actions': [TokenAction.ACTIVATION], 'workers': 1, 'priority': 5},
+    },
+}
+
+
+@override_settings(GRAPHQL_AUTH=LANES_SETTINGS)
+class LanesTestCase(TestCase):
+    def setUp(self):
+        self.addCleanup(lane_executor.shutdown)
+
+    def test_lanes(self):
+        self.assertEqual(get_lane(TokenAction.PASSWORD_RESET).name, 'urgent')
+        self.assertEqual(get_lane(TokenAction.ACTIVATION).name, 'bulk')
+        # unlisted actions go to the last lane
+        self.assertEqual(get_lane(TokenAction.PASSWORD_SET).name, 'bulk')
+        self.assertEqual(get_email_action(UserStatus().send_password_reset_email, ()), TokenAction.PASSWORD_RESET)
+        self.assertEqual(get_email_action(send_outbox_email, (1, 'resend_activation_email')), TokenAction.ACTIVATION)
+        self.assertEqual(get_email_lane(UserStatus().send_activation_email, ()).priority, 5)
+
+    def test_lane_email_task(self):
+        release = threading.Event()
+        sent = []
+
+        def resend_activation_email(index):
+            release.wait(5)
+            sent.append(('activation', index))
+
+        def send_password_reset_email():
+            sent.append(('password_reset', 0))
+
+        activations = [lane_email_task(resend_activation_email, (index,)) for index in range(100)]
+        # not queued behind the activations
+        lane_email_task(send_password_reset_email, ()).result(5)
+        self.assertEqual(sent, [('password_reset', 0)])
+        release.set()
+        for future in activations:
+            future.result(5)
+        self.assertEqual(len(sent), 101)
+
+    def test_outbox_priority(self):
+        info = EmailInfo('testserver')
+        users = [
+            UserModel.objects.create(username='foo%s' % index, email='foo%s@email.com' % index) for index in range(3)
+        ]
+        for user in users:
+            enqueue_email(user, 'resend_activation_email', info)
+        enqueue_email(users[0], 'send_password_reset_email', info, ['foo0@email.com'])
+        self.assertEqual(list(EmailOutbox.objects.order_by('pk').values_list('priority', flat=True)), [5, 5, 5, 0])
+        out = io.StringIO()
+        call_command('send_outbox_emails', '--lane', 'urgent', stdout=out)
+        self.assertIn('Sent 1 emails', out.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['foo0@email.com'])
+        dispatch_emails(batch_size=2)
+        self.assertEqual(len(mail.outbox), 4)
+
+    def test_unknown_lane(self):
+        with self.assertRaisesMessage(Exception, 'Unknown lanes: other.'):
+            call_command('send_outbox_emails', '--lane', 'other', stdout=io.StringIO())
@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+
+from graphql_auth.bulk import import_users
+from graphql_auth.common_testcase import _DJANGO_VERSION_AT_LEAST_4_2, CommonTestCase
+from graphql_auth.models import UserStatus, bump_version
+from graphql_auth.retention import archive_users
+from graphql_auth.status import status_on_user_model
+from graphql_auth.utils import get_token
+from graphql_auth.views import get_me_etag
+
+UserModel = get_user_model()
+
+ME_QUERY = 'query { me { username, verified, version } }'
+
+
+class MeVersionTestCase(CommonTestCase):
+    def setUp(self):
+        self.user = self.create_user(
+            email="foo@email.com", username="foo", verified=True, secondary_email="secondary@email.com"
+        )
+
+    def get_version(self):
+        self.user.refresh_from_db()
+        return UserStatus.get_for_user(self.user).version
+
+    def get_if_none_match_header(self, etag):
+        key = 'If-None-Match' if _DJANGO_VERSION_AT_LEAST_4_2 else 'HTTP_IF_NONE_MATCH'
+        return {key: etag}
+
+    def test_mutations_bump_version(self):
+        self.client.force_login(self.user)
+        version = self.get_version()
+        self.query('mutation { updateAccount(firstName: "bar") { success } }')
+        self.assertEqual(self.get_version(), version + 1)
+        self.query('mutation { swapEmails(password: "%s") { success } }' % self.default_password)
+        self.assertEqual(self.get_version(), version + 2)
+        UserStatus.archive(self.user)
+        self.assertEqual(self.get_version(), version + 3)
+        # the cached instances read the new version
+        self.assertEqual(self.user.status.version, version + 3)  # type: ignore
+        bump_version(self.user)
+        self.assertEqual(self.user.status.version, version + 4)  # type: ignore
+
+    def test_writes_without_mutations_bump_version(self):
+        version = self.get_version()
+        archive_users([self.user.pk])
+        self.assertEqual(self.get_version(), version + 1)
+        records = [
+            {'model': 'auth.user', 'pk': 7, 'fields': {'username': 'bar', 'email': 'bar@email.com'}},
+            {'model': 'graphql_auth.userstatus', 'fields': {'user': 7, 'verified': True}},
+        ]
+        import_users(records, batch_size=1, workers=0)
+        bar = UserModel.objects.get(username='bar')
+        self.assertTrue(bar.status.verified)  # type: ignore
+        self.assertEqual(UserStatus.get_for_user(bar).version, 1)
+
+    def test_verify_bumps_version(self):
+        user = self.create_user(email="bar@email.com", username="bar")
+        version = UserStatus.get_for_user(user).version
+        UserStatus.verify(get_token(user, 'activation'))
+        user.refresh_from_db()
+        self.assertEqual(UserStatus.get_for_user(user).version, version + 1)
+
+    def test_me_if_modified(self):
+        query = 'query { meIfModified(version: %s) { notModified, version, user { username } } }'
+        response = self.query(query % 0)
+        self.assertIsNone(response.json()['data']['meIfModified'])
+
+        self.client.force_login(self.user)
+        version = self.get_version()
+        result = self.query(query % (version + 1)).json()['data']['meIfModified']
+        self.assertEqual(result, {'notModified': False, 'version': version, 'user': {'username': 'foo'}})
+        result = self.query(query % version).json()['data']['meIfModified']
+        self.assertEqual(result, {'notModified': True, 'version': version, 'user': None})
+
+    def test_conditional_me_view(self):
+        self.client.force_login(self.user)
+        response = self.query(ME_QUERY)
+        etag = response['ETag']
+        self.assertEqual(response.json()['data']['me']['version'], self.get_version())
+        self.assertIn('private', response['Cache-Control'])
+
+        with self.assertNumQueries(2 if status_on_user_model() else 3):
+            # session, user and status, the query is not executed
+            response = self.query(ME_QUERY, headers=self.get_if_none_match_header(etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # other fields, other response
+        response = self.query('query { me { username } }', headers=self.get_if_none_match_header(etag))
+        self.assertEqual(response.status_code, 200)
+
+        UserStatus.archive(self.user)
+        response = self.query(ME_QUERY, headers=self.get_if_none_match_header(etag))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_get_me_etag(self):
+        factory = RequestFactory()
+        request = factory.get('/graphql', {'query': ME_QUERY})
+        request.user = self.user
+        self.assertTrue(get_me_etag(request).startswith('"%s-' % self.user.pk))
+        for query in [
+            'query { me { username }, users { totalCount } }',
+            'mutation { archiveAccount(password: "x") { success } }',
+            'query { ...F } fragment F on Query { me { username } }',
+            'query {',
+        ]:
+            request = factory.get('/graphql', {'query': query})
+            request.user = self.user
+            self.assertIsNone(get_me_etag(request), query)
+        # anonymous
+        request = factory.get('/graphql', {'query': ME_QUERY})
+        self.assertIsNone(get_me_etag(request))
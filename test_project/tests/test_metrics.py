@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.metrics import NULL_REGISTRY, InMemoryRegistry, get_outcome, get_registry, timer
+from graphql_auth.settings import graphql_auth_settings as app_settings
+
+METRICS_SETTINGS = {
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+    'METRICS_REGISTRY': 'graphql_auth.metrics.InMemoryRegistry',
+}
+
+
+class MetricsTestCase(CommonTestCase):
+    def setUp(self):
+        self.user = self.create_user(email='foo@email.com', username='foo', verified=True)
+
+    def login(self, password=None):
+        return self.query(
+            """
+            mutation {
+                tokenAuth(username: "foo", password: "%s") { success, errors, token }
+            }
+            """
+            % (password or self.default_password)
+        )
+
+    def test_no_op_by_default(self):
+        self.assertIs(get_registry(), NULL_REGISTRY)
+        self.assertFalse(get_registry().enabled)
+        with timer('password_hash'):
+            pass
+
+    @override_settings(GRAPHQL_AUTH=METRICS_SETTINGS)
+    def test_mutation_metrics(self):
+        registry = get_registry()
+        self.assertIsInstance(registry, InMemoryRegistry)
+        self.assertIs(get_registry(), registry)
+        with CaptureQueriesContext(connection) as context:
+            self.login()
+            self.login(password='wrong')
+        for outcome in ('success', 'invalid_credentials'):
+            with self.subTest(outcome=outcome):
+                self.assertEqual(
+                    registry.get_counter('graphql_auth_mutation_total', mutation='ObtainJSONWebToken', outcome=outcome),
+                    1,
+                )
+        latency = registry.get_histogram('graphql_auth_mutation_seconds', mutation='ObtainJSONWebToken')
+        self.assertEqual(latency.count, 2)
+        self.assertGreater(latency.sum, 0)
+        queries = registry.get_histogram('graphql_auth_mutation_db_queries', mutation='ObtainJSONWebToken')
+        self.assertEqual(queries.sum, len(context.captured_queries))
+        authenticate = registry.get_histogram(
+            'graphql_auth_stage_seconds', mutation='ObtainJSONWebToken', stage='authenticate'
+        )
+        self.assertEqual(authenticate.count, 2)
+        export = registry.export()
+        self.assertIn('graphql_auth_mutation_total{mutation="ObtainJSONWebToken",outcome="success"} 1', export)
+        self.assertIn('graphql_auth_mutation_seconds_count{mutation="ObtainJSONWebToken"} 2', export)
+
+    @override_settings(GRAPHQL_AUTH=METRICS_SETTINGS)
+    def test_relay_mutation_stages(self):
+        self.query(
+            """
+            mutation {
+                relayRegister(input: {email: "bar@email.com", username: "bar",
+                    password1: "%s", password2: "%s"}) { success, errors }
+            }
+            """
+            % (self.default_password, self.default_password)
+        )
+        registry = app_settings.metrics_registry
+        self.assertEqual(registry.get_counter('graphql_auth_mutation_total', mutation='Register', outcome='success'), 1)
+        for stage in ('password_hash', 'token_sign', 'email_render', 'email_send'):
+            with self.subTest(stage=stage):
+                histogram = registry.get_histogram('graphql_auth_stage_seconds', mutation='Register', stage=stage)
+                self.assertEqual(histogram.count, 1)
+
+    @override_settings(GRAPHQL_AUTH=METRICS_SETTINGS)
+    def test_exception_outcome(self):
+        self.query('mutation { archiveAccount(password: "%s") { success } }' % self.default_password)
+        registry = get_registry()
+        self.assertEqual(
+            registry.get_counter('graphql_auth_mutation_total', mutation='ArchiveAccount', outcome='unauthenticated'), 1
+        )
+
+    def test_outcome_of_form_errors(self):
+        class Output:
+            success = False
+            errors = {'password2': [{'message': "The two password fields didn't match.", 'code': 'password_mismatch'}]}
+
+        self.assertEqual(get_outcome(Output), 'password_mismatch')
+        Output.errors = None
+        self.assertEqual(get_outcome(Output), 'error')
@@ -0,0 +1,140 @@
+import io
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.models import EmailOutbox
+from graphql_auth.outbox import _claim_due_emails, dispatch_emails, enqueue_email, get_retry_delay
+from graphql_auth.utils import EmailInfo
+
+OUTBOX_SETTINGS = {
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+    'EMAIL_OUTBOX': True,
+}
+
+
+@override_settings(GRAPHQL_AUTH=OUTBOX_SETTINGS)
+class OutboxTestCase(CommonTestCase):
+    def register(self, username='foo'):
+        response = self.query(
+            'mutation { register(email: "%s@email.com", username: "%s", password1: "%s", password2: "%s")'
+            ' { success, errors } }' % (username, username, self.default_password, self.default_password)
+        )
+        return response.json()['data']['register']
+
+    def resend_activation_email(self, email='foo@email.com'):
+        response = self.query('mutation { resendActivationEmail(email: "%s") { success, errors } }' % email)
+        return response.json()['data']['resendActivationEmail']
+
+    def test_sent_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertTrue(self.register()['success'])
+            self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['foo@email.com'])
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.SENT)
+        self.assertEqual(email.method, 'send_activation_email')
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+
+    @mock.patch('graphql_auth.models.UserStatus.send_activation_email', mock.MagicMock(side_effect=SMTPException))
+    def test_send_failure_keeps_registration(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = self.register()
+        self.assertTrue(result['success'])
+        self.assertIsNone(result['errors'])
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.last_error, 'SMTPException: ')
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=25))
+
+    def test_left_to_worker_without_async_task(self):
+        with override_settings(GRAPHQL_AUTH={'EMAIL_OUTBOX': True}):
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.assertTrue(self.register()['success'])
+        self.assertEqual(callbacks, [])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.PENDING)
+        self.assertEqual(dispatch_emails().sent, 1)
+
+    def test_dispatch_failure_logged(self):
+        with mock.patch('graphql_auth.outbox.async_email_func', side_effect=RuntimeError('queue down')):
+            with self.assertLogs('graphql_auth.outbox', 'ERROR') as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.assertTrue(self.register()['success'])
+        self.assertIn('RuntimeError: queue down', logs.output[0])
+        self.assertEqual(EmailOutbox.objects.get().status, EmailOutbox.PENDING)
+
+    def test_retry_with_backoff(self):
+        user = self.create_user(username='foo', email='foo@email.com')
+        email = enqueue_email(user, 'resend_activation_email', EmailInfo('testserver', True))
+        self.assertEqual(get_retry_delay(1), timedelta(seconds=30))
+        self.assertEqual(get_retry_delay(3), timedelta(seconds=120))
+        with mock.patch('graphql_auth.models.UserStatus.send', side_effect=SMTPException):
+            result = dispatch_emails()
+            self.assertEqual((result.sent, result.retried, result.failed), (0, 1, 0))
+            # not due yet
+            self.assertEqual(dispatch_emails().retried, 0)
+            for attempt in range(2, 6):
+                EmailOutbox.objects.update(next_attempt_at=timezone.now())
+                result = dispatch_emails()
+        self.assertEqual((result.retried, result.failed), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, EmailOutbox.FAILED)
+        self.assertEqual(email.attempts, 5)
+
+        email = enqueue_email(user, 'resend_activation_email', EmailInfo('testserver', True))
+        self.assertEqual(dispatch_emails().sent, 1)
+        self.assertIn('https://', mail.outbox[0].body)
+
+    def test_claimed_once(self):
+        user = self.create_user(username='foo', email='foo@email.com')
+        enqueue_email(user, 'resend_activation_email', EmailInfo('testserver', True))
+        stale = list(EmailOutbox.objects.select_related('user'))
+        # another dispatcher, without skip_locked, claims the row read by this one
+        self.assertEqual(dispatch_emails().sent, 1)
+        EmailOutbox.objects.update(status=EmailOutbox.PENDING, next_attempt_at=timezone.now())
+        with mock.patch('graphql_auth.outbox._lock_due_emails', return_value=stale):
+            self.assertEqual(dispatch_emails().sent, 0)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(EmailOutbox.objects.get().attempts, 1)
+
+        # claimed by a worker which crashed while sending, due again after the retry delay
+        self.assertEqual(len(_claim_due_emails(None, None, 10, timezone.now())[0]), 1)
+        self.assertEqual(dispatch_emails().sent, 0)
+        EmailOutbox.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(dispatch_emails().sent, 1)
+
+    def test_idempotency(self):
+        self.create_user(username='foo', email='foo@email.com')
+        self.assertTrue(self.resend_activation_email()['success'])
+        self.assertTrue(self.resend_activation_email()['success'])
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.PENDING).count(), 1)
+        dispatch_emails()
+        self.assertEqual(len(mail.outbox), 1)
+        # once sent, the email can be requested again
+        self.assertTrue(self.resend_activation_email()['success'])
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+    def test_verified_user(self):
+        self.create_user(username='foo', email='foo@email.com', verified=True)
+        self.assertFalse(self.resend_activation_email()['success'])
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_command(self):
+        for username in ('foo', 'bar', 'baz'):
+            self.create_user(username=username, email='%s@email.com' % username)
+            self.resend_activation_email('%s@email.com' % username)
+        out = io.StringIO()
+        call_command('send_outbox_emails', '--batch-size', '2', stdout=out)
+        self.assertIn('Sent 3 emails, 0 to retry, 0 failed.', out.getvalue())
+        self.assertEqual(len(mail.outbox), 3)
@@ -2,8 +2,14 @@ import base64
 import json
 
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
 from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.status import status_on_user_model
 
 UserModel = get_user_model()
 
@@ -137,6 +143,76 @@ class QueryTestCase(CommonTestCase):
         result = json.loads(response.content.decode())['data']['users']
         self.assertEqual(len(result["edges"]), UserModel.objects.all().count())
 
+    def get_users_select(self, query) -> str:
+        with CaptureQueriesContext(connection) as context:
+            response = self.query(query)
+        self.assertResponseNoErrors(response)
+        # the page of users, after the session user and the count
+        return context.captured_queries[-1]['sql']
+
+    def test_only_selected_columns(self):
+        self.user2.is_staff = True  # type: ignore
+        self.user2.save()
+        self.client.force_login(self.user2)
+
+        select = self.get_users_select('query { users { edges { node { id, username } } } }')
+        self.assertIn('"username"', select)
+        self.assertNotIn('"email"', select)
+        self.assertNotIn('"password"', select)
+        self.assertNotIn('verified', select)
+        self.assertNotIn('JOIN', select)
+
+        select = self.get_users_select(
+            '''
+            query { users { edges { node { ...UserFields, ... on UserNode { email } } } } }
+            fragment UserFields on UserNode { username, verified }
+            '''
+        )
+        self.assertIn('"email"', select)
+        self.assertIn('"verified"', select)
+        self.assertNotIn('"first_name"', select)
+        self.assertEqual('JOIN' in select, not status_on_user_model())
+
+        # the deferred columns are still read on access
+        response = self.query('query { users(username: "foo") { edges { node { username, secondaryEmail } } } }')
+        self.assertEqual(response.json()['data']['users']['edges'], [{'node': {'username': 'foo', 'secondaryEmail': ''}}])
+
+    def test_only_selected_columns_of_node(self):
+        self.user2.is_staff = True  # type: ignore
+        self.user2.save()
+        self.client.force_login(self.user2)
+        id = base64.b64encode(('UserNode:' + str(self.user1.pk)).encode()).decode()
+        with CaptureQueriesContext(connection) as context:
+            response = self.query('query { user(id: "%s") { firstName } }' % id)
+        self.assertEqual(response.json()['data']['user'], {'firstName': 'foo'})
+        select = context.captured_queries[-1]['sql']
+        self.assertIn('"first_name"', select)
+        self.assertNotIn('"email"', select)
+
+    def test_user_rows(self):
+        self.user2.is_staff = True  # type: ignore
+        self.user2.save()
+        self.client.force_login(self.user2)
+        query = 'query { users(status_Verified: true) { totalCount, edges { node { id, pk, username, verified, archived } } } }'
+        expected = self.query(query).json()['data']['users']
+
+        created = []
+
+        def receiver(instance, **kwargs):
+            created.append(instance)
+
+        post_init.connect(receiver, sender=UserModel)
+        try:
+            with override_settings(GRAPHQL_AUTH={**settings.GRAPHQL_AUTH, 'USER_NODE_ROWS': True}):
+                response = self.query(query)
+        finally:
+            post_init.disconnect(receiver, sender=UserModel)
+        self.assertResponseNoErrors(response)
+        self.assertEqual(response.json()['data']['users'], expected)
+        self.assertEqual(len(expected['edges']), 2)
+        # only the session user is a model instance
+        self.assertEqual(len(created), 1)
+
     def test_me_authenticated(self):
         query = """
         query {
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from graphql_auth.common_testcase import QUERY_BUDGETS, QueryBudgetTracker, check_query_budgets
+from graphql_auth.metrics import current_mutation
+
+from . import test_login
+
+UserModel = get_user_model()
+
+
+class QueryBudgetTestCase(TestCase):
+    query_budgets = {'SwapEmails': 2}
+    _query_budget_tracker = None
+
+    def setUp(self):
+        self._query_budget_baselines = {}
+
+    def swap_emails(self, count_users=False):
+        token = current_mutation.set('SwapEmails')
+        try:
+            UserModel.objects.filter(username='foo').exists()
+            if count_users:
+                UserModel.objects.count()
+            UserModel.objects.filter(username='foo').update(email='foo@email.com')
+        finally:
+            current_mutation.reset(token)
+        self._query_budget_tracker.end_request()
+
+    def test_within_budget(self):
+        check_query_budgets(lambda case: case.swap_emails())(self)
+        # queries out of the budgeted mutations are not counted
+        check_query_budgets(lambda case: [UserModel.objects.count() for _ in range(3)])(self)
+
+    def test_over_budget(self):
+        with self.assertRaises(AssertionError) as context:
+            check_query_budgets(lambda case: case.swap_emails(count_users=True))(self)
+        message = str(context.exception)
+        self.assertIn('SwapEmails ran 3 queries, over its budget of 2:', message)
+        self.assertIn('+ 3. UPDATE', message)
+
+    def test_over_budget_diff(self):
+        def test(case):
+            case.swap_emails()
+            case.swap_emails(count_users=True)
+
+        with self.assertRaises(AssertionError) as context:
+            check_query_budgets(test)(self)
+        message = str(context.exception)
+        self.assertIn('compared to its last call within budget', message)
+        added = [line for line in message.splitlines() if line.startswith('+') and not line.startswith('+++')]
+        self.assertEqual(len(added), 1)
+        self.assertIn('COUNT(*)', added[0])
+
+    def test_baselines_per_test_class(self):
+        check_query_budgets(lambda case: case.swap_emails())(self)
+        self.assertEqual(list(self._query_budget_baselines), ['SwapEmails'])
+        self.assertFalse(hasattr(QueryBudgetTracker, 'baselines'))
+
+    def test_common_test_cases_are_checked(self):
+        for test_case in (test_login.LoginTestCase, test_login.LoginRelayTestCase):
+            self.assertIs(test_case.query_budgets, QUERY_BUDGETS)
+            self.assertTrue(hasattr(test_case.test_login_by_username, '__wrapped__'))
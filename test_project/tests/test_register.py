@@ -4,7 +4,9 @@ from unittest import mock
 
 from graphql_auth.common_testcase import CommonTestCase
 from graphql_auth.constants import Messages
+from graphql_auth.forms import RegisterForm
 from graphql_auth.signals import user_registered
+from graphql_auth.status import status_on_user_model
 
 
 class RegisterCommonTestCase(CommonTestCase):
@@ -60,6 +62,24 @@ class RegisterCommonTestCase(CommonTestCase):
         self.assertIsNone(result['refreshToken'])
         self.assertEqual(result['errors'], Messages.EMAIL_IN_USE)
 
+    def _test_register_db_queries(self):
+        """
+        Uniqueness of the username and the email (primary or secondary)
+        is checked in one single query and the user status is inserted
+        without checking if it exists (or with the user when the status
+        fields are on the user model).
+        """
+        with self.assertNumQueries(6 if status_on_user_model() else 7):
+            response = self.query(self.register_query())
+        result = self.get_response_result(response)
+        self.assertTrue(result['success'])
+
+        with self.assertNumQueries(3):
+            response = self.query(self.register_query())
+        result = self.get_response_result(response)
+        self.assertFalse(result['success'])
+        self.assertIn('username', result['errors'].keys())
+
     def _test_register_with_mocked_async_email_func(self):
         """Register user, fail to register same user again"""
         with mock.patch('graphql_auth.mixins.async_email_func') as async_email_mock:
@@ -127,6 +147,17 @@ class RegisterTestCase(RegisterCommonTestCase):
             password,
         )
 
+    def test_register_form_save(self):
+        """The user is saved by the save of the form, which custom forms may override"""
+        with mock.patch.object(RegisterForm, 'save', autospec=True, side_effect=RegisterForm.save) as save_mock:
+            response = self.query(self.register_query())
+        result = self.get_response_result(response)
+        self.assertTrue(result['success'])
+        self.assertTrue(save_mock.called)
+        user = save_mock.call_args.args[0].instance
+        self.assertIsNotNone(user.pk)
+        self.assertFalse(user.status.verified)
+
 
 class RegisterRelayTestCase(RegisterTestCase):
     RESPONSE_RESULT_KEY = 'relayRegister'
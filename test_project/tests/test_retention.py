@@ -0,0 +1,193 @@
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from graphql_jwt.refresh_token.shortcuts import create_refresh_token
+from graphql_jwt.refresh_token.utils import get_refresh_token_model
+
+from graphql_auth.models import UserStatus
+from graphql_auth.retention import expire_unverified_users, get_policy_queryset, get_unverified_queryset, purge_users
+from graphql_auth.signals import unverified_users_expired, users_purged
+from graphql_auth.status import status_on_user_model
+
+UserModel = get_user_model()
+
+
+class RetentionTestCase(TestCase):
+    def create_user(self, username, archived_days_ago=None, deactivated_days_ago=None):
+        user = UserModel.objects.create(username=username, email='%s@email.com' % username)
+        now = timezone.now()
+        if archived_days_ago is not None:
+            user.status.archived = True  # type: ignore
+            user.status.archived_at = now - timedelta(days=archived_days_ago)  # type: ignore
+        if deactivated_days_ago is not None:
+            user.is_active = False
+            user.save()
+            user.status.deactivated_at = now - timedelta(days=deactivated_days_ago)  # type: ignore
+        user.status.save()  # type: ignore
+        return user
+
+    def test_archive_timestamps(self):
+        user = self.create_user('foo')
+        UserStatus.archive(user)
+        user.refresh_from_db()
+        self.assertIsNotNone(user.status.archived_at)  # type: ignore
+        UserStatus.unarchive(user)
+        user.refresh_from_db()
+        self.assertIsNone(user.status.archived_at)  # type: ignore
+
+    def test_deactivate(self):
+        user = self.create_user('foo')
+        with self.assertNumQueries(1 if status_on_user_model() else 2):
+            UserStatus.deactivate(user)
+        user.refresh_from_db()
+        self.assertFalse(user.is_active)
+        self.assertIsNotNone(user.status.deactivated_at)  # type: ignore
+        user.is_active = True
+        user.save()
+        user.refresh_from_db()
+        self.assertIsNone(user.status.deactivated_at)  # type: ignore
+
+    def test_deactivated_again(self):
+        user = self.create_user('foo')
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() - timedelta(days=60)):
+            UserStatus.deactivate(user)
+            purge_users({'deactivated': timedelta(days=30)})
+        user.is_active = True
+        user.save(update_fields=['is_active'])
+        UserStatus.deactivate(UserModel.objects.get(pk=user.pk))
+        result = purge_users({'deactivated': timedelta(days=30)})
+        self.assertEqual(result.deleted, {'deactivated': 0})
+        self.assertTrue(UserModel.objects.filter(pk=user.pk).exists())
+
+    def test_deactivated_out_of_delete_account(self):
+        user = self.create_user('foo')
+        user.is_active = False
+        user.save()
+        result = purge_users({'deactivated': timedelta(days=30)})
+        self.assertEqual(result.deleted, {'deactivated': 0})
+        user.refresh_from_db()
+        deactivated_at = user.status.deactivated_at  # type: ignore
+        self.assertIsNotNone(deactivated_at)
+        purge_users({'deactivated': timedelta(days=30)})
+        user.refresh_from_db()
+        self.assertEqual(user.status.deactivated_at, deactivated_at)  # type: ignore
+
+    def test_policy_queryset(self):
+        self.create_user('old', archived_days_ago=40)
+        self.create_user('recent', archived_days_ago=10)
+        self.create_user('deactivated', deactivated_days_ago=40)
+        self.create_user('active')
+        archived = get_policy_queryset('archived', timedelta(days=30))
+        self.assertEqual([user.username for user in archived], ['old'])
+        self.assertIn('archived_at', str(archived.query))
+        deactivated = get_policy_queryset('deactivated', timedelta(days=30))
+        self.assertEqual([user.username for user in deactivated], ['deactivated'])
+
+    def test_purge_users_in_batches(self):
+        old_users = [self.create_user('old%d' % i, archived_days_ago=400) for i in range(5)]
+        for user in old_users:
+            create_refresh_token(user)
+        self.create_user('recent', archived_days_ago=10)
+        self.create_user('deactivated', deactivated_days_ago=60)
+        receiver = mock.Mock()
+        users_purged.connect(receiver)
+        self.addCleanup(users_purged.disconnect, receiver)
+        with mock.patch('graphql_auth.retention.time.sleep') as sleep_mock:
+            result = purge_users(
+                {'archived': timedelta(days=365), 'deactivated': timedelta(days=30)}, batch_size=2, pause=0.5
+            )
+        self.assertEqual(result.deleted, {'archived': 5, 'deactivated': 1})
+        self.assertEqual(result.batches, 4)
+        self.assertEqual(sleep_mock.call_count, 2)
+        sleep_mock.assert_called_with(0.5)
+        self.assertEqual(receiver.call_count, 4)
+        self.assertEqual(receiver.call_args_list[0].kwargs['user_pks'], [old_users[0].pk, old_users[1].pk])
+        self.assertEqual(list(UserModel.objects.values_list('username', flat=True)), ['recent'])
+        self.assertFalse(get_refresh_token_model().objects.exists())
+        self.assertEqual(UserStatus.objects.filter(user__isnull=True).count(), 0)
+
+    def test_dry_run(self):
+        self.create_user('old', archived_days_ago=400)
+        result = purge_users({'archived': timedelta(days=365)}, dry_run=True)
+        self.assertEqual(result.deleted, {'archived': 1})
+        self.assertTrue(UserModel.objects.exists())
+
+    @override_settings(GRAPHQL_AUTH={'RETENTION_POLICIES': {'archived': timedelta(days=365)}, 'RETENTION_BATCH_PAUSE': 0})
+    def test_command(self):
+        self.create_user('old', archived_days_ago=400)
+        self.create_user('deactivated', deactivated_days_ago=60)
+        stdout = io.StringIO()
+        call_command('purge_users', stdout=stdout)
+        self.assertIn('Deleted 1 archived users.', stdout.getvalue())
+        stdout = io.StringIO()
+        call_command('purge_users', '--policy', 'deactivated=30', '--dry-run', stdout=stdout)
+        self.assertIn('Would delete 1 deactivated users.', stdout.getvalue())
+        self.assertEqual(UserModel.objects.count(), 1)
+
+
+class ExpireUnverifiedUsersTestCase(TestCase):
+    def create_user(self, username, registered_days_ago, verified=False, **fields):
+        user = UserModel.objects.create(username=username, email='%s@email.com' % username, **fields)
+        user.status.verified = verified  # type: ignore
+        user.status.registered_at = timezone.now() - timedelta(days=registered_days_ago)  # type: ignore
+        user.status.save()  # type: ignore
+        return user
+
+    def setUp(self):
+        self.expired = [self.create_user('expired%d' % i, 10) for i in range(3)]
+        self.create_user('recent', 1)
+        self.create_user('verified', 10, verified=True)
+        self.create_user('admin', 10, is_staff=True, is_superuser=True)
+
+    def test_unverified_queryset(self):
+        queryset = get_unverified_queryset(timedelta(days=7))
+        self.assertEqual([user.username for user in queryset.order_by('pk')], ['expired0', 'expired1', 'expired2'])
+        self.assertIn('registered_at', str(queryset.query))
+
+    def test_delete_in_batches(self):
+        create_refresh_token(self.expired[0])
+        receiver = mock.Mock()
+        unverified_users_expired.connect(receiver)
+        self.addCleanup(unverified_users_expired.disconnect, receiver)
+        result = expire_unverified_users(timedelta(days=7), batch_size=2, pause=0)
+        self.assertEqual((result.count, result.batches), (3, 2))
+        self.assertGreater(result.seconds, 0)
+        self.assertEqual(receiver.call_args_list[0].kwargs['user_pks'], [self.expired[0].pk, self.expired[1].pk])
+        self.assertEqual(receiver.call_args_list[0].kwargs['action'], 'delete')
+        self.assertEqual(
+            sorted(UserModel.objects.values_list('username', flat=True)), ['admin', 'recent', 'verified']
+        )
+        self.assertFalse(get_refresh_token_model().objects.exists())
+        self.assertTrue(UserStatus.email_is_free('expired0@email.com'))
+
+    def test_archive(self):
+        result = expire_unverified_users(timedelta(days=7), action='archive')
+        self.assertEqual((result.count, result.batches), (3, 1))
+        self.expired[0].refresh_from_db()
+        self.assertTrue(self.expired[0].status.archived)  # type: ignore
+        self.assertIsNotNone(self.expired[0].status.archived_at)  # type: ignore
+        # already archived users are not selected again
+        self.assertEqual(expire_unverified_users(timedelta(days=7), action='archive').count, 0)
+        self.assertEqual(UserModel.objects.count(), 6)
+
+    def test_disabled_and_dry_run(self):
+        self.assertEqual(expire_unverified_users().count, 0)
+        self.assertEqual(expire_unverified_users(timedelta(days=7), dry_run=True).count, 3)
+        self.assertEqual(UserModel.objects.count(), 6)
+
+    @override_settings(GRAPHQL_AUTH={'UNVERIFIED_USER_EXPIRATION': timedelta(days=7), 'RETENTION_BATCH_PAUSE': 0})
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command('expire_unverified_users', '--days', '30', '--dry-run', stdout=stdout)
+        self.assertIn('Would delete 0 unverified users.', stdout.getvalue())
+        stdout = io.StringIO()
+        call_command('expire_unverified_users', '--action', 'archive', stdout=stdout)
+        self.assertIn('Archived 3 unverified users.', stdout.getvalue())
+        stdout = io.StringIO()
+        call_command('expire_unverified_users', stdout=stdout)
+        self.assertIn('Deleted 3 unverified users.', stdout.getvalue())
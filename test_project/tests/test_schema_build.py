@@ -0,0 +1,46 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from graphql_auth import mutations, relay
+from graphql_auth.utils import normalize_fields
+from test_project.benchmarks.schema_build import build_schema
+from test_project.schema import AuthMutation, AuthRelayMutation
+
+class SchemaBuildTestCase(SimpleTestCase):
+    def test_dynamic_arguments_are_built_once(self):
+        arguments = dict(mutations.Register._meta.arguments)
+        with mock.patch('graphql_auth.bases.compile_dynamic_fields') as compile_mock:
+            mutations.Register.Field()
+            mutations.Register.Field()
+        self.assertFalse(compile_mock.called)
+        self.assertEqual(arguments, mutations.Register._meta.arguments)
+        for key, argument in mutations.Register.get_dynamic_arguments().items():
+            self.assertIs(mutations.Register._meta.arguments[key], argument)
+
+    def test_dynamic_inputs_are_built_once(self):
+        fields = dict(relay.Register._meta.arguments['input']._meta.fields)
+        with mock.patch('graphql_auth.bases.compile_dynamic_fields') as compile_mock:
+            relay.Register.Field()
+            relay.Register.Field()
+        self.assertFalse(compile_mock.called)
+        self.assertEqual(fields, relay.Register._meta.arguments['input']._meta.fields)
+
+    def test_register_fields_settings_are_not_mutated(self):
+        register_fields = {'email': 'String', 'username': 'String'}
+        normalized = normalize_fields(register_fields, ['password1', 'password2'])
+        self.assertEqual(list(normalized), ['email', 'username', 'password1', 'password2'])
+        self.assertEqual(register_fields, {'email': 'String', 'username': 'String'})
+
+    def test_schema_build(self):
+        # the build time itself is measured by test_project.benchmarks.schema_build
+        arguments = mutations.Register.get_dynamic_arguments()
+        inputs = relay.Register.get_dynamic_inputs()
+        with mock.patch('graphql_auth.bases.compile_dynamic_fields') as compile_mock:
+            schema = build_schema()
+        self.assertFalse(compile_mock.called)
+        self.assertIs(mutations.Register.__dict__['_dynamic_arguments'], arguments)
+        self.assertIs(relay.Register.__dict__['_dynamic_inputs'], inputs)
+        mutation_fields = schema.graphql_schema.mutation_type.fields  # type: ignore
+        expected_fields = {**AuthMutation._meta.fields, **AuthRelayMutation._meta.fields}
+        self.assertEqual(len(mutation_fields), len(expected_fields))
@@ -0,0 +1,98 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from graphql_auth.bulk import import_users
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.models import UserSearchGram
+from graphql_auth.search import get_grams, index_users, search_users
+
+UserModel = get_user_model()
+
+SEARCH_SETTINGS = {
+    'USER_SEARCH_FIELDS': ['username', 'email'],
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+}
+
+
+@override_settings(GRAPHQL_AUTH=SEARCH_SETTINGS)
+class SearchTestCase(CommonTestCase):
+    def setUp(self):
+        self.foo = self.create_user(email='foo@email.com', username='FooBar')
+        self.bar = self.create_user(email='bar@email.com', username='barfoo')
+        self.baz = self.create_user(email='baz@email.com', username='baz', is_staff=True)
+
+    def search(self, lookup_expr, value, field='username'):
+        queryset = search_users(UserModel.objects.order_by('pk'), field, value, lookup_expr)
+        return [getattr(user, field) for user in queryset]
+
+    def test_grams(self):
+        self.assertEqual(get_grams('abcd'), {'ABC', 'BCD'})
+        self.assertEqual(get_grams('ab'), set())
+        self.assertEqual(get_grams('ab', prefix=True), {'\x02\x02A', '\x02AB'})
+
+    def test_indexed_on_save(self):
+        grams = set(UserSearchGram.objects.filter(user=self.foo, field='username').values_list('gram', flat=True))
+        self.assertEqual(grams, get_grams('FooBar', prefix=True))
+        self.foo.username = 'qux'
+        self.foo.save(update_fields=['username'])
+        grams = set(UserSearchGram.objects.filter(user=self.foo, field='username').values_list('gram', flat=True))
+        self.assertEqual(grams, get_grams('qux', prefix=True))
+        # saving other fields does not touch the index
+        with self.assertNumQueries(1):
+            self.foo.save(update_fields=['first_name'])
+        self.foo.delete()
+        self.assertFalse(UserSearchGram.objects.filter(user_id=self.foo.pk).exists())
+
+    def test_search(self):
+        self.assertEqual(self.search('icontains', 'OOB'), ['FooBar'])
+        self.assertEqual(self.search('icontains', 'foo'), ['FooBar', 'barfoo'])
+        self.assertEqual(self.search('istartswith', 'b'), ['barfoo', 'baz'])
+        self.assertEqual(self.search('istartswith', 'foo'), ['FooBar'])
+        # shorter than a trigram
+        self.assertEqual(self.search('icontains', 'az'), ['baz'])
+        self.assertEqual(self.search('icontains', 'bar@'), [])
+        self.assertEqual(self.search('icontains', 'R@EMAIL', field='email'), ['bar@email.com'])
+        # the trigrams may be out of order, the LIKE is still checked
+        self.assertEqual(self.search('icontains', 'barfoobar'), [])
+
+    def test_search_uses_index(self):
+        with CaptureQueriesContext(connection) as context:
+            self.search('icontains', 'foo')
+        self.assertIn('graphql_auth_usersearchgram', context.captured_queries[0]['sql'])
+        with override_settings(GRAPHQL_AUTH={**SEARCH_SETTINGS, 'USER_SEARCH_FIELDS': []}):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.search('icontains', 'foo'), ['FooBar', 'barfoo'])
+        self.assertNotIn('graphql_auth_usersearchgram', context.captured_queries[0]['sql'])
+
+    def test_users_query(self):
+        self.client.force_login(self.baz)
+        query = 'query { users(%s) { edges { node { username } } } }'
+        response = self.query(query % 'username_Icontains: "OOB"')
+        self.assertEqual(response.json()['data']['users']['edges'], [{'node': {'username': 'FooBar'}}])
+        response = self.query(query % 'username_Istartswith: "bar", isActive: true')
+        self.assertEqual(response.json()['data']['users']['edges'], [{'node': {'username': 'barfoo'}}])
+
+    def test_rebuild(self):
+        users = UserModel.objects.bulk_create([UserModel(username='quxfoo', email='qux@email.com')])
+        self.assertEqual(self.search('icontains', 'xfo'), [])
+        index_users(users, created=True)
+        self.assertEqual(self.search('icontains', 'xfo'), ['quxfoo'])
+
+        UserModel.objects.filter(pk=self.foo.pk).update(username='quxbar')
+        UserSearchGram.objects.create(user=self.foo, field='first_name', gram='FOO')
+        out = io.StringIO()
+        call_command('rebuild_user_search_index', batch_size=2, stdout=out)
+        self.assertIn('Indexed 4 users', out.getvalue())
+        self.assertEqual(self.search('icontains', 'qux'), ['quxbar', 'quxfoo'])
+        self.assertFalse(UserSearchGram.objects.filter(field='first_name').exists())
+
+    def test_imported_users(self):
+        import_users([{'username': 'quxfoo', 'email': 'qux@email.com'}], workers=0)
+        self.assertEqual(self.search('icontains', 'xfo'), ['quxfoo'])
+        self.assertEqual(self.search('istartswith', 'qux'), ['quxfoo'])
+        self.assertEqual(self.search('icontains', 'QUX@', field='email'), ['qux@email.com'])
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from smtplib import SMTPAuthenticationError, SMTPRecipientsRefused
+
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.test import override_settings
+
+from graphql_auth import smtp
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.smtp import AsyncSMTPEmailBackend, AsyncSMTPSender, asend_email
+from graphql_auth.utils import EmailInfo
+from test_project.smtp_server import StandInSMTPServer
+
+SMTP_SETTINGS = {
+    'EMAIL_ASYNC_TASK': 'graphql_auth.smtp.async_email_task',
+}
+
+
+def get_message(to='foo@email.com', body='Hello'):
+    return EmailMessage('Subject', body, 'from@email.com', [to])
+
+
+class AsyncSMTPSenderTestCase(CommonTestCase):
+    server_options: dict = {}
+
+    def setUp(self):
+        self.server = StandInSMTPServer(**self.server_options)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.sender = AsyncSMTPSender('127.0.0.1', self.server.port, timeout=5, pool_size=2)
+        self.addCleanup(self.sender.close)
+
+    def test_persistent_connection(self):
+        self.assertEqual(self.sender.submit([get_message(), get_message('bar@email.com')]).result(), 2)
+        self.assertEqual(self.sender.submit([get_message('baz@email.com', '.dot\n..dots')]).result(), 1)
+        messages = self.server.wait_for_messages(3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual([(sender, to) for sender, to, _ in messages], [
+            ('from@email.com', ['foo@email.com']),
+            ('from@email.com', ['bar@email.com']),
+            ('from@email.com', ['baz@email.com']),
+        ])
+        self.assertIn(b'\r\n.dot\r\n..dots', messages[2][2])
+
+    def test_pipelining(self):
+        message = EmailMessage('Subject', 'Hello', 'Sender <from@email.com>', ['foo@email.com'], ['bar@email.com'])
+        self.sender.submit([message]).result()
+        self.assertIn(
+            ['MAIL FROM:<from@email.com>', 'RCPT TO:<foo@email.com>', 'RCPT TO:<bar@email.com>', 'DATA'],
+            self.server.command_batches,
+        )
+        self.assertNotIn(b'bar@email.com', self.server.messages[0][2])
+
+    def test_reconnect(self):
+        self.sender.submit([get_message()]).result()
+        self.server.drop_connections()
+        self.sender.submit([get_message()]).result()
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_pool(self):
+        futures = [self.sender.submit([get_message()]) for _ in range(10)]
+        self.assertEqual(sum(future.result() for future in futures), 10)
+        self.assertLessEqual(self.server.connections, 2)
+
+    def test_async(self):
+        async def send():
+            return await asyncio.gather(*(self.sender.asend_messages([get_message()]) for _ in range(3)))
+
+        self.assertEqual(asyncio.run(send()), [1, 1, 1])
+        self.assertEqual(len(self.server.messages), 3)
+
+
+class AsyncSMTPSenderWithoutPipeliningTestCase(AsyncSMTPSenderTestCase):
+    server_options = {'pipelining': False, 'credentials': ('user', 'secret'), 'refused_recipients': ['no@email.com']}
+
+    def setUp(self):
+        super().setUp()
+        self.sender.username, self.sender.password = 'user', 'secret'
+
+    def test_pipelining(self):
+        self.sender.submit([get_message()]).result()
+        self.assertIn(['MAIL FROM:<from@email.com>'], self.server.command_batches)
+        self.assertIn(['DATA'], self.server.command_batches)
+
+    def test_authentication_failed(self):
+        self.sender.password = 'wrong'
+        with self.assertRaises(SMTPAuthenticationError):
+            self.sender.submit([get_message()]).result()
+
+    def test_refused_recipient(self):
+        backend = AsyncSMTPEmailBackend(sender=self.sender)
+        with self.assertRaises(SMTPRecipientsRefused):
+            backend.send_messages([get_message('no@email.com')])
+        # partly refused messages are sent to the other recipients
+        message = EmailMessage('Subject', 'Hello', 'from@email.com', ['no@email.com', 'foo@email.com'])
+        with self.assertLogs('graphql_auth.smtp', 'WARNING'):
+            self.assertEqual(backend.send_messages([message, get_message()]), 2)
+        self.assertEqual([to for _, to, _ in self.server.messages], [['foo@email.com'], ['foo@email.com']])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_backend_without_waiting(self):
+        self.assertEqual(AsyncSMTPEmailBackend(fail_silently=True, sender=self.sender).send_messages([get_message('no@email.com')]), 0)
+        backend = AsyncSMTPEmailBackend(wait=False, sender=self.sender)
+        with self.assertLogs('graphql_auth.smtp', 'ERROR'):
+            # queued, the failure is logged
+            self.assertEqual(backend.send_messages([get_message('no@email.com')]), 1)
+            # the callbacks run in order, after the logging one
+            logged = threading.Event()
+            backend.futures[0].add_done_callback(lambda future: logged.set())
+            self.assertTrue(logged.wait(5))
+        self.assertIsInstance(backend.futures[0].exception(), SMTPRecipientsRefused)
+
+
+class AsyncEmailTaskTestCase(CommonTestCase):
+    def setUp(self):
+        self.server = StandInSMTPServer()
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.addCleanup(smtp.close_sender)
+        self.user = self.create_user(email='foo@email.com', username='foo')
+        settings = override_settings(EMAIL_HOST='127.0.0.1', EMAIL_PORT=self.server.port, GRAPHQL_AUTH=SMTP_SETTINGS)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_resend_activation_email(self):
+        response = self.query('mutation { resendActivationEmail(email: "foo@email.com") { success, errors } }')
+        self.assertTrue(response.json()['data']['resendActivationEmail']['success'])
+        (message,) = self.server.wait_for_messages(1)
+        self.assertEqual(message[1], ['foo@email.com'])
+        # not sent by the EMAIL_BACKEND
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_asend_email(self):
+        send = self.user.status.send_password_reset_email
+        self.assertEqual(asyncio.run(asend_email(send, (EmailInfo('testserver'), ['foo@email.com']))), 1)
+        # delivered once awaited
+        self.assertEqual(len(self.server.messages), 1)
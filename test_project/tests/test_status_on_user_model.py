@@ -0,0 +1,76 @@
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from graphql_auth.constants import TokenAction
+from graphql_auth.models import UserStatus, UserStatusFacade
+from graphql_auth.queries import UserNode
+from graphql_auth.shortcuts import get_user_by_email, get_user_to_login
+from graphql_auth.status import copy_status_from_user_model, copy_status_to_user_model, status_on_user_model
+from graphql_auth.utils import get_token
+
+UserModel = get_user_model()
+
+
+@skipUnless(status_on_user_model(), 'run with --settings=settings_status_on_user')
+class StatusOnUserModelTestCase(TestCase):
+    def setUp(self):
+        self.user = UserModel.objects.create(username='foo', email='foo@email.com', secondary_email='bar@email.com')
+
+    def test_status_facade(self):
+        status = self.user.status  # type: ignore
+        self.assertIsInstance(status, UserStatusFacade)
+        self.assertFalse(UserStatus.objects.exists())
+        status.verified = True
+        with self.assertNumQueries(1):
+            status.save(update_fields=['verified'])
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.verified)  # type: ignore
+        self.assertEqual(status, UserStatus.get_for_user(self.user))
+
+    def test_status_methods(self):
+        UserStatus.verify(get_token(self.user, TokenAction.ACTIVATION))
+        UserStatus.archive(self.user)
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.verified, self.user.archived), (True, True))  # type: ignore
+        self.user.status.swap_emails()  # type: ignore
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.email, self.user.secondary_email), ('bar@email.com', 'foo@email.com'))  # type: ignore
+        self.assertFalse(UserStatus.email_is_free('foo@email.com'))
+
+    def test_patched_status_methods(self):
+        with mock.patch('graphql_auth.models.UserStatus.send_activation_email') as send_mock:
+            self.user.status.send_activation_email('info')  # type: ignore
+        send_mock.assert_called_once_with('info')
+
+    def test_single_table_queries(self):
+        with self.assertNumQueries(1) as context:
+            self.assertEqual(get_user_to_login(email='bar@email.com'), self.user)
+            self.assertTrue(self.user.status.secondary_email)  # type: ignore
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'])
+        with self.assertNumQueries(1) as context:
+            self.assertEqual(get_user_by_email('bar@email.com'), self.user)
+        self.assertNotIn('JOIN', context.captured_queries[0]['sql'])
+
+    def test_status_filters(self):
+        UserModel.objects.create(username='verified', verified=True)
+        filterset = UserNode._meta.filterset_class({'status__verified': True}, queryset=UserModel.objects.all())
+        self.assertEqual([user.username for user in filterset.qs], ['verified'])
+        self.assertNotIn('JOIN', str(filterset.qs.query))
+
+    def test_copy_status(self):
+        UserStatus.objects.create(
+            user=self.user, verified=True, archived=True, secondary_email='copy@email.com', version=7
+        )
+        other = UserModel.objects.create(username='other', verified=True, version=3)
+        self.assertEqual(copy_status_to_user_model(batch_size=1), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(
+            (self.user.verified, self.user.archived, self.user.secondary_email, self.user.version),  # type: ignore
+            (True, True, 'copy@email.com', 7),
+        )
+        self.assertEqual(copy_status_from_user_model(batch_size=1), 2)
+        self.assertEqual(UserStatus.objects.get(user=other).version, 3)
+        self.assertTrue(UserStatus.objects.get(user=other).verified)
+        self.assertEqual(UserStatus.objects.count(), 2)
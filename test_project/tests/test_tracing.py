@@ -0,0 +1,64 @@
+from django.test import override_settings
+
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.settings import graphql_auth_settings as app_settings
+from graphql_auth.tracing import InMemoryTracer, span
+
+TRACING_SETTINGS = {
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+    'TRACER': 'graphql_auth.tracing.InMemoryTracer',
+}
+
+
+class TracingTestCase(CommonTestCase):
+    def setUp(self):
+        self.user = self.create_user(email='foo@email.com', username='foo', verified=True)
+
+    def test_no_op_by_default(self):
+        self.assertIsNone(app_settings.tracer)
+        self.assertIs(span('graphql_auth.mutation'), span('graphql_auth.signal'))
+
+    @override_settings(GRAPHQL_AUTH=TRACING_SETTINGS)
+    def test_login_spans(self):
+        tracer = app_settings.tracer
+        self.assertIsInstance(tracer, InMemoryTracer)
+        self.query('mutation { tokenAuth(email: "foo@email.com", password: "%s") { success } }' % self.default_password)
+        (mutation,) = tracer.get_spans('graphql_auth.mutation')
+        self.assertEqual(mutation.attributes, {'mutation': 'ObtainJSONWebToken'})
+        self.assertEqual(
+            [child.name for child in mutation.children],
+            ['graphql_auth.get_user_to_login', 'graphql_auth.authenticate'],
+        )
+        self.assertGreaterEqual(mutation.duration, mutation.children[1].duration)
+
+    @override_settings(GRAPHQL_AUTH=TRACING_SETTINGS)
+    def test_register_spans(self):
+        self.query(
+            """
+            mutation {
+                relayRegister(input: {email: "bar@email.com", username: "bar",
+                    password1: "%s", password2: "%s"}) { success }
+            }
+            """
+            % (self.default_password, self.default_password)
+        )
+        tracer = app_settings.tracer
+        (mutation,) = tracer.get_spans('graphql_auth.mutation')
+        self.assertEqual(
+            [(child.name, child.attributes) for child in mutation.children],
+            [
+                ('graphql_auth.form_validation', {'form': 'RegisterForm'}),
+                ('graphql_auth.get_token', {}),
+                ('graphql_auth.send_email', {'template': 'email/activation_email.html'}),
+                ('graphql_auth.signal', {'signal': 'user_registered'}),
+                ('graphql_auth.authenticate', {}),
+            ],
+        )
+
+    @override_settings(GRAPHQL_AUTH=TRACING_SETTINGS)
+    def test_failed_span(self):
+        tracer = app_settings.tracer
+        with self.assertRaises(ValueError):
+            with span('graphql_auth.signal', signal='user_verified'):
+                raise ValueError
+        self.assertIsInstance(tracer.spans[0].error, ValueError)
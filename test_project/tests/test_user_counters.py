@@ -0,0 +1,149 @@
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from graphql_auth.bulk import import_users
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.counters import SHARDS, count_users, get_user_stats, reconcile_user_counters
+from graphql_auth.models import UserCounter, UserStatus
+from graphql_auth.retention import archive_users, delete_users
+from graphql_auth.utils import get_token
+
+UserModel = get_user_model()
+
+COUNTER_SETTINGS = {
+    'USER_COUNTERS': True,
+    'ALLOW_DELETE_ACCOUNT': True,
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+}
+
+STATS_QUERY = 'query { userStats { total, verified, unverified, archived } }'
+
+
+@override_settings(GRAPHQL_AUTH=COUNTER_SETTINGS)
+class UserCountersTestCase(CommonTestCase):
+    def setUp(self):
+        self.staff = self.create_user(email='staff@email.com', username='staff', verified=True, is_staff=True)
+        self.foo = self.create_user(email='foo@email.com', username='foo')
+        # the statuses of create_user are saved directly
+        reconcile_user_counters()
+
+    def assertCounted(self):
+        self.assertEqual(get_user_stats(), count_users())
+
+    def test_counted_changes(self):
+        response = self.query(
+            '''
+            mutation {
+                register(email: "bar@email.com", username: "bar", password1: "aaa&&111", password2: "aaa&&111")
+                { success }
+            }
+            '''
+        )
+        self.assertTrue(response.json()['data']['register']['success'])
+        self.assertEqual(get_user_stats(), {'total': 3, 'verified': 1, 'archived': 0})
+        UserStatus.verify(get_token(self.foo, 'activation'))
+        self.foo.refresh_from_db()
+        UserStatus.archive(self.foo)
+        self.assertEqual(get_user_stats(), {'total': 3, 'verified': 2, 'archived': 1})
+        UserStatus.unarchive(self.foo)
+        self.assertCounted()
+
+        self.client.force_login(self.foo)
+        response = self.query('mutation { deleteAccount(password: "%s") { success } }' % self.default_password)
+        self.assertTrue(response.json()['data']['deleteAccount']['success'])
+        self.assertEqual(get_user_stats(), {'total': 2, 'verified': 1, 'archived': 0})
+
+        bar = UserModel.objects.get(username='bar')
+        archive_users([bar.pk])
+        self.assertCounted()
+        delete_users([bar.pk])
+        self.assertEqual(get_user_stats(), {'total': 1, 'verified': 1, 'archived': 0})
+
+    def test_counted_deletions(self):
+        # deleted by the ORM (admin, QuerySet.delete...)
+        self.staff.delete()
+        self.assertEqual(get_user_stats(), {'total': 1, 'verified': 0, 'archived': 0})
+        users = [self.create_user(email='%d@email.com' % i, username=str(i), verified=True) for i in range(3)]
+        reconcile_user_counters()
+        UserModel.objects.filter(pk=users[0].pk).delete()
+        self.assertCounted()
+        # one update of the counters per batch
+        with CaptureQueriesContext(connection) as context:
+            delete_users([user.pk for user in users[1:]])
+        self.assertEqual(len([query for query in context.captured_queries if 'graphql_auth_usercounter' in query['sql']]), 1)
+        self.assertEqual(get_user_stats(), {'total': 1, 'verified': 0, 'archived': 0})
+
+    def test_import(self):
+        records = [
+            {'model': 'auth.user', 'pk': 7, 'fields': {'username': 'bar', 'email': 'bar@email.com'}},
+            {'model': 'auth.user', 'pk': 8, 'fields': {'username': 'baz', 'email': 'baz@email.com'}},
+            {'model': 'graphql_auth.userstatus', 'fields': {'user': 7, 'verified': True, 'archived': True}},
+        ]
+        import_users(records, batch_size=2, workers=0)
+        self.assertEqual(get_user_stats(), {'total': 4, 'verified': 2, 'archived': 1})
+        self.assertCounted()
+
+    def test_shards(self):
+        self.create_user(email='bar@email.com', username='bar')
+        self.assertEqual(UserCounter.objects.count(), 3 * SHARDS)
+        self.assertCounted()
+
+    def test_rows_created_on_first_update(self):
+        UserCounter.objects.all().delete()
+        # counted until the rows are created
+        self.assertEqual(get_user_stats(), count_users())
+        with CaptureQueriesContext(connection) as context:
+            UserStatus.verify(get_token(self.foo, 'activation'))
+        # update, insert of the rows and update again, without counting the users
+        self.assertEqual(
+            [query['sql'].split()[0] for query in context.captured_queries[-3:]], ['UPDATE', 'INSERT', 'UPDATE']
+        )
+        self.assertFalse(any('COUNT' in query['sql'] for query in context.captured_queries))
+        self.assertEqual(UserCounter.objects.count(), 3 * SHARDS)
+        # without the users before, until reconciled
+        self.assertEqual(get_user_stats(), {'total': 0, 'verified': 1, 'archived': 0})
+        reconcile_user_counters()
+        self.assertEqual(get_user_stats(), {'total': 2, 'verified': 2, 'archived': 0})
+
+    def test_user_stats_query(self):
+        self.client.force_login(self.foo)
+        response = self.query(STATS_QUERY)
+        self.assertResponseNoErrors(response)
+        self.assertIsNone(response.json()['data']['userStats'])
+
+        self.client.force_login(self.staff)
+        with self.assertNumQueries(3):
+            # session, user and the counters
+            response = self.query(STATS_QUERY)
+        self.assertEqual(
+            response.json()['data']['userStats'], {'total': 2, 'verified': 1, 'unverified': 1, 'archived': 0}
+        )
+        with override_settings(GRAPHQL_AUTH={**COUNTER_SETTINGS, 'USER_COUNTERS': False}):
+            self.assertEqual(self.query(STATS_QUERY).json()['data']['userStats']['unverified'], 1)
+
+    def test_reconcile_command(self):
+        UserModel.objects.filter(pk=self.foo.pk).delete()
+        self.assertEqual(get_user_stats()['total'], 1)
+        # drift
+        UserCounter.objects.filter(name='total', shard=0).update(value=F('value') + 1)
+        self.assertEqual(get_user_stats()['total'], 2)
+        out = io.StringIO()
+        call_command('reconcile_user_counters', stdout=out)
+        self.assertIn('1 users, 1 verified, 0 archived', out.getvalue())
+        self.assertEqual(get_user_stats()['total'], 1)
+        with override_settings(GRAPHQL_AUTH={**COUNTER_SETTINGS, 'USER_COUNTERS': False}):
+            with self.assertRaises(CommandError):
+                call_command('reconcile_user_counters')
+
+    def test_disabled(self):
+        UserCounter.objects.all().delete()
+        with override_settings(GRAPHQL_AUTH={**COUNTER_SETTINGS, 'USER_COUNTERS': False}):
+            self.create_user(email='bar@email.com', username='bar')
+            self.assertEqual(get_user_stats()['total'], 3)
+        self.assertFalse(UserCounter.objects.exists())
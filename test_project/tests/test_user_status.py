@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from unittest import skipIf
+
+from django.test import TestCase
+
+from graphql_auth.models import UserStatus
+from graphql_auth.status import status_on_user_model
+
+UserModel = get_user_model()
+
+
+@skipIf(status_on_user_model(), 'the status fields are on the user model')
+class UserStatusCreationTestCase(TestCase):
+    def test_status_is_created_on_user_creation(self):
+        user = UserModel.objects.create(username='foo', email='foo@email.com')
+        self.assertFalse(UserStatus.objects.get(user=user).verified)
+
+    def test_attached_status_is_inserted_without_select(self):
+        user = UserModel(username='foo', email='foo@email.com')
+        UserStatus.attach(user, verified=True)
+        # INSERT user, INSERT status
+        with self.assertNumQueries(2):
+            user.save()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.status.verified)  # type: ignore
+        self.assertTrue(UserStatus.objects.get(user=user).verified)
+
+    def test_bulk_create_for_users(self):
+        users = UserModel.objects.bulk_create(
+            [UserModel(username='user%d' % i, email='user%d@email.com' % i) for i in range(10)]
+        )
+        self.assertEqual(UserStatus.objects.filter(user__in=users).count(), 0)
+        with self.assertNumQueries(1):
+            UserStatus.objects.bulk_create_for_users(users, verified=True)
+        with self.assertNumQueries(0):
+            self.assertTrue(all(user.status.verified for user in users))  # type: ignore
+        self.assertEqual(UserStatus.objects.filter(user__in=users, verified=True).count(), 10)
+
+    def test_bulk_create_for_users_without_primary_keys(self):
+        UserModel.objects.bulk_create([UserModel(username='user%d' % i) for i in range(3)])
+        users = [UserModel(username='user%d' % i) for i in range(3)]
+        with self.assertNumQueries(2):
+            UserStatus.objects.bulk_create_for_users(users)
+        self.assertEqual(UserStatus.objects.filter(user__username__startswith='user').count(), 3)
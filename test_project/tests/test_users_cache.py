@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.test import override_settings
+
+from graphql_auth.bulk import import_users
+from graphql_auth.cache import get_generation, invalidate_users_cache
+from graphql_auth.common_testcase import CommonTestCase
+from graphql_auth.models import UserStatus, bump_version
+from graphql_auth.retention import archive_users, delete_users
+from graphql_auth.utils import get_token
+
+UserModel = get_user_model()
+
+CACHE_SETTINGS = {
+    'USERS_CACHE_TIMEOUT': 60,
+    'EMAIL_ASYNC_TASK': 'test_project.pseudo_async_email_support.pseudo_async_email_support',
+}
+
+USERS_QUERY = '''
+query {
+    users(%s) {
+        totalCount
+        edges { cursor, node { username, verified } }
+        pageInfo { hasNextPage, endCursor }
+    }
+}
+'''
+
+
+@override_settings(GRAPHQL_AUTH=CACHE_SETTINGS)
+class UsersCacheTestCase(CommonTestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = self.create_user(email='staff@email.com', username='staff', verified=True, is_staff=True)
+        self.foo = self.create_user(email='foo@email.com', username='foo')
+        self.bar = self.create_user(email='bar@email.com', username='bar')
+        self.client.force_login(self.staff)
+
+    def users(self, arguments='first: 2'):
+        response = self.query(USERS_QUERY % arguments)
+        self.assertResponseNoErrors(response)
+        return response.json()['data']['users']
+
+    def test_cached_page(self):
+        with self.assertNumQueries(4):
+            # session user, count and page
+            first = self.users('first: 1, status_Verified: false')
+        with self.assertNumQueries(3):
+            # session user and the users of the page
+            self.assertEqual(self.users('status_Verified: false, first: 1'), first)
+        self.assertEqual(first['totalCount'], 2)
+        self.assertEqual(first['edges'][0]['node'], {'username': 'foo', 'verified': False})
+
+        # next page, other key
+        second = self.users('first: 1, status_Verified: false, after: "%s"' % first['pageInfo']['endCursor'])
+        self.assertEqual(second['edges'][0]['node']['username'], 'bar')
+        self.assertFalse(second['pageInfo']['hasNextPage'])
+
+    def test_invalidated_on_change(self):
+        self.assertEqual(self.users('status_Verified: false')['totalCount'], 2)
+        UserStatus.verify(get_token(self.foo, 'activation'))
+        self.assertEqual(self.users('status_Verified: false')['totalCount'], 1)
+        self.bar.username = 'baz'
+        self.bar.save()
+        self.assertEqual(self.users('status_Verified: false')['edges'][0]['node']['username'], 'baz')
+        delete_users([self.bar.pk])
+        self.assertEqual(self.users('status_Verified: false')['totalCount'], 0)
+
+        # not on the last login saved by every login
+        generation = get_generation()
+        update_last_login(None, self.foo)
+        self.assertEqual(get_generation(), generation)
+
+        # not seen without signals
+        self.assertEqual(self.users('isActive: true')['totalCount'], 2)
+        UserModel.objects.filter(pk=self.foo.pk).update(is_active=False, username='qux')
+        page = self.users('isActive: true')
+        self.assertEqual(page['totalCount'], 2)
+        # the users of the page are read again with the filters, leaving out those not matching anymore
+        self.assertEqual([edge['node']['username'] for edge in page['edges']], ['staff'])
+        invalidate_users_cache()
+        self.assertEqual(self.users('isActive: true')['totalCount'], 1)
+
+    def test_invalidated_by_writes_without_signals(self):
+        self.assertEqual(self.users('status_Verified: false')['totalCount'], 2)
+        import_users([{'username': 'baz', 'email': 'baz@email.com'}], workers=0)
+        self.assertEqual(self.users('status_Verified: false')['totalCount'], 3)
+
+        self.assertEqual(self.users('status_Archived: true')['totalCount'], 0)
+        archive_users([self.foo.pk])
+        self.assertEqual(self.users('status_Archived: true')['totalCount'], 1)
+
+        generation = get_generation()
+        bump_version(self.bar)
+        self.assertGreater(get_generation(), generation)
+
+    def test_not_staff(self):
+        self.client.force_login(self.foo)
+        self.assertEqual(self.users()['edges'], [])
+        self.client.force_login(self.staff)
+        self.assertEqual(len(self.users()['edges']), 2)
+
+    def test_disabled(self):
+        with override_settings(GRAPHQL_AUTH={**CACHE_SETTINGS, 'USERS_CACHE_TIMEOUT': None}):
+            self.users()
+            with self.assertNumQueries(4):
+                self.users()
+
+    def test_rows(self):
+        with override_settings(GRAPHQL_AUTH={**CACHE_SETTINGS, 'USER_NODE_ROWS': True}):
+            first = self.users('first: 1, status_Verified: false')
+            with self.assertNumQueries(3):
+                self.assertEqual(self.users('first: 1, status_Verified: false'), first)
+        self.assertEqual(first['edges'][0]['node'], {'username': 'foo', 'verified': False})
@@ -20,7 +20,10 @@ from django.views.decorators.csrf import csrf_exempt
 
 from graphene_django.views import GraphQLView
 
+from graphql_auth.views import conditional_me_view, export_users_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("graphql", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("graphql", csrf_exempt(conditional_me_view(GraphQLView.as_view(graphiql=True)))),
+    path("users/export", export_users_view),
 ]